@@ -0,0 +1,328 @@
+"""
+End-to-end benchmark of the Habitica client and command handlers against a local mock server.
+
+Every scenario gets a fresh mock Habitica (see benchmarks/mock_habitica.py)
+and a fresh HabiticaManager, is warmed up, then run ``--requests`` times by
+``--concurrency`` workers. A second, shorter pass under tracemalloc measures
+memory. Run from the repository root:
+
+    python -m benchmarks.bench_habitica
+    python -m benchmarks.bench_habitica --latency 50 --jitter 20 --error-rate 0.01
+    python -m benchmarks.bench_habitica --save benchmarks/baselines/habitica.json
+    python -m benchmarks.bench_habitica --compare benchmarks/baselines/habitica.json
+
+``--compare`` exits with status 1 if any scenario's p95 latency grew, or its
+throughput shrank, by more than ``--tolerance`` relative to the baseline.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import discord
+from discord.ext import commands
+
+from benchmarks.mock_habitica import MockHabitica
+from src.pa_square.bot.commands import setup_commands
+from src.pa_square.bot.outbound import Outbound
+from src.pa_square.habitica.cache import TaskCache
+from src.pa_square.habitica.connection import ConnectionPool
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.models import JSON_BACKEND
+from src.pa_square.habitica.rate_limiter import RequestScheduler, TokenBucket
+
+# An operation returns True on success
+Operation = Callable[[int], Awaitable[bool]]
+
+
+@dataclass
+class Result:
+    """Measurements of one scenario."""
+
+    requests: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    alloc_peak_kib: float
+    retained_kib: float
+
+
+class FakeContext:
+    """Just enough of commands.Context for the command callbacks."""
+
+    def __init__(self, author_id: int) -> None:
+        self.author = discord.Object(id=author_id)
+        self.author.mention = f"<@{author_id}>"
+        self.channel = discord.Object(id=author_id)
+        self.sent: Optional[str] = None
+
+    async def send(self, content: Optional[str] = None, **kwargs: Any) -> "FakeContext":
+        self.sent = content
+        return self
+
+    async def edit(self, **kwargs: Any) -> None:
+        pass
+
+
+class Bench:
+    """
+    One scenario's environment: a mock server, a manager and the bot commands.
+
+    Args:
+        settings: Parsed command line options
+    """
+
+    def __init__(self, settings: argparse.Namespace) -> None:
+        self.settings = settings
+        self.server = MockHabitica(
+            latency=settings.latency / 1000,
+            jitter=settings.jitter / 1000,
+            error_rate=settings.error_rate,
+            rate_limit=settings.rate_limit,
+            rate_window=settings.rate_window,
+            tasks=settings.tasks,
+        )
+        self.manager: Optional[HabiticaManager] = None
+        self.bot: Optional[commands.Bot] = None
+        self.outbound: Optional[Outbound] = None
+
+    async def __aenter__(self) -> "Bench":
+        url = await self.server.start()
+        rate = self.settings.rate_limit
+        scheduler = RequestScheduler(TokenBucket(rate, rate / self.settings.rate_window))
+        self.manager = HabiticaManager(
+            scheduler=scheduler,
+            pool=ConnectionPool(limit_per_host=self.settings.concurrency),
+            cache=TaskCache(ttl=self.settings.cache_ttl),
+            username="bench",
+            password="bench",
+        )
+        self.manager.base_url = url
+        self.bot = commands.Bot(command_prefix="!", intents=discord.Intents.default())
+        # Pacing per channel is Discord's business, the benchmark measures our side
+        self.outbound = Outbound(rate=100000, per=1.0)
+        await setup_commands(self.bot, self.manager, outbound=self.outbound)
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.outbound.close()
+        await self.manager.breaker.close()
+        await self.manager.close_session()
+        await self.manager.pool.close()
+        await self.server.stop()
+
+    def operation(self, scenario: str) -> Operation:
+        """Get the operation a scenario repeats."""
+        manager = self.manager
+
+        async def get_todos(i: int) -> bool:
+            return isinstance(await manager.get_todos("todos"), dict)
+
+        async def get_todos_full(i: int) -> bool:
+            manager.cache.invalidate(manager._cache_key("todos")[0])
+            return isinstance(await manager.get_todos("todos"), dict)
+
+        async def create_todo(i: int) -> bool:
+            return isinstance(await manager.create_todo(f"Benchmark todo {i}", "todo"), dict)
+
+        todo = self.bot.get_command("todo")
+        add_many = self.bot.get_command("todo add-many")
+        outbound = self.outbound
+
+        async def command_todo(i: int) -> bool:
+            ctx = FakeContext(i)
+            await todo.callback(ctx)
+            await outbound.join(ctx)
+            return not (ctx.sent or "").startswith("Habitica said no")
+
+        async def command_add_many(i: int) -> bool:
+            ctx = FakeContext(i)
+            await add_many.callback(ctx, items=";".join(f"Item {i}.{n}" for n in range(5)))
+            await outbound.join(ctx)
+            return (ctx.sent or "").startswith("Created 5/5")
+
+        return {
+            "get_todos": get_todos,
+            "get_todos_full": get_todos_full,
+            "create_todo": create_todo,
+            "command_todo": command_todo,
+            "command_add_many": command_add_many,
+        }[scenario]
+
+
+SCENARIOS = ("get_todos", "get_todos_full", "create_todo", "command_todo", "command_add_many")
+
+
+async def drive(operation: Operation, requests: int, concurrency: int) -> tuple:
+    """
+    Run an operation ``requests`` times with ``concurrency`` workers.
+
+    Returns:
+        Tuple of (latencies in seconds, errors, elapsed seconds)
+    """
+    counter = iter(range(requests))
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                ok = await operation(i)
+            except Exception:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Interpolated percentile, q in [0, 100]."""
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[int(q) - 1]
+
+
+async def run_scenario(scenario: str, settings: argparse.Namespace) -> Result:
+    """Measure one scenario."""
+    async with Bench(settings) as bench:
+        operation = bench.operation(scenario)
+        await drive(operation, settings.warmup, settings.concurrency)
+
+        gc.collect()
+        latencies, errors, seconds = await drive(
+            operation, settings.requests, settings.concurrency
+        )
+
+        gc.collect()
+        tracemalloc.start()
+        before, _ = tracemalloc.get_traced_memory()
+        await drive(operation, settings.alloc_requests, settings.concurrency)
+        gc.collect()
+        after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return Result(
+        requests=len(latencies),
+        errors=errors,
+        seconds=round(seconds, 4),
+        throughput=round(len(latencies) / seconds, 1),
+        p50_ms=round(percentile(latencies, 50) * 1000, 3),
+        p95_ms=round(percentile(latencies, 95) * 1000, 3),
+        p99_ms=round(percentile(latencies, 99) * 1000, 3),
+        alloc_peak_kib=round((peak - before) / 1024, 1),
+        retained_kib=round((after - before) / 1024, 1),
+    )
+
+
+def compare(results: Dict[str, Result], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    List the regressions of a run against a baseline.
+
+    Args:
+        results: Results of this run
+        baseline: Saved baseline document
+        tolerance: Allowed relative change, e.g. 0.2 for 20%
+
+    Returns:
+        One line per regression
+    """
+    regressions = []
+    for scenario, result in results.items():
+        base = baseline.get("results", {}).get(scenario)
+        if base is None:
+            continue
+        if result.p95_ms > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{scenario}: p95 {result.p95_ms:.2f} ms vs {base['p95_ms']:.2f} ms baseline"
+            )
+        if result.throughput < base["throughput"] * (1 - tolerance):
+            regressions.append(
+                f"{scenario}: {result.throughput:.0f} req/s vs {base['throughput']:.0f} baseline"
+            )
+    return regressions
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the Habitica client offline")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--alloc-requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.0, help="server latency, ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, ms")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction answered 503")
+    parser.add_argument("--rate-limit", type=int, default=100000, help="requests per window")
+    parser.add_argument("--rate-window", type=float, default=60.0, help="seconds")
+    parser.add_argument("--tasks", type=int, default=100, help="todos in the list")
+    parser.add_argument("--cache-ttl", type=float, default=0.0,
+                        help="task cache TTL, 0 revalidates on every read")
+    parser.add_argument("--save", help="write the results as a JSON baseline")
+    parser.add_argument("--compare", help="compare against a JSON baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    return parser.parse_args(argv)
+
+
+async def run(settings: argparse.Namespace) -> Dict[str, Result]:
+    results = {}
+    print(f"{'scenario':<18} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>7} {'peak KiB':>9} {'kept KiB':>9}")
+    for scenario in settings.scenarios.split(","):
+        result = results[scenario] = await run_scenario(scenario, settings)
+        print(f"{scenario:<18} {result.throughput:>9.1f} {result.p50_ms:>8.2f} "
+              f"{result.p95_ms:>8.2f} {result.p99_ms:>8.2f} {result.errors:>7} "
+              f"{result.alloc_peak_kib:>9.1f} {result.retained_kib:>9.1f}")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    settings = parse_args(argv)
+    results = asyncio.run(run(settings))
+
+    document = {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "json_backend": JSON_BACKEND,
+        },
+        "settings": {k: v for k, v in vars(settings).items() if k not in ("save", "compare")},
+        "results": {scenario: asdict(result) for scenario, result in results.items()},
+    }
+    if settings.save:
+        with open(settings.save, "w") as f:
+            json.dump(document, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {settings.save}")
+    if settings.compare:
+        with open(settings.compare) as f:
+            baseline = json.load(f)
+        for name, value in document["settings"].items():
+            if name not in ("scenarios", "tolerance") and baseline["settings"].get(name) != value:
+                print(f"warning: {name} is {value}, baseline used {baseline['settings'].get(name)}")
+        regressions = compare(results, baseline, settings.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {settings.tolerance:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark of the moderation filter against the naive per-word check.
+
+The filter should never be slower than the naive check, and its cost per
+message should stop growing with the word list: from AUTOMATON_MIN_WORDS
+words on, one automaton pass costs the same however long the list is.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_moderation
+"""
+
+import random
+import string
+import timeit
+
+from src.pa_square.bot.moderation import AUTOMATON_MIN_WORDS, ModerationFilter, normalize
+
+MESSAGE_LENGTHS = (50, 500, 2000)
+WORD_COUNTS = (1, 10, 100, 150, 1000, 10000)
+NUMBER = 100
+REPEAT = 5
+
+
+def random_words(count: int, rng: random.Random) -> list:
+    """Generate distinct lower-case words of 4 to 10 letters."""
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))))
+    return sorted(words)
+
+
+def random_message(length: int, words: list, rng: random.Random) -> str:
+    """Generate a clean message, the worst case since every position is scanned."""
+    message = rng.choices(string.ascii_letters + "      ", k=length)
+    # Long lists would otherwise match early and hide the cost of a full scan
+    for word in words:
+        while (start := normalize("".join(message)).find(word)) != -1:
+            message[start] = " "
+    return "".join(message)
+
+
+def naive_check(words: list, content: str) -> bool:
+    """The previous approach: one substring scan per word over a lower-cased copy."""
+    lowered = normalize(content)
+    return any(word in lowered for word in words)
+
+
+def main() -> None:
+    rng = random.Random(0)
+    print(
+        f"{'words':>6} {'matcher':>9} {'chars':>6} {'naive µs':>10} {'compiled µs':>12} "
+        f"{'speedup':>8}"
+    )
+    for count in WORD_COUNTS:
+        words = random_words(count, rng)
+        moderation = ModerationFilter(default_words=words)
+        matcher = "automaton" if count >= AUTOMATON_MIN_WORDS else "substring"
+        for length in MESSAGE_LENGTHS:
+            message = random_message(length, words, rng)
+            naive = min(
+                timeit.repeat(lambda: naive_check(words, message), number=NUMBER, repeat=REPEAT)
+            )
+            compiled = min(
+                timeit.repeat(
+                    lambda: moderation.check(None, message), number=NUMBER, repeat=REPEAT
+                )
+            )
+            print(
+                f"{count:>6} {matcher:>9} {length:>6} {naive / NUMBER * 1e6:>10.1f} "
+                f"{compiled / NUMBER * 1e6:>12.1f} {naive / compiled:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
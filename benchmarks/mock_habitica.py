@@ -0,0 +1,245 @@
+"""
+Local stand-in for the parts of the Habitica API the bot uses.
+
+Serves login, task list, task creation and status endpoints under
+``/api/v3`` with configurable latency, error rate and rate limit, so the
+client can be benchmarked without a network. Run it on its own with:
+
+    python -m benchmarks.mock_habitica --port 8080 --latency 50
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+API_PREFIX = "/api/v3"
+USER_ID = "00000000-0000-4000-8000-000000000000"
+API_TOKEN = "mock-api-token"
+
+
+def make_task(index: int, task_type: str = "todo") -> Dict[str, Any]:
+    """Build a task shaped like a real Habitica response, including fields the bot ignores."""
+    return {
+        "_id": f"{index:08d}-0000-4000-8000-000000000000",
+        "id": f"{index:08d}-0000-4000-8000-000000000000",
+        "userId": USER_ID,
+        "type": task_type,
+        "text": f"Task number {index}",
+        "notes": "",
+        "tags": [],
+        "value": 0,
+        "priority": 1,
+        "attribute": "str",
+        "challenge": {},
+        "group": {"approval": {"required": False, "approved": False, "requested": False},
+                  "assignedUsers": [], "sharedCompletion": "singleCompletion"},
+        "byHabitica": False,
+        "reminders": [],
+        "checklist": [{"id": f"{index:08d}-c", "text": "step", "completed": index % 2 == 0}],
+        "collapseChecklist": False,
+        "completed": False,
+        "date": f"2026-{index % 12 + 1:02d}-{index % 28 + 1:02d}T00:00:00.000Z",
+        "createdAt": "2026-10-17T00:00:00.000Z",
+        "updatedAt": "2026-10-17T00:00:00.000Z",
+    }
+
+
+class MockHabitica:
+    """
+    aiohttp application imitating Habitica.
+
+    Every request waits ``latency`` seconds (plus up to ``jitter`` more) and
+    then fails with a 503 with probability ``error_rate``. Requests beyond
+    ``rate_limit`` per ``rate_window`` seconds are answered with 429 and
+    Retry-After, and every response carries X-RateLimit-* headers like the
+    real API. Task lists are served with an ETag and answer 304 to a
+    matching If-None-Match.
+
+    Args:
+        latency: Seconds added to every request
+        jitter: Maximum random extra latency in seconds
+        error_rate: Fraction of requests answered with 503
+        rate_limit: Requests allowed per window
+        rate_window: Window length in seconds
+        tasks: Number of todos in the list
+        seed: Random seed for jitter and errors
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: int = 100000,
+        rate_window: float = 60.0,
+        tasks: int = 100,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.tasks: List[Dict[str, Any]] = [make_task(i) for i in range(tasks)]
+        self.requests = 0
+        self.errors = 0
+        self.throttled = 0
+        self._random = random.Random(seed)
+        self._window_start = time.monotonic()
+        self._window_count = 0
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    def app(self) -> web.Application:
+        """Build the aiohttp application."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post(f"{API_PREFIX}/user/auth/local/login", self.login)
+        app.router.add_get(f"{API_PREFIX}/tasks/user", self.list_tasks)
+        app.router.add_post(f"{API_PREFIX}/tasks/user", self.create_tasks)
+        app.router.add_get(f"{API_PREFIX}/status", self.status)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Start serving.
+
+        Returns:
+            API base URL, e.g. http://127.0.0.1:54321/api/v3
+        """
+        self._runner = web.AppRunner(self.app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://{host}:{bound_port}{API_PREFIX}"
+        return self.url
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _rate_limit_headers(self, now: float) -> Dict[str, str]:
+        reset_in = max(0.0, self._window_start + self.rate_window - now)
+        return {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(max(0, self.rate_limit - self._window_count)),
+            "X-RateLimit-Reset": f"{reset_in:.3f}",
+        }
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler) -> web.StreamResponse:
+        self.requests += 1
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0)
+        if delay:
+            await asyncio.sleep(delay)
+
+        now = time.monotonic()
+        if now - self._window_start >= self.rate_window:
+            self._window_start, self._window_count = now, 0
+        self._window_count += 1
+        headers = self._rate_limit_headers(now)
+
+        if self._window_count > self.rate_limit:
+            self.throttled += 1
+            headers["Retry-After"] = headers["X-RateLimit-Reset"]
+            return web.json_response(
+                {"success": False, "error": "TooManyRequests"}, status=429, headers=headers
+            )
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.json_response(
+                {"success": False, "error": "ServiceUnavailable"}, status=503, headers=headers
+            )
+
+        response = await handler(request)
+        response.headers.update(headers)
+        return response
+
+    async def login(self, request: web.Request) -> web.Response:
+        """POST /user/auth/local/login"""
+        body = await request.json()
+        if not body.get("username") or not body.get("password"):
+            return web.json_response({"success": False}, status=401)
+        return web.json_response(
+            {"success": True, "data": {"id": USER_ID, "apiToken": API_TOKEN}}
+        )
+
+    def _authorized(self, request: web.Request) -> bool:
+        return request.headers.get("x-api-key") == API_TOKEN
+
+    async def list_tasks(self, request: web.Request) -> web.Response:
+        """GET /tasks/user"""
+        if not self._authorized(request):
+            return web.json_response({"success": False}, status=401)
+        if self._body is None:
+            self._body = json.dumps({"success": True, "data": self.tasks}).encode()
+            self._etag = 'W/"' + hashlib.md5(self._body).hexdigest() + '"'
+        if request.headers.get("If-None-Match") == self._etag:
+            return web.Response(status=304, headers={"ETag": self._etag})
+        return web.Response(
+            body=self._body, content_type="application/json", headers={"ETag": self._etag}
+        )
+
+    async def create_tasks(self, request: web.Request) -> web.Response:
+        """POST /tasks/user, a single body or an array"""
+        if not self._authorized(request):
+            return web.json_response({"success": False}, status=401)
+        body = await request.json()
+        bodies = body if isinstance(body, list) else [body]
+        if any(not item.get("text") for item in bodies):
+            return web.json_response({"success": False, "error": "BadRequest"}, status=400)
+        created = []
+        for item in bodies:
+            task_id = str(uuid.uuid4())
+            created.append({
+                **make_task(0, item.get("type", "todo")), **item, "_id": task_id, "id": task_id
+            })
+        self.tasks.extend(task for task in created if task["type"] == "todo")
+        self._body = None
+        return web.json_response(
+            {"success": True, "data": created if isinstance(body, list) else created[0]},
+            status=201,
+        )
+
+    async def status(self, request: web.Request) -> web.Response:
+        """GET /status"""
+        return web.json_response({"success": True, "data": {"status": "up"}})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="milliseconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=int, default=30)
+    parser.add_argument("--rate-window", type=float, default=60.0)
+    parser.add_argument("--tasks", type=int, default=100)
+    args = parser.parse_args()
+
+    server = MockHabitica(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        rate_window=args.rate_window,
+        tasks=args.tasks,
+    )
+    print(f"Mock Habitica on http://{args.host}:{args.port}{API_PREFIX}")
+    web.run_app(server.app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,49 +1,316 @@
 """Discord bot commands."""
 
+import logging
+import time
+import weakref
+from datetime import date
+from typing import Dict, List, Optional, Set, Tuple
+
 import discord
 from discord.ext import commands
 
+from src.pa_square.bot.outbound import Outbound
+from src.pa_square.bot.pagination import TaskFilter, TaskPaginator
+from src.pa_square.bot.roles import RoleIndex, change_role, has_role
 from src.pa_square.config import config
 from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.models import Task
+from src.pa_square.habitica.registry import ManagerRegistry
+from src.pa_square.utils.metrics import COMMAND_SECONDS, COMMANDS
+
+logger = logging.getLogger(__name__)
 
 
-async def setup_commands(bot: commands.Bot, habitica_manager: HabiticaManager) -> None:
+def instrument_commands(bot: commands.Bot) -> None:
+    """
+    Time every command through global before/after invoke hooks.
+    
+    Args:
+        bot: Discord bot instance
+    """
+    started: "weakref.WeakKeyDictionary[commands.Context, float]" = weakref.WeakKeyDictionary()
+    
+    @bot.before_invoke
+    async def start_timer(ctx: commands.Context) -> None:
+        started[ctx] = time.perf_counter()
+    
+    @bot.after_invoke
+    async def record_timing(ctx: commands.Context) -> None:
+        start = started.pop(ctx, None)
+        if start is None:
+            return
+        name = ctx.command.qualified_name
+        COMMAND_SECONDS.observe(time.perf_counter() - start, command=name)
+        COMMANDS.inc(command=name, outcome="error" if ctx.command_failed else "ok")
+
+
+async def setup_commands(
+    bot: commands.Bot,
+    habitica_manager: HabiticaManager,
+    registry: Optional[ManagerRegistry] = None,
+    outbound: Optional[Outbound] = None,
+    roles: Optional[RoleIndex] = None,
+) -> None:
     """
     Set up bot commands.
     
+    Replies go through the outbound queues, so handlers return without waiting
+    for Discord unless they need the sent message.
+    
     Args:
         bot: Discord bot instance
-        habitica_manager: Habitica API manager instance
+        habitica_manager: Habitica API manager instance, used for users without their own account
+        registry: Optional per-user manager registry
+        outbound: Outbound Discord queues, built from the configuration if None
+        roles: Role name index, a new one if None. It is kept up to date from the bot's events
     """
+    outbound = outbound if outbound is not None else Outbound.from_config()
+    roles = roles if roles is not None else RoleIndex()
+    roles.listen(bot)
+    bulk_role_guilds: Set[int] = set()
+    # Each author's latest !todo view, whose numbers !done and !edit resolve against
+    listings: "weakref.WeakValueDictionary[int, TaskPaginator]" = weakref.WeakValueDictionary()
+    
+    async def manager_for(ctx: commands.Context) -> HabiticaManager:
+        """Get the Habitica manager serving the command's author."""
+        if registry is not None:
+            manager = await registry.get(ctx.author.id)
+            if manager is not None:
+                return manager
+        return habitica_manager
+    
+    async def linked_manager_for(ctx: commands.Context) -> Optional[HabiticaManager]:
+        """
+        Get the author's own Habitica manager for a write.
+        
+        Writes never fall back to the bot's account. Authors without a linked
+        account get a !link hint and None.
+        """
+        if registry is None:
+            return habitica_manager
+        if not registry.has_credentials(ctx.author.id):
+            outbound.post(
+                ctx, "Link your own Habitica account first. DM me !link <username> <password>"
+            )
+            return None
+        return await registry.get(ctx.author.id)
+    
+    instrument_commands(bot)
     
     @bot.command()
     async def hello(ctx: commands.Context) -> None:
         """Say hello to the user."""
-        await ctx.send(f"Hello {ctx.author.mention}")
+        outbound.post(ctx, f"Hello {ctx.author.mention}")
     
     @bot.command()
     async def habitica(ctx: commands.Context) -> None:
         """Test Habitica connection."""
-        print("Checking habitica session...")
-        await habitica_manager.fetch_token()
-        await ctx.send("Done!")
+        logger.debug("Checking Habitica session for %s", ctx.author.id)
+        manager = await manager_for(ctx)
+        await manager.fetch_token()
+        outbound.post(ctx, "Done!")
+    
+    @bot.group(invoke_without_command=True)
+    async def todo(ctx: commands.Context, *filters: str) -> None:
+        """
+        List todos from Habitica, one page at a time.
+        
+        Args:
+            :param filters: Optional filters: due:YYYY-MM-DD, due:today, overdue, tag:<name>,
+                checklist:done, checklist:open
+            :param ctx: Discord command context
+        """
+        manager = await manager_for(ctx)
+        todos = await manager.get_todos("todos")
+        if not isinstance(todos, dict):
+            outbound.post(ctx, f"Habitica said no: {todos[1]}")
+            return
+        
+        tag_ids = None
+        if any(arg.lower().startswith("tag:") for arg in filters):
+            tags = await manager.get_tags()
+            if isinstance(tags, dict):
+                tag_ids = {tag["name"].lower(): tag["id"] for tag in tags.get("data", [])}
+        try:
+            task_filter = TaskFilter.parse(filters, tag_ids)
+        except ValueError as e:
+            outbound.post(
+                ctx, f"{e}. Try due:YYYY-MM-DD, overdue, tag:<name> or checklist:done/open"
+            )
+            return
+        
+        view = TaskPaginator(todos.get("data", []), task_filter, ctx.author.id)
+        listings[ctx.author.id] = view
+        note = "Habitica is unreachable, these are the tasks I saved" if todos.get("offline") else None
+        view.message = await outbound.send(ctx, note, embed=view.render(), view=view)
+    
+    @todo.command(name="add-many")
+    async def todo_add_many(ctx: commands.Context, *, items: str) -> None:
+        """
+        Create many todos at once, one per line (or separated by semicolons).
+        
+        Args:
+            :param items: Todo texts, one per line
+            :param ctx: Discord command context
+        """
+        lines = items.splitlines() if "\n" in items else items.split(";")
+        texts = [line.strip().lstrip("-*").strip() for line in lines]
+        texts = [text for text in texts if text]
+        if not texts:
+            outbound.post(ctx, "That's not a list. That's nothing")
+            return
+        
+        manager = await linked_manager_for(ctx)
+        if manager is None:
+            return
+        results = await manager.create_todos_bulk({"text": text} for text in texts)
+        queued = [result for result in results if result.queued]
+        failed = [result for result in results if not result.ok and not result.queued]
+        message = f"Created {len(results) - len(queued) - len(failed)}/{len(texts)} todos"
+        if queued:
+            message += f". {len(queued)} are queued until Habitica is back"
+        if failed:
+            details = "\n".join(f"- {texts[r.index]}: {r.error}" for r in failed[:10])
+            message += f". These didn't make it:\n{details}"
+        outbound.post(ctx, message)
+    
+    async def pick_todos(
+        ctx: commands.Context, manager: HabiticaManager, numbers: Tuple[str, ...]
+    ) -> Optional[List[Task]]:
+        """
+        Look up todos by their !todo numbers, replying and returning None if any is wrong.
+        
+        Numbers refer to the author's latest !todo listing while its buttons still
+        work, so completing one todo does not shift the numbers of the others.
+        """
+        todos = await manager.get_todos("todos")
+        if not isinstance(todos, dict):
+            outbound.post(ctx, f"Habitica said no: {todos[1]}")
+            return None
+        tasks = todos.get("data", [])
+        view = listings.get(ctx.author.id)
+        shown = view.tasks if view is not None and not view.is_finished() else tasks
+        live = {task.id for task in tasks}
+        picked = []
+        for number in numbers:
+            if not number.isdigit() or not 1 <= int(number) <= len(shown):
+                outbound.post(ctx, f"There's no todo number {number}. Check !todo")
+                return None
+            task = shown[int(number) - 1]
+            if task.id not in live:
+                outbound.post(ctx, f"{task.text} is already gone. Check !todo")
+                return None
+            picked.append(task)
+        return picked
+    
+    @bot.command()
+    async def done(ctx: commands.Context, *numbers: str) -> None:
+        """
+        Complete todos by their numbers in !todo.
+        
+        Args:
+            :param numbers: Todo numbers, e.g. !done 1 3 4
+            :param ctx: Discord command context
+        """
+        if not numbers:
+            outbound.post(ctx, "Done with what? Give me the numbers from !todo")
+            return
+        manager = await linked_manager_for(ctx)
+        if manager is None:
+            return
+        picked = await pick_todos(ctx, manager, numbers)
+        if picked is None:
+            return
+        picked = list({task.id: task for task in picked}.values())
+        
+        results = await manager.score_tasks(task.id for task in picked)
+        queued = [result for result in results if result.queued]
+        failed = [result for result in results if not result.ok and not result.queued]
+        completed = len(results) - len(queued) - len(failed)
+        message = f"Completed {completed}/{len(picked)}. Took you long enough"
+        if queued:
+            message += f". {len(queued)} are queued until Habitica is back"
+        if failed:
+            details = "\n".join(f"- {picked[r.index].text}: {r.error}" for r in failed[:10])
+            message += f". These didn't make it:\n{details}"
+        outbound.post(ctx, message)
+    
+    @bot.command()
+    async def edit(ctx: commands.Context, number: str, *, change: str) -> None:
+        """
+        Rename a todo or move its due date.
+        
+        Args:
+            :param number: Todo number in !todo
+            :param change: New title, or due:YYYY-MM-DD to change the due date
+            :param ctx: Discord command context
+        """
+        manager = await linked_manager_for(ctx)
+        if manager is None:
+            return
+        picked = await pick_todos(ctx, manager, (number,))
+        if picked is None:
+            return
+        task = picked[0]
+        
+        change = change.strip()
+        if change.lower().startswith("due:"):
+            try:
+                due = date.fromisoformat(change[4:].strip())
+            except ValueError:
+                outbound.post(ctx, "Dates look like due:YYYY-MM-DD")
+                return
+            result = await manager.update_task(task.id, date=due.isoformat())
+            summary = f"now due {due.isoformat()}"
+        else:
+            result = await manager.update_task(task.id, text=change)
+            summary = f"now called {change}"
+        
+        if isinstance(result, dict):
+            outbound.post(ctx, f"{task.text} is {summary}")
+        elif manager.is_queued(result):
+            outbound.post(ctx, f"{task.text} is {summary} once Habitica is back. Queued")
+        else:
+            outbound.post(ctx, f"Habitica said no: {result[1]}")
     
     @bot.command()
-    async def todo(ctx: commands.Context) -> None:
-        """Get todos from Habitica."""
-        todos = await habitica_manager.get_todos("todos")
-        print(f"todos: {todos['data']}")
-        await ctx.send(todos["data"][0])
+    async def link(ctx: commands.Context, username: str, password: str) -> None:
+        """
+        Link the author's own Habitica account. Only accepted in DMs.
+        
+        Args:
+            :param username: Habitica username
+            :param password: Habitica password
+            :param ctx: Discord command context
+        """
+        if ctx.guild is not None:
+            outbound.delete(ctx.message)
+            outbound.post(ctx, f"{ctx.author.mention} DM me that. Your password is public-ish now")
+            return
+        if registry is None:
+            outbound.post(ctx, "Per-user accounts aren't enabled")
+            return
+        await registry.register(ctx.author.id, username, password)
+        outbound.post(ctx, f"Linked Habitica account {username}")
+    
+    @bot.command()
+    async def unlink(ctx: commands.Context) -> None:
+        """Forget the author's Habitica account."""
+        if registry is None:
+            outbound.post(ctx, "Per-user accounts aren't enabled")
+            return
+        await registry.unregister(ctx.author.id)
+        outbound.post(ctx, "Unlinked. Back to being nobody")
     
     @bot.command()
     async def assign(ctx: commands.Context) -> None:
         """Assign default role to user."""
-        role = discord.utils.get(ctx.guild.roles, name=config.DEFAULT_ROLE)
+        role = roles.get(ctx.guild, config.DEFAULT_ROLE)
         if role:
             await ctx.author.add_roles(role)
-            await ctx.send(f"{ctx.author.mention} is now assigned to {config.DEFAULT_ROLE}")
+            outbound.post(ctx, f"{ctx.author.mention} is now assigned to {config.DEFAULT_ROLE}")
         else:
-            await ctx.send("Role doesn't exist. Stop with your tomfoolery")
+            outbound.post(ctx, "Role doesn't exist. Stop with your tomfoolery")
     
     @bot.command()
     async def dm(ctx: commands.Context, *, msg: str) -> None:
@@ -54,12 +321,12 @@ async def setup_commands(bot: commands.Bot, habitica_manager: HabiticaManager) -
             :param msg: Message to send to user in ctx
             :param ctx: Represents Discord command context containing target user info
         """
-        await ctx.author.send(f"Psst: {msg}")
+        outbound.post(ctx.author, f"Psst: {msg}")
     
     @bot.command()
     async def reply(ctx: commands.Context) -> None:
         """Reply to user message."""
-        await ctx.reply(f"Psst back {ctx.author.mention}")
+        outbound.post(ctx, f"Psst back {ctx.author.mention}", reference=ctx.message)
     
     @bot.command()
     async def poll(ctx: commands.Context, *, question: str) -> None:
@@ -71,28 +338,86 @@ async def setup_commands(bot: commands.Bot, habitica_manager: HabiticaManager) -
             :param ctx: Discord command context
         """
         embed = discord.Embed(title="Poll", description=question)
-        poll_message = await ctx.send(embed=embed)
-        await poll_message.add_reaction("👍")
-        await poll_message.add_reaction("👎")
+        poll_message = await outbound.send(ctx, embed=embed)
+        outbound.react(poll_message, "👍")
+        outbound.react(poll_message, "👎")
     
     @bot.command()
     async def unassign(ctx: commands.Context) -> None:
         """Unassign default role from user."""
-        role = discord.utils.get(ctx.guild.roles, name=config.DEFAULT_ROLE)
+        role = roles.get(ctx.guild, config.DEFAULT_ROLE)
         if role:
             await ctx.author.remove_roles(role)
-            await ctx.send(f"{ctx.author.mention} is unassigned from {config.DEFAULT_ROLE}")
+            outbound.post(ctx, f"{ctx.author.mention} is unassigned from {config.DEFAULT_ROLE}")
         else:
-            await ctx.send("Role doesn't exist. Stop with your tomfoolery")
+            outbound.post(ctx, "Role doesn't exist. Stop with your tomfoolery")
+    
+    async def change_default_role(ctx: commands.Context, add: bool) -> None:
+        """Add the default role to, or remove it from, every member of the guild."""
+        role = roles.get(ctx.guild, config.DEFAULT_ROLE)
+        if role is None:
+            outbound.post(ctx, "Role doesn't exist. Stop with your tomfoolery")
+            return
+        if ctx.guild.id in bulk_role_guilds:
+            outbound.post(ctx, "Already on it. Patience")
+            return
+        
+        bulk_role_guilds.add(ctx.guild.id)
+        try:
+            if not ctx.guild.chunked:
+                await ctx.guild.chunk()
+            verb = "Assigning" if add else "Unassigning"
+            status = await outbound.send(
+                ctx, f"{verb} {role.name} for {ctx.guild.member_count} members. Might take a while"
+            )
+            
+            async def progress(done: int, total: int) -> None:
+                await status.edit(content=f"{verb} {role.name}: {done}/{total} members")
+            
+            result = await change_role(
+                ctx.guild.members,
+                role,
+                add=add,
+                concurrency=config.ROLE_BULK_CONCURRENCY,
+                progress=progress,
+                progress_interval=config.ROLE_PROGRESS_INTERVAL,
+            )
+        finally:
+            bulk_role_guilds.discard(ctx.guild.id)
+        message = f"{ctx.author.mention} done. Changed {result.changed}, skipped {result.skipped}"
+        if result.failed:
+            message += f", {result.failed} failed. Check my role is above {role.name}"
+        outbound.post(ctx, message)
+    
+    @bot.command(name="assign-all")
+    @commands.guild_only()
+    @commands.has_permissions(manage_roles=True)
+    async def assign_all(ctx: commands.Context) -> None:
+        """Assign default role to every member. Needs Manage Roles."""
+        await change_default_role(ctx, add=True)
+    
+    @bot.command(name="unassign-all")
+    @commands.guild_only()
+    @commands.has_permissions(manage_roles=True)
+    async def unassign_all(ctx: commands.Context) -> None:
+        """Unassign default role from every member. Needs Manage Roles."""
+        await change_default_role(ctx, add=False)
+    
+    @assign_all.error
+    @unassign_all.error
+    async def bulk_role_error(ctx: commands.Context, error: commands.CommandError) -> None:
+        """Handle bulk role command errors."""
+        if isinstance(error, (commands.MissingPermissions, commands.NoPrivateMessage)):
+            outbound.post(ctx, f"You can't do that 0.0 {error}")
     
     @bot.command()
-    @commands.has_role(config.DEFAULT_ROLE)
+    @has_role(roles, config.DEFAULT_ROLE)
     async def secret(ctx: commands.Context) -> None:
         """Secret command only for users with default role."""
-        await ctx.send(f"One of us. One of us. {ctx.author.mention}")
+        outbound.post(ctx, f"One of us. One of us. {ctx.author.mention}")
     
     @secret.error
     async def secret_error(ctx: commands.Context, error: commands.CommandError) -> None:
         """Handle secret command errors."""
         if isinstance(error, commands.MissingRole):
-            await ctx.send(f"You can't do that 0.0 {error}")
+            outbound.post(ctx, f"You can't do that 0.0 {error}")
@@ -0,0 +1,151 @@
+"""Cheap pre-dispatch checks that keep ordinary chat away from the command parser."""
+
+import time
+from collections import OrderedDict
+from enum import Enum
+from typing import Callable, FrozenSet, Iterable, Optional, Tuple, Union
+
+import discord
+from discord.ext import commands
+
+from src.pa_square.config import config
+from src.pa_square.habitica.rate_limiter import TokenBucket
+from src.pa_square.utils.metrics import REGISTRY
+
+MESSAGES = REGISTRY.counter(
+    "discord_messages_total", "Messages by pre-dispatch verdict", ("verdict",)
+)
+MESSAGE_SECONDS = REGISTRY.histogram(
+    "discord_message_handling_seconds",
+    "Time spent handling a message in on_message",
+    ("verdict",),
+    buckets=(0.00001, 0.0001, 0.001, 0.01, 0.1, 1.0, 10.0),
+)
+
+
+class Verdict(str, Enum):
+    """Outcome of the pre-dispatch stage, in the order the checks run."""
+
+    BOT_AUTHOR = "bot_author"
+    IGNORED_CHANNEL = "ignored_channel"
+    NO_PREFIX = "no_prefix"
+    DUPLICATE = "duplicate"
+    COOLDOWN = "cooldown"
+    DISPATCH = "dispatch"
+
+
+def parse_ids(spec: str) -> FrozenSet[int]:
+    """Parse a comma-separated list of Discord ids."""
+    return frozenset(int(part) for part in spec.replace(" ", "").split(",") if part)
+
+
+class CommandGate:
+    """
+    Decides whether a message is worth handing to ``bot.process_commands``.
+
+    The checks run cheapest first and stop at the first rejection: messages
+    from bots, messages in ignored channels, messages without the command
+    prefix, the same command repeated by the same user within
+    ``dedup_window`` seconds, and users who are out of their command budget
+    (``rate`` commands per ``per`` seconds, tracked in a TokenBucket each).
+    Every verdict is counted in ``discord_messages_total``.
+
+    Args:
+        prefixes: Command prefixes; None lets every human message through
+        ignored_channels: Channel ids the bot never takes commands from
+        rate: Commands a user may send in a burst
+        per: Seconds for a user's budget to refill completely
+        dedup_window: Seconds during which an identical command is dropped
+        max_tracked: Users and recent commands remembered before the oldest are forgotten
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        prefixes: Optional[Union[str, Iterable[str]]],
+        ignored_channels: Iterable[int] = (),
+        rate: int = 5,
+        per: float = 10.0,
+        dedup_window: float = 2.0,
+        max_tracked: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if isinstance(prefixes, str):
+            prefixes = (prefixes,)
+        self.prefixes: Optional[Tuple[str, ...]] = (
+            tuple(prefixes) if prefixes is not None else None
+        )
+        self.ignored_channels = frozenset(ignored_channels)
+        self.rate = rate
+        self.per = per
+        self.dedup_window = dedup_window
+        self.max_tracked = max_tracked
+        self._clock = clock
+        self._buckets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self._recent: "OrderedDict[Tuple[int, int, str], float]" = OrderedDict()
+
+    @classmethod
+    def from_bot(cls, bot: commands.Bot) -> "CommandGate":
+        """
+        Build a gate for a bot from the application configuration.
+
+        Only static string prefixes can be checked up front. With a callable
+        prefix every human message is passed on and only the other checks apply.
+        """
+        prefix = bot.command_prefix
+        static = isinstance(prefix, str) or (
+            isinstance(prefix, (list, tuple)) and all(isinstance(p, str) for p in prefix)
+        )
+        return cls(
+            prefix if static else None,
+            ignored_channels=parse_ids(config.DISCORD_IGNORED_CHANNELS),
+            rate=config.COMMAND_COOLDOWN_RATE,
+            per=config.COMMAND_COOLDOWN_PER,
+            dedup_window=config.COMMAND_DEDUP_WINDOW,
+        )
+
+    def check(self, message: discord.Message) -> Verdict:
+        """
+        Run the pre-dispatch checks on a message.
+
+        Args:
+            message: Incoming message
+
+        Returns:
+            Verdict.DISPATCH if the message should be processed as a command
+        """
+        verdict = self._check(message)
+        MESSAGES.inc(verdict=verdict.value)
+        return verdict
+
+    def _check(self, message: discord.Message) -> Verdict:
+        if message.author.bot:
+            return Verdict.BOT_AUTHOR
+        if message.channel.id in self.ignored_channels:
+            return Verdict.IGNORED_CHANNEL
+        content = message.content
+        if self.prefixes is not None and not content.startswith(self.prefixes):
+            return Verdict.NO_PREFIX
+
+        now = self._clock()
+        user_id = message.author.id
+        key = (user_id, message.channel.id, content)
+        seen_at = self._recent.get(key)
+        if seen_at is not None and now - seen_at < self.dedup_window:
+            return Verdict.DUPLICATE
+        self._remember(self._recent, key, now)
+
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = TokenBucket(self.rate, self.rate / self.per, clock=self._clock)
+        self._remember(self._buckets, user_id, bucket)
+        if bucket.wait_time() > 0:
+            return Verdict.COOLDOWN
+        bucket.consume()
+        return Verdict.DISPATCH
+
+    def _remember(self, entries: OrderedDict, key, value) -> None:
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_tracked:
+            entries.popitem(last=False)
@@ -1,19 +1,47 @@
 """Discord bot event handlers."""
 
+import logging
+import time
+from typing import Optional
+
 import discord
 from discord.ext import commands
 
+from src.pa_square.bot.dispatch import MESSAGE_SECONDS, CommandGate, Verdict
+from src.pa_square.bot.moderation import ModerationFilter
+from src.pa_square.bot.outbound import Outbound
+from src.pa_square.bot.welcome import WelcomeQueue
 from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.registry import ManagerRegistry
+
+logger = logging.getLogger(__name__)
 
 
-async def setup_events(bot: commands.Bot, habitica_manager: HabiticaManager) -> None:
+async def setup_events(
+    bot: commands.Bot,
+    habitica_manager: HabiticaManager,
+    registry: Optional[ManagerRegistry] = None,
+    moderation: Optional[ModerationFilter] = None,
+    gate: Optional[CommandGate] = None,
+    outbound: Optional[Outbound] = None,
+    welcome: Optional[WelcomeQueue] = None,
+) -> None:
     """
     Set up bot event handlers.
     
     Args:
         bot: Discord bot instance
         habitica_manager: Habitica API manager instance
+        registry: Optional per-user manager registry
+        moderation: Word filter for messages, built from the configuration if None
+        gate: Pre-dispatch checks for commands, built from the configuration if None
+        outbound: Outbound Discord queues, built from the configuration if None
+        welcome: Queue of member joins to welcome, built from the configuration if None
     """
+    moderation = moderation or ModerationFilter.from_config()
+    gate = gate or CommandGate.from_bot(bot)
+    outbound = outbound if outbound is not None else Outbound.from_config()
+    welcome = welcome if welcome is not None else WelcomeQueue.from_config(outbound)
     
     @bot.event
     async def on_connect() -> tuple[int, str]:
@@ -24,21 +52,26 @@ async def setup_events(bot: commands.Bot, habitica_manager: HabiticaManager) ->
     async def on_disconnect() -> None:
         """Handle bot disconnection from Discord."""
         await habitica_manager.close_session()
+        # Gateway reconnects keep pooled connections warm, only a full shutdown drops them
+        if bot.is_closed():
+            if registry is not None:
+                await registry.close()
+            await habitica_manager.pool.close()
     
     @bot.event
     async def on_ready() -> None:
         """Handle bot ready state."""
-        print(f"Roll out, {bot.user.name}")
+        logger.info("Roll out, %s", bot.user.name)
     
     @bot.event
     async def on_member_join(member: discord.Member) -> None:
         """
-        Handle new member joining.
+        Handle new member joining. The welcome happens in the background, rate capped per guild.
         
         Args:
             member: The member who joined
         """
-        await member.send(f"Welcome {member.name}")
+        welcome.submit(member)
     
     @bot.event
     async def on_message(message: discord.Message) -> None:
@@ -51,9 +84,14 @@ async def setup_events(bot: commands.Bot, habitica_manager: HabiticaManager) ->
         if message.author == bot.user:
             return  # Don't reply to our own bot's message
         
-        if "shit" in message.content.lower():
-            await message.delete()
-            await message.channel.send(f"{message.author.mention} THAT'S A NO-NO WORD")
+        started_at = time.perf_counter()
+        guild_id = message.guild.id if message.guild is not None else None
+        if moderation.check(guild_id, message.content) is not None:
+            outbound.delete(message)
+            outbound.post(message.channel, f"{message.author.mention} THAT'S A NO-NO WORD")
         
-        # process_commands allows us to continue handling all the messages sent in the server
-        await bot.process_commands(message)
+        # Ordinary chat stops here, only likely commands get a context built for them
+        verdict = gate.check(message)
+        if verdict == Verdict.DISPATCH:
+            await bot.process_commands(message)
+        MESSAGE_SECONDS.observe(time.perf_counter() - started_at, verdict=verdict.value)
@@ -0,0 +1,271 @@
+"""Word filter for incoming messages, compiled once per guild word list."""
+
+import json
+import logging
+import os
+import time
+import unicodedata
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.pa_square.config import config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORDS = ("shit",)
+
+# From this many words on, one automaton pass beats a substring search per word
+# (see benchmarks/bench_moderation.py)
+AUTOMATON_MIN_WORDS = 150
+
+# Takes normalized text, returns a matched word or None
+Matcher = Callable[[str], Optional[str]]
+
+# Applied after NFKC and casefold, so only lower-case ASCII look-alikes need mapping.
+# Zero-width characters are removed so they can't be used to split a word.
+_NORMALIZE = str.maketrans(
+    {
+        "0": "o",
+        "1": "i",
+        "3": "e",
+        "4": "a",
+        "5": "s",
+        "7": "t",
+        "@": "a",
+        "$": "s",
+        "!": "i",
+        "|": "i",
+        "\u200b": None,
+        "\u200c": None,
+        "\u200d": None,
+        "\u2060": None,
+        "\ufeff": None,
+    }
+)
+
+
+def normalize(text: str) -> str:
+    """
+    Fold text so that look-alike spellings compare equal.
+
+    Args:
+        text: Raw message text
+
+    Returns:
+        NFKC-normalized, casefolded text with leetspeak replaced by letters
+    """
+    return unicodedata.normalize("NFKC", text).casefold().translate(_NORMALIZE)
+
+
+def _normalized(words: Iterable[str]) -> List[str]:
+    """Normalize a word list, dropping blanks and duplicates."""
+    return list(dict.fromkeys(filter(None, (normalize(word.strip()) for word in words))))
+
+
+class _Transitions(dict):
+    """Transitions of an automaton state, filled in from its failure state on first use."""
+
+    __slots__ = ("fail",)
+
+    def __init__(self, goto: Dict[str, int], fail: Optional["_Transitions"]) -> None:
+        super().__init__(goto)
+        self.fail = fail
+
+    def __missing__(self, char: str) -> int:
+        target = self[char] = self.fail[char] if self.fail is not None else 0
+        return target
+
+
+class WordAutomaton:
+    """
+    Aho-Corasick automaton over normalized words.
+
+    Matching costs one dict lookup per character of the message, however many
+    words there are. A state's transitions are only the trie's at first; the
+    first time a character misses, its transition is taken from the failure
+    state and kept, so memory grows with the transitions messages actually
+    use rather than with every state times every character. Transitions into
+    a state that ends a word hold the word's index as a negative number, and
+    matching stops at the first of them.
+
+    Args:
+        words: Normalized, non-empty words
+    """
+
+    def __init__(self, words: Iterable[str]) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        ends: List[Optional[str]] = [None]
+        for word in words:
+            state = 0
+            for char in word:
+                child = goto[state].get(char)
+                if child is None:
+                    child = len(goto)
+                    goto[state][char] = child
+                    goto.append({})
+                    ends.append(None)
+                state = child
+            ends[state] = ends[state] or word
+
+        # Breadth first, so a state's failure state is built before the state
+        rows = [_Transitions(goto[0], None)] + [None] * (len(goto) - 1)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            rows[state] = _Transitions(goto[state], rows[fail[state]])
+            for char, child in goto[state].items():
+                fail[child] = rows[fail[state]][char]
+                ends[child] = ends[child] or ends[fail[child]]
+                queue.append(child)
+
+        index: Dict[str, int] = {}
+        for row in rows:
+            for char, target in row.items():
+                if ends[target] is not None:
+                    row[char] = ~index.setdefault(ends[target], len(index))
+        self.words: List[str] = list(index)
+        self._rows: List[_Transitions] = rows
+
+    def find(self, text: str) -> Optional[str]:
+        """
+        Find a word in normalized text.
+
+        Args:
+            text: Normalized message text
+
+        Returns:
+            The first word to end in the text, or None
+        """
+        rows = self._rows
+        state = 0
+        for char in text:
+            state = rows[state][char]
+            if state < 0:
+                return self.words[~state]
+        return None
+
+
+def compile_matcher(words: Iterable[str]) -> Optional[Matcher]:
+    """
+    Build the fastest matcher for a word list.
+
+    Short lists are checked with one substring search per word, each a fast
+    scan in C. From AUTOMATON_MIN_WORDS words on, a WordAutomaton scans the
+    message once instead, at a cost per character that doesn't depend on the
+    list.
+
+    Args:
+        words: Words to match anywhere in a message
+
+    Returns:
+        Function from normalized text to a matched word or None, None for an empty list
+    """
+    words = _normalized(words)
+    if not words:
+        return None
+    if len(words) >= AUTOMATON_MIN_WORDS:
+        return WordAutomaton(words).find
+
+    def find(text: str) -> Optional[str]:
+        return next((word for word in words if word in text), None)
+
+    return find
+
+
+class ModerationFilter:
+    """
+    Per-guild word filter with hot reloading.
+
+    The word list file is JSON of the form
+    ``{"default": ["word", ...], "guilds": {"<guild id>": ["word", ...]}}``.
+    A guild's words are added to the default ones. The file is checked for
+    changes at most every ``reload_interval`` seconds and recompiled only when
+    it was modified.
+
+    Args:
+        path: Optional word list file
+        default_words: Words used when the file has no default list
+        reload_interval: Seconds between checks of the file's modification time
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        default_words: Iterable[str] = DEFAULT_WORDS,
+        reload_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.reload_interval = reload_interval
+        self._clock = clock
+        self._builtin = list(default_words)
+        self._default: Optional[Matcher] = None
+        self._guilds: Dict[int, Optional[Matcher]] = {}
+        self._mtime: Optional[float] = None
+        self._checked_at = clock()
+        self._apply({})
+        self.reload()
+
+    @classmethod
+    def from_config(cls) -> "ModerationFilter":
+        """Build a moderation filter from the application configuration."""
+        return cls(
+            config.MODERATION_FILE or None, reload_interval=config.MODERATION_RELOAD_INTERVAL
+        )
+
+    def _apply(self, lists: Dict[str, object]) -> None:
+        default = list(lists.get("default") or self._builtin)
+        guilds = {
+            int(guild_id): compile_matcher(default + list(words))
+            for guild_id, words in (lists.get("guilds") or {}).items()
+        }
+        self._default = compile_matcher(default)
+        self._guilds = guilds
+
+    def reload(self) -> bool:
+        """
+        Recompile the word lists if the file changed since the last load.
+
+        A file that can't be read or parsed leaves the current lists in place.
+
+        Returns:
+            True if new lists were loaded
+        """
+        self._checked_at = self._clock()
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                self._apply(json.load(file))
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning("Keeping previous word lists, %s is invalid: %s", self.path, e)
+            return False
+        self._mtime = mtime
+        logger.info("Loaded word lists from %s", self.path)
+        return True
+
+    def check(self, guild_id: Optional[int], content: str) -> Optional[str]:
+        """
+        Find a filtered word in a message.
+
+        Args:
+            guild_id: Guild the message was sent in, None for DMs
+            content: Message text
+
+        Returns:
+            The matched (normalized) word, or None if the message is clean
+        """
+        if self._clock() - self._checked_at >= self.reload_interval:
+            self.reload()
+        matcher = self._guilds.get(guild_id, self._default) if guild_id else self._default
+        if matcher is None or not content:
+            return None
+        return matcher(normalize(content))
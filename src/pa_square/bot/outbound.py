@@ -0,0 +1,352 @@
+"""Per-route queues for outbound Discord messages, reactions and deletions."""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+import aiohttp
+import discord
+
+from src.pa_square.config import config
+from src.pa_square.habitica.rate_limiter import TokenBucket
+from src.pa_square.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+OUTBOUND_REQUESTS = REGISTRY.counter(
+    "discord_outbound_requests_total", "Outbound Discord requests by kind and outcome",
+    ("kind", "outcome"),
+)
+OUTBOUND_COALESCED = REGISTRY.counter(
+    "discord_outbound_coalesced_total", "Messages merged into another message to the same route"
+)
+OUTBOUND_QUEUE_SECONDS = REGISTRY.histogram(
+    "discord_outbound_queue_seconds", "Time outbound requests wait in their route queue",
+    ("kind",),
+)
+
+MAX_MESSAGE_LENGTH = 2000
+
+# (kind, id): kind is "message", "dm", "reaction" or "delete"; id is a channel id, or a
+# user id for "dm" until the DM channel is known
+RouteKey = Tuple[str, int]
+
+_ROUTE_PATH = re.compile(r"/channels/(\d+)/messages(?:/\d+(/reactions/)?)?")
+
+
+@dataclass
+class _Request:
+    kind: str
+    target: Any
+    content: Optional[str]
+    kwargs: Dict[str, Any]
+    future: asyncio.Future
+    queued_at: float
+
+    @property
+    def coalescible(self) -> bool:
+        return self.kind in ("message", "dm") and bool(self.content) and not self.kwargs
+
+
+@dataclass
+class _Route:
+    bucket: TokenBucket
+    queue: Deque[_Request] = field(default_factory=deque)
+    task: Optional[asyncio.Task] = None
+
+
+class Outbound:
+    """
+    Sends messages, reactions and deletions through one queue per Discord route.
+
+    A route is a channel (or a user's DMs) and a kind of request, matching how
+    Discord buckets its rate limits. Each route has a worker that sends its
+    requests in order, paced by a TokenBucket, so command handlers can hand
+    off a reply with ``post`` and return instead of waiting out a rate limit.
+
+    Plain text messages queued for the same route while an earlier request is
+    in flight are merged into one message, up to Discord's length limit.
+    Messages with embeds, views, files or replies are never merged.
+
+    Route buckets follow the X-RateLimit-Remaining and X-RateLimit-Reset-After
+    headers of Discord's responses when ``trace_config`` is installed on the
+    bot's HTTP client. A 429 that discord.py would wait out for longer than
+    the bot's ``max_ratelimit_timeout`` comes back as RateLimited, blocking
+    only the affected route until Discord's retry-after passes.
+
+    Args:
+        rate: Requests per route in a burst
+        per: Seconds for a route's budget to refill completely
+        reaction_interval: Seconds between reactions in a channel
+        max_routes: Idle routes remembered before the oldest are forgotten
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        rate: int = 5,
+        per: float = 5.0,
+        reaction_interval: float = 0.25,
+        max_routes: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate
+        self.per = per
+        self.reaction_interval = reaction_interval
+        self.max_routes = max_routes
+        self._clock = clock
+        self._routes: "OrderedDict[RouteKey, _Route]" = OrderedDict()
+        self._aliases: Dict[RouteKey, RouteKey] = {}
+
+    @classmethod
+    def from_config(cls) -> "Outbound":
+        """Build an outbound dispatcher from the application configuration."""
+        return cls(rate=config.DISCORD_SEND_RATE, per=config.DISCORD_SEND_PER)
+
+    def post(
+        self, destination: discord.abc.Messageable, content: Optional[str] = None, **kwargs: Any
+    ) -> asyncio.Future:
+        """
+        Queue a message without waiting for it. Failures are logged.
+
+        Args:
+            destination: Context, channel, user or member to send to
+            content: Message text
+            **kwargs: Other arguments of ``Messageable.send``, e.g. embed or reference
+
+        Returns:
+            Future resolving to the sent message
+        """
+        kind = self._message_kind(destination)
+        return self._logged(self._enqueue(kind, destination, content, kwargs))
+
+    async def send(
+        self, destination: discord.abc.Messageable, content: Optional[str] = None, **kwargs: Any
+    ) -> discord.Message:
+        """
+        Queue a message and wait until it is sent.
+
+        Args:
+            destination: Context, channel, user or member to send to
+            content: Message text
+            **kwargs: Other arguments of ``Messageable.send``
+
+        Returns:
+            The sent message, possibly shared with messages merged into it
+
+        Raises:
+            discord.HTTPException: If Discord refused the message
+        """
+        return await self._enqueue(self._message_kind(destination), destination, content, kwargs)
+
+    def react(self, message: discord.Message, emoji: str) -> asyncio.Future:
+        """Queue a reaction without waiting for it. Failures are logged."""
+        return self._logged(self._enqueue("reaction", message, emoji, {}))
+
+    def delete(self, message: discord.Message) -> asyncio.Future:
+        """Queue a message deletion without waiting for it. Failures are logged."""
+        return self._logged(self._enqueue("delete", message, None, {}))
+
+    async def join(self, destination: Optional[discord.abc.Messageable] = None) -> None:
+        """
+        Wait until the messages queued for a destination, or for every route, are sent.
+
+        Args:
+            destination: Context, channel, user or member; None waits for every route
+        """
+        if destination is None:
+            routes = list(self._routes.values())
+        else:
+            kind = self._message_kind(destination)
+            routes = [self._routes.get((kind, self._route_id(kind, destination)))]
+        for route in routes:
+            while route is not None and route.task is not None and not route.task.done():
+                await asyncio.shield(route.task)
+
+    async def close(self) -> None:
+        """Stop every worker, cancelling requests that were not sent."""
+        routes = list(self._routes.values())
+        self._routes.clear()
+        for route in routes:
+            if route.task is not None:
+                route.task.cancel()
+            for request in route.queue:
+                request.future.cancel()
+            route.queue.clear()
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """
+        Build an aiohttp trace config that feeds Discord's rate limit headers to the routes.
+
+        Pass it as ``http_trace`` when creating the bot.
+        """
+        trace = aiohttp.TraceConfig()
+        trace.on_request_end.append(self._on_request_end)
+        return trace
+
+    def observe(self, method: str, path: str, headers: Any) -> None:
+        """
+        Align a route's bucket with the rate limit headers of a Discord response.
+
+        Args:
+            method: HTTP method of the request
+            path: Request path, e.g. /api/v10/channels/123/messages
+            headers: Response headers
+        """
+        match = _ROUTE_PATH.search(path)
+        if match is None or not hasattr(headers, "get"):
+            return
+        if match.group(2):
+            kind = "reaction"
+        elif method == "DELETE":
+            kind = "delete"
+        elif method == "POST":
+            kind = "message"
+        else:
+            return
+        key = (kind, int(match.group(1)))
+        route = self._routes.get(self._aliases.get(key, key))
+        if route is None:
+            return
+        try:
+            remaining = headers.get("X-RateLimit-Remaining")
+            reset_after = headers.get("X-RateLimit-Reset-After")
+            route.bucket.update(
+                int(remaining) if remaining is not None else None,
+                float(reset_after) if reset_after is not None else None,
+            )
+        except ValueError:
+            pass
+
+    async def _on_request_end(
+        self, session: aiohttp.ClientSession, context: Any, params: aiohttp.TraceRequestEndParams
+    ) -> None:
+        self.observe(params.method, params.url.path, params.response.headers)
+
+    @staticmethod
+    def _message_kind(destination: Any) -> str:
+        return "dm" if isinstance(destination, (discord.User, discord.Member)) else "message"
+
+    @staticmethod
+    def _route_id(kind: str, target: Any) -> int:
+        if kind == "dm":
+            return target.id
+        if kind in ("reaction", "delete"):
+            return target.channel.id
+        return getattr(target, "channel", target).id
+
+    def _enqueue(
+        self, kind: str, target: Any, content: Optional[str], kwargs: Dict[str, Any]
+    ) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        key = (kind, self._route_id(kind, target))
+        route = self._route(key)
+        route.queue.append(_Request(kind, target, content, kwargs, future, self._clock()))
+        if route.task is None or route.task.done():
+            route.task = asyncio.create_task(self._drain(route))
+        return future
+
+    def _route(self, key: RouteKey) -> _Route:
+        route = self._routes.get(key)
+        if route is None:
+            if key[0] == "reaction":
+                bucket = TokenBucket(1, 1 / self.reaction_interval, clock=self._clock)
+            else:
+                bucket = TokenBucket(self.rate, self.rate / self.per, clock=self._clock)
+            route = self._routes[key] = _Route(bucket)
+            self._forget_idle_routes()
+        self._routes.move_to_end(key)
+        return route
+
+    def _forget_idle_routes(self) -> None:
+        idle = [
+            key for key, route in self._routes.items()
+            if not route.queue and (route.task is None or route.task.done())
+        ]
+        for key in idle[:max(0, len(self._routes) - self.max_routes)]:
+            del self._routes[key]
+        if len(self._aliases) > self.max_routes:
+            self._aliases = {
+                alias: key for alias, key in self._aliases.items() if key in self._routes
+            }
+
+    async def _drain(self, route: _Route) -> None:
+        while route.queue:
+            wait = route.bucket.wait_time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            batch = self._take(route)
+            route.bucket.consume()
+            await self._deliver(route, batch)
+
+    @staticmethod
+    def _take(route: _Route) -> List[_Request]:
+        """Pop the next request, with the plain text messages that can be merged into it."""
+        batch = [route.queue.popleft()]
+        while batch[0].future.cancelled() and route.queue:
+            batch = [route.queue.popleft()]
+        if not batch[0].coalescible:
+            return batch
+        length = len(batch[0].content)
+        while route.queue and route.queue[0].coalescible:
+            length += 1 + len(route.queue[0].content)
+            if length > MAX_MESSAGE_LENGTH:
+                break
+            batch.append(route.queue.popleft())
+        return batch
+
+    async def _deliver(self, route: _Route, batch: List[_Request]) -> None:
+        first = batch[0]
+        if first.future.cancelled():
+            return
+        now = self._clock()
+        for request in batch:
+            OUTBOUND_QUEUE_SECONDS.observe(now - request.queued_at, kind=request.kind)
+        try:
+            if first.kind == "reaction":
+                result = await first.target.add_reaction(first.content)
+            elif first.kind == "delete":
+                result = await first.target.delete()
+            else:
+                content = (
+                    "\n".join(request.content for request in batch)
+                    if len(batch) > 1 else first.content
+                )
+                result = await first.target.send(content, **first.kwargs)
+        except discord.RateLimited as e:
+            OUTBOUND_REQUESTS.inc(kind=first.kind, outcome="rate_limited")
+            logger.debug("Discord route of %s is rate limited for %.1fs", first.kind, e.retry_after)
+            route.bucket.block_for(e.retry_after)
+            route.queue.extendleft(reversed(batch))
+            return
+        except Exception as e:
+            OUTBOUND_REQUESTS.inc(kind=first.kind, outcome="error")
+            for request in batch:
+                if not request.future.done():
+                    request.future.set_exception(e)
+            return
+
+        OUTBOUND_REQUESTS.inc(kind=first.kind, outcome="ok")
+        if len(batch) > 1:
+            OUTBOUND_COALESCED.inc(len(batch) - 1)
+        if first.kind == "dm" and isinstance(result, discord.Message):
+            self._aliases[("message", result.channel.id)] = ("dm", first.target.id)
+        for request in batch:
+            if not request.future.done():
+                request.future.set_result(result)
+
+    @staticmethod
+    def _logged(future: asyncio.Future) -> asyncio.Future:
+        future.add_done_callback(_log_failure)
+        return future
+
+
+def _log_failure(future: asyncio.Future) -> None:
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning("Outbound Discord request failed: %s", future.exception())
+
@@ -0,0 +1,236 @@
+"""Paginated Discord embeds for Habitica task lists."""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import discord
+
+from src.pa_square.habitica.models import Task
+
+TASKS_PER_PAGE = 10
+# Discord limits embed field names to 256 and values to 1024 characters
+FIELD_NAME_LIMIT = 256
+FIELD_VALUE_LIMIT = 1024
+
+
+@dataclass
+class TaskFilter:
+    """
+    Criteria a task must meet to be listed.
+
+    Args:
+        due_before: Only tasks due on or before this date
+        tag: Only tasks carrying this tag id
+        checklist: "done" for fully completed checklists, "open" for checklists
+            with unfinished items, None for no checklist filtering
+    """
+
+    due_before: Optional[date] = None
+    tag: Optional[str] = None
+    checklist: Optional[str] = None
+
+    @classmethod
+    def parse(cls, args: Sequence[str], tag_ids: Optional[Dict[str, str]] = None) -> "TaskFilter":
+        """
+        Build a filter from command arguments like ``due:2026-10-20 tag:work checklist:open``.
+
+        Args:
+            args: Command arguments
+            tag_ids: Optional map of lower-cased tag names to tag ids
+
+        Returns:
+            Parsed filter
+
+        Raises:
+            ValueError: If an argument is not understood
+        """
+        task_filter = cls()
+        for arg in args:
+            name, _, value = arg.partition(":")
+            name = name.lower()
+            if name == "due" and value:
+                task_filter.due_before = (
+                    date.today() if value == "today" else date.fromisoformat(value)
+                )
+            elif name == "overdue" and not value:
+                task_filter.due_before = date.today()
+            elif name == "tag" and value:
+                task_filter.tag = (tag_ids or {}).get(value.lower(), value)
+            elif name == "checklist" and value in ("done", "open"):
+                task_filter.checklist = value
+            else:
+                raise ValueError(f"Unknown filter: {arg}")
+        return task_filter
+
+    def matches(self, task: Task) -> bool:
+        """Check whether a task meets every criterion."""
+        if self.due_before is not None:
+            due = _due_date(task)
+            if due is None or due > self.due_before:
+                return False
+        if self.tag is not None and self.tag not in task.tags:
+            return False
+        if self.checklist is not None:
+            if not task.checklist:
+                return False
+            done = all(item.completed for item in task.checklist)
+            if done != (self.checklist == "done"):
+                return False
+        return True
+
+
+def _due_date(task: Task) -> Optional[date]:
+    if not task.date:
+        return None
+    try:
+        return datetime.fromisoformat(task.date.replace("Z", "+00:00")).date()
+    except ValueError:
+        return None
+
+
+def _truncate(text: str, limit: int) -> str:
+    return text if len(text) <= limit else text[: limit - 1] + "…"
+
+
+def iter_matching(
+    tasks: Iterable[Task], task_filter: TaskFilter
+) -> Iterator[Task]:
+    """Lazily yield the tasks that match a filter."""
+    return (task for task in tasks if task_filter.matches(task))
+
+
+def count_matching(tasks: Iterable[Task], task_filter: TaskFilter) -> int:
+    """Count matching tasks without building a filtered list."""
+    return sum(1 for _ in iter_matching(tasks, task_filter))
+
+
+def render_page(
+    tasks: Iterable[Task],
+    task_filter: TaskFilter,
+    page: int,
+    total: int,
+    per_page: int = TASKS_PER_PAGE,
+) -> discord.Embed:
+    """
+    Render one page of matching tasks as an embed.
+
+    Only the tasks on the requested page are materialized, so the size of the
+    embed does not depend on how many tasks the user has. Tasks are numbered
+    by their position in the full list, filtered or not, so the numbers can be
+    passed to ``!done`` and ``!edit``.
+
+    Args:
+        tasks: Full task list
+        task_filter: Filter to apply
+        page: Zero-based page number
+        total: Number of matching tasks
+        per_page: Tasks per page
+
+    Returns:
+        Embed for the page
+    """
+    pages = max(1, -(-total // per_page))
+    start = page * per_page
+    embed = discord.Embed(title="Todos", description=f"{total} matching tasks")
+    embed.set_footer(text=f"Page {page + 1}/{pages}")
+
+    numbered = (
+        (number, task) for number, task in enumerate(tasks, start=1) if task_filter.matches(task)
+    )
+    for number, task in islice(numbered, start, start + per_page):
+        details: List[str] = []
+        due = _due_date(task)
+        if due is not None:
+            details.append(f"Due {due.isoformat()}")
+        if task.checklist:
+            completed = sum(1 for item in task.checklist if item.completed)
+            details.append(f"Checklist {completed}/{len(task.checklist)}")
+        if task.notes:
+            details.append(task.notes)
+        embed.add_field(
+            name=_truncate(f"{number}. {task.text}", FIELD_NAME_LIMIT),
+            value=_truncate(" · ".join(details) or "No details", FIELD_VALUE_LIMIT),
+            inline=False,
+        )
+    return embed
+
+
+class TaskPaginator(discord.ui.View):
+    """
+    Button navigation over a task list, rendering one page per click.
+
+    The view keeps its own copy of the task list, so the numbers it shows stay
+    put while the cached list changes underneath. Only its author can flip pages.
+
+    Args:
+        tasks: Task list to page through
+        task_filter: Filter to apply
+        author_id: Discord id of the user who may navigate
+        per_page: Tasks per page
+        timeout: Seconds of inactivity before the buttons stop working
+    """
+
+    def __init__(
+        self,
+        tasks: Sequence[Task],
+        task_filter: TaskFilter,
+        author_id: int,
+        per_page: int = TASKS_PER_PAGE,
+        timeout: float = 120.0,
+    ) -> None:
+        super().__init__(timeout=timeout)
+        self.tasks = list(tasks)
+        self.task_filter = task_filter
+        self.author_id = author_id
+        self.per_page = per_page
+        self.total = count_matching(self.tasks, task_filter)
+        self.page = 0
+        self.message: Optional[discord.Message] = None
+        self._sync_buttons()
+
+    @property
+    def pages(self) -> int:
+        """Number of pages."""
+        return max(1, -(-self.total // self.per_page))
+
+    def render(self) -> discord.Embed:
+        """Render the current page."""
+        return render_page(self.tasks, self.task_filter, self.page, self.total, self.per_page)
+
+    def _sync_buttons(self) -> None:
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Only let the command's author navigate."""
+        return interaction.user.id == self.author_id
+
+    async def _show(self, interaction: discord.Interaction) -> None:
+        self._sync_buttons()
+        await interaction.response.edit_message(embed=self.render(), view=self)
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary)
+    async def previous_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ) -> None:
+        """Show the previous page."""
+        self.page = max(0, self.page - 1)
+        await self._show(interaction)
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary)
+    async def next_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ) -> None:
+        """Show the next page."""
+        self.page = min(self.pages - 1, self.page + 1)
+        await self._show(interaction)
+
+    async def on_timeout(self) -> None:
+        """Remove the buttons once they stop working."""
+        if self.message is not None:
+            try:
+                await self.message.edit(view=None)
+            except discord.HTTPException:
+                pass
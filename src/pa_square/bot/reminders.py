@@ -0,0 +1,404 @@
+"""Passive-aggressive reminders for task due dates and Habitica reminder times."""
+
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Generic, Iterable, List, Optional, Set, Tuple, TypeVar
+
+import discord
+from discord.ext import commands
+
+from src.pa_square.bot.outbound import Outbound
+from src.pa_square.config import config
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.models import Task
+from src.pa_square.habitica.registry import ManagerRegistry
+from src.pa_square.llm.backends import LocalBackend
+from src.pa_square.llm.writer import DEFAULT_TONE, ReminderWriter
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TimingWheel(Generic[T]):
+    """
+    Hashed timing wheel with an overflow heap for far-away deadlines.
+
+    Deadlines within one revolution (``slots`` ticks) go straight into their
+    slot, so scheduling and expiring them is O(1). Later deadlines wait in a
+    heap and are moved into the wheel once they come within range, so each
+    tick only touches the items that are actually due.
+
+    Args:
+        tick: Seconds per slot
+        slots: Slots in the wheel
+        now: Current time in seconds
+    """
+
+    def __init__(self, tick: float = 1.0, slots: int = 3600, now: float = 0.0) -> None:
+        self.tick = tick
+        self._slots: List[List[Tuple[int, T]]] = [[] for _ in range(slots)]
+        self._overflow: List[Tuple[int, int, T]] = []
+        self._counter = itertools.count()
+        self._current = int(now // tick)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def schedule(self, at: float, item: T) -> None:
+        """
+        Schedule an item to expire at a time.
+
+        Args:
+            at: Time in seconds; past times expire on the next tick
+            item: Item returned by advance once due
+        """
+        index = max(math.ceil(at / self.tick), self._current + 1)
+        self._size += 1
+        if index - self._current < len(self._slots):
+            self._slots[index % len(self._slots)].append((index, item))
+        else:
+            heapq.heappush(self._overflow, (index, next(self._counter), item))
+
+    def advance(self, now: float) -> List[T]:
+        """
+        Move the wheel forward to a time.
+
+        Args:
+            now: Current time in seconds
+
+        Returns:
+            Items that expired, oldest deadline first
+        """
+        target = int(now // self.tick)
+        if target <= self._current:
+            return []
+        expired: List[Tuple[int, T]] = []
+        if target - self._current >= len(self._slots):
+            # Fell behind by more than a revolution: sweep every slot once
+            for slot in self._slots:
+                expired.extend(entry for entry in slot if entry[0] <= target)
+                slot[:] = [entry for entry in slot if entry[0] > target]
+            self._current = target
+        else:
+            while self._current < target:
+                self._current += 1
+                slot = self._slots[self._current % len(self._slots)]
+                expired.extend(slot)
+                slot.clear()
+        while self._overflow and self._overflow[0][0] <= target:
+            index, _, item = heapq.heappop(self._overflow)
+            expired.append((index, item))
+        self._promote()
+        self._size -= len(expired)
+        expired.sort(key=lambda entry: entry[0])
+        return [item for _, item in expired]
+
+    def _promote(self) -> None:
+        horizon = self._current + len(self._slots)
+        while self._overflow and self._overflow[0][0] < horizon:
+            index, _, item = heapq.heappop(self._overflow)
+            self._slots[index % len(self._slots)].append((index, item))
+
+
+@dataclass
+class Reminder:
+    """A reminder for one task, due at a Unix timestamp."""
+
+    user: int
+    task: str
+    key: str
+    text: str
+    at: float
+
+
+def _timestamp(value: Any) -> Optional[float]:
+    """Parse a Habitica ISO date into a Unix timestamp, treating naive dates as UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def reminders_for(user: int, tasks: Iterable[Task]) -> List[Reminder]:
+    """
+    Collect the reminders of a task list.
+
+    Every open task gets one reminder per entry in its ``reminders`` list and
+    one at its due date.
+
+    Args:
+        user: Discord user id to remind
+        tasks: Habitica tasks
+
+    Returns:
+        Reminders, in no particular order
+    """
+    reminders = []
+    for task in tasks:
+        if not task.id or task.completed:
+            continue
+        text = task.text or "that task"
+        for entry in task.reminders:
+            at = _timestamp(entry.time)
+            if at is not None:
+                key = f"{task.id}:{entry.id or entry.time}"
+                reminders.append(Reminder(user, task.id, key, text, at))
+        due = _timestamp(task.date)
+        if due is not None:
+            reminders.append(Reminder(user, task.id, f"{task.id}:due", text, due))
+    return reminders
+
+
+class ReminderEngine:
+    """
+    Fires reminders from a timing wheel and DMs them in per-user batches.
+
+    Reminder texts come from a ReminderWriter, so all reminders due on a tick
+    are written in as few backend calls as its batch size allows.
+
+    Reminders are (re)loaded from the task lists already in the shared task
+    cache, for the owner of the default account and every user with a live
+    manager, so refreshing never calls Habitica. Pending reminders are saved
+    to a JSON file, so they survive restarts; ones missed by less than
+    ``grace`` seconds while the bot was down are sent on startup.
+
+    Args:
+        bot: Discord bot used to send DMs
+        habitica_manager: Default Habitica manager
+        registry: Optional per-user manager registry
+        owner_id: Discord id of the default account's owner, None to skip that account
+        state_path: Optional JSON file to persist pending reminders to
+        writer: Writes the reminder texts, local templates if None
+        tick: Seconds per wheel tick
+        refresh_interval: Seconds between reloads from the task cache
+        grace: Seconds a missed reminder is still worth sending
+        outbound: Optional outbound queues to send the DMs through
+        clock: Wall clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        habitica_manager: HabiticaManager,
+        registry: Optional[ManagerRegistry] = None,
+        owner_id: Optional[int] = None,
+        state_path: Optional[str] = None,
+        writer: Optional[ReminderWriter] = None,
+        tick: float = 1.0,
+        refresh_interval: float = 60.0,
+        grace: float = 3600.0,
+        outbound: Optional[Outbound] = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.bot = bot
+        self.habitica_manager = habitica_manager
+        self.registry = registry
+        self.owner_id = owner_id
+        self.state_path = state_path
+        self.writer = writer or ReminderWriter(LocalBackend())
+        self._templates = LocalBackend()
+        self.tick = tick
+        self.refresh_interval = refresh_interval
+        self.grace = grace
+        self.outbound = outbound
+        self._clock = clock
+        self.wheel: TimingWheel[Reminder] = TimingWheel(tick, now=clock())
+        self._live: Dict[Tuple[int, str], Reminder] = {}
+        self._by_user: Dict[int, Set[str]] = {}
+        self._dirty = False
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(
+        cls,
+        bot: commands.Bot,
+        habitica_manager: HabiticaManager,
+        registry: Optional[ManagerRegistry] = None,
+        outbound: Optional[Outbound] = None,
+    ) -> "ReminderEngine":
+        """Build a reminder engine from the application configuration."""
+        return cls(
+            bot,
+            habitica_manager,
+            registry,
+            outbound=outbound,
+            owner_id=int(config.REMINDER_OWNER_ID) if config.REMINDER_OWNER_ID else None,
+            state_path=config.REMINDER_STATE_FILE or None,
+            writer=ReminderWriter.from_config(),
+            tick=config.REMINDER_TICK,
+            refresh_interval=config.REMINDER_REFRESH_INTERVAL,
+            grace=config.REMINDER_GRACE,
+        )
+
+    def __len__(self) -> int:
+        return len(self._live)
+
+    def schedule(self, reminder: Reminder) -> None:
+        """Schedule a reminder, replacing one with the same user and key."""
+        self._live[(reminder.user, reminder.key)] = reminder
+        self._by_user.setdefault(reminder.user, set()).add(reminder.key)
+        self.wheel.schedule(reminder.at, reminder)
+        self._dirty = True
+
+    def sync(self, user: int, tasks: Iterable[Task]) -> None:
+        """
+        Make a user's pending reminders match their current task list.
+
+        Reminders of deleted or completed tasks are cancelled, changed times are
+        rescheduled and reminders already in the past are not scheduled again.
+        Missed reminders that have not fired yet, e.g. restored after downtime,
+        stay scheduled while they are within the grace window.
+
+        Args:
+            user: Discord user id
+            tasks: The user's Habitica tasks
+        """
+        now = self._clock()
+        cutoff = now - self.grace
+        wanted = {
+            r.key: r
+            for r in reminders_for(user, tasks)
+            if r.at > now or (r.at >= cutoff and (user, r.key) in self._live)
+        }
+        for key in self._by_user.get(user, set()) - wanted.keys():
+            self._live.pop((user, key), None)
+            self._dirty = True
+        self._by_user[user] = {key for key in self._by_user.get(user, set()) if key in wanted}
+        for key, reminder in wanted.items():
+            current = self._live.get((user, key))
+            if current is None or current.at != reminder.at or current.text != reminder.text:
+                self.schedule(reminder)
+
+    def refresh(self) -> None:
+        """Reload reminders from the task lists in the cache."""
+        sources: List[Tuple[int, HabiticaManager]] = []
+        if self.owner_id is not None:
+            sources.append((self.owner_id, self.habitica_manager))
+        if self.registry is not None:
+            sources.extend(self.registry.live_managers())
+        for user, manager in sources:
+            entry = manager.cache.peek(manager.cache_key("todos"))
+            if entry is not None and isinstance(entry.data, dict):
+                self.sync(user, entry.data.get("data") or [])
+
+    def due(self) -> List[Reminder]:
+        """
+        Advance the wheel and collect reminders that are due and still wanted.
+
+        Returns:
+            Due reminders, cancelled and superseded ones are skipped
+        """
+        due = []
+        for reminder in self.wheel.advance(self._clock()):
+            if self._live.get((reminder.user, reminder.key)) is not reminder:
+                continue
+            del self._live[(reminder.user, reminder.key)]
+            self._by_user.get(reminder.user, set()).discard(reminder.key)
+            self._dirty = True
+            due.append(reminder)
+        return due
+
+    async def send(self, reminders: List[Reminder]) -> None:
+        """DM due reminders, one message per user."""
+        batches: Dict[int, List[Reminder]] = {}
+        for reminder in reminders:
+            batches.setdefault(reminder.user, []).append(reminder)
+        await asyncio.gather(*(self._send_batch(user, batch) for user, batch in batches.items()))
+
+    async def _send_batch(self, user_id: int, batch: List[Reminder]) -> None:
+        texts = list(dict.fromkeys(r.text for r in batch))
+        try:
+            lines = await self.writer.write_many(texts)
+        except Exception:
+            # The batch has already left _live, so still send something
+            logger.exception("Reminder writer failed, sending templates to %s", user_id)
+            lines = [self._templates.render(text, DEFAULT_TONE) for text in texts]
+        try:
+            user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+            if self.outbound is not None:
+                await self.outbound.send(user, "\n".join(lines))
+            else:
+                await user.send("\n".join(lines))
+        except discord.HTTPException as e:
+            logger.warning("Could not remind %s: %s", user_id, e)
+
+    def start(self) -> None:
+        """Load saved reminders and start ticking in the background."""
+        self._load()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop ticking, save pending reminders and close the writer."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self._save()
+        await self.writer.close()
+
+    async def _run(self) -> None:
+        await self.bot.wait_until_ready()
+        refreshed_at = 0.0
+        while True:
+            try:
+                now = self._clock()
+                if now - refreshed_at >= self.refresh_interval:
+                    self.refresh()
+                    refreshed_at = now
+                due = self.due()
+                if due:
+                    await self.send(due)
+                await self._save()
+            except Exception:
+                logger.exception("Reminder tick failed")
+            await asyncio.sleep(self.tick)
+
+    def _load(self) -> None:
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, encoding="utf-8") as file:
+                saved = [Reminder(**entry) for entry in json.load(file)]
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Ignoring unreadable reminder state %s: %s", self.state_path, e)
+            return
+        cutoff = self._clock() - self.grace
+        for reminder in saved:
+            if reminder.at >= cutoff:
+                self.schedule(reminder)
+        self._dirty = False
+
+    async def _save(self) -> None:
+        if not self._dirty or not self.state_path:
+            return
+        self._dirty = False
+        state = [asdict(reminder) for reminder in self._live.values()]
+        await asyncio.to_thread(self._write, state)
+
+    def _write(self, state: List[Dict[str, Any]]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.state_path))
+        # Write to a temp file first so a crash never leaves a half-written state
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".reminders-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(state, file)
+            os.replace(tmp_path, self.state_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
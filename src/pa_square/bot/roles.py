@@ -0,0 +1,214 @@
+"""Role lookup by name and bulk role changes."""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+import discord
+from discord.ext import commands
+
+from src.pa_square.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+ROLE_CHANGES = REGISTRY.counter(
+    "discord_role_changes_total", "Role changes made by bulk commands", ("action", "outcome")
+)
+
+# Called with (done, total) while a bulk change runs
+Progress = Callable[[int, int], Awaitable[None]]
+
+
+class RoleIndex:
+    """
+    Per-guild index of role names, kept up to date from the gateway's role events.
+
+    A guild's index is built from ``guild.roles`` on its first lookup; after
+    that a lookup is a dict access plus ``guild.get_role``. As with
+    ``discord.utils.get(guild.roles, name=...)``, the lowest role wins when
+    several share a name. Call ``listen`` to follow role changes.
+    """
+
+    def __init__(self) -> None:
+        self._guilds: Dict[int, Dict[str, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._guilds)
+
+    def listen(self, bot: commands.Bot) -> None:
+        """Update the index from the bot's role and guild events."""
+        bot.add_listener(self.on_guild_role_create)
+        bot.add_listener(self.on_guild_role_update)
+        bot.add_listener(self.on_guild_role_delete)
+        bot.add_listener(self.on_guild_remove)
+
+    def get(self, guild: Optional[discord.Guild], name: str) -> Optional[discord.Role]:
+        """
+        Find a guild's role by name.
+
+        Args:
+            guild: Guild to look in, None outside of guilds
+            name: Role name
+
+        Returns:
+            The role, or None if the guild has no role of that name
+        """
+        if guild is None:
+            return None
+        names = self._guilds.get(guild.id)
+        if names is None:
+            names = self._build(guild)
+        role_id = names.get(name)
+        return guild.get_role(role_id) if role_id is not None else None
+
+    def forget(self, guild_id: int) -> None:
+        """Drop a guild's index, it is rebuilt on its next lookup."""
+        self._guilds.pop(guild_id, None)
+
+    async def on_guild_role_create(self, role: discord.Role) -> None:
+        names = self._guilds.get(role.guild.id)
+        if names is None:
+            return
+        current = role.guild.get_role(names[role.name]) if role.name in names else None
+        if current is None or role.position < current.position:
+            names[role.name] = role.id
+
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role) -> None:
+        if before.name != after.name or before.position != after.position:
+            await self.on_guild_role_delete(before)
+            await self.on_guild_role_create(after)
+
+    async def on_guild_role_delete(self, role: discord.Role) -> None:
+        names = self._guilds.get(role.guild.id)
+        if names is not None and names.get(role.name) == role.id:
+            # Another role may carry the same name
+            self.forget(role.guild.id)
+
+    async def on_guild_remove(self, guild: discord.Guild) -> None:
+        self.forget(guild.id)
+
+    def _build(self, guild: discord.Guild) -> Dict[str, int]:
+        names: Dict[str, int] = {}
+        for role in guild.roles:
+            names.setdefault(role.name, role.id)
+        self._guilds[guild.id] = names
+        return names
+
+
+def has_role(index: RoleIndex, name: str) -> Callable:
+    """
+    Command check like ``commands.has_role`` that resolves the role through a RoleIndex.
+
+    Args:
+        index: Role index of the bot
+        name: Role name the author must have
+
+    Raises:
+        commands.NoPrivateMessage: Outside of guilds
+        commands.MissingRole: If the author lacks the role
+    """
+
+    def predicate(ctx: commands.Context) -> bool:
+        if ctx.guild is None:
+            raise commands.NoPrivateMessage()
+        role = index.get(ctx.guild, name)
+        if role is None or ctx.author.get_role(role.id) is None:
+            raise commands.MissingRole(name)
+        return True
+
+    return commands.check(predicate)
+
+
+@dataclass
+class BulkRoleResult:
+    """Outcome of a bulk role change."""
+
+    changed: int = 0
+    skipped: int = 0
+    failed: int = 0
+
+
+async def change_role(
+    members: Iterable[discord.Member],
+    role: discord.Role,
+    add: bool = True,
+    concurrency: int = 4,
+    progress: Optional[Progress] = None,
+    progress_interval: float = 5.0,
+    max_retries: int = 3,
+) -> BulkRoleResult:
+    """
+    Add a role to, or remove it from, many members.
+
+    Members that already have (or lack) the role and bots are skipped. At most
+    ``concurrency`` changes are in flight, each worker taking the next member
+    when it is done with one. A rate limit that discord.py hands
+    back as RateLimited is waited out and the change retried.
+
+    Args:
+        members: Members to change
+        role: Role to add or remove
+        add: True to add the role, False to remove it
+        concurrency: Maximum changes in flight
+        progress: Optional callback, called at most every ``progress_interval`` seconds
+        progress_interval: Seconds between progress callbacks
+        max_retries: Rate limited attempts per member before giving up
+
+    Returns:
+        Counts of changed, skipped and failed members
+    """
+    action = "add" if add else "remove"
+    pending = []
+    result = BulkRoleResult()
+    for member in members:
+        if member.bot or (member.get_role(role.id) is not None) == add:
+            result.skipped += 1
+        else:
+            pending.append(member)
+
+    reported_at = time.monotonic()
+    done = 0
+
+    async def change(member: discord.Member) -> None:
+        nonlocal done, reported_at
+        for attempt in range(max_retries + 1):
+            try:
+                if add:
+                    await member.add_roles(role, reason="Bulk role assignment")
+                else:
+                    await member.remove_roles(role, reason="Bulk role removal")
+            except discord.RateLimited as e:
+                if attempt == max_retries:
+                    result.failed += 1
+                    ROLE_CHANGES.inc(action=action, outcome="rate_limited")
+                    break
+                await asyncio.sleep(e.retry_after)
+                continue
+            except discord.HTTPException as e:
+                logger.warning("Could not %s role %s for %s: %s", action, role.name,
+                               member.id, e)
+                result.failed += 1
+                ROLE_CHANGES.inc(action=action, outcome="error")
+                break
+            result.changed += 1
+            ROLE_CHANGES.inc(action=action, outcome="ok")
+            break
+        done += 1
+        if progress is not None and time.monotonic() - reported_at >= progress_interval:
+            reported_at = time.monotonic()
+            try:
+                await progress(done, len(pending))
+            except discord.HTTPException as e:
+                logger.debug("Could not report role progress: %s", e)
+
+    # A fixed pool of workers, not one task per member
+    remaining = iter(pending)
+
+    async def worker() -> None:
+        for member in remaining:
+            await change(member)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, len(pending))))))
+    return result
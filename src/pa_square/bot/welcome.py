@@ -0,0 +1,249 @@
+"""Rate-capped processing of member joins: welcome DMs and the default role."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import discord
+
+from src.pa_square.bot.outbound import Outbound
+from src.pa_square.bot.roles import RoleIndex
+from src.pa_square.config import config
+from src.pa_square.habitica.rate_limiter import TokenBucket
+from src.pa_square.utils.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+WELCOMES = REGISTRY.counter(
+    "discord_welcomes_total", "Member joins by what happened to the welcome", ("outcome",)
+)
+WELCOME_PENDING = REGISTRY.gauge("discord_welcome_pending", "Member joins waiting to be welcomed")
+
+
+class WelcomeQueue:
+    """
+    Bounded queue of member joins, drained by a fixed pool of workers.
+
+    Joins wait per guild and are taken round-robin, at most ``guild_rate`` per
+    ``guild_per`` seconds for each guild, so a raid on one guild drains at a
+    steady rate without delaying the others. A worker takes up to
+    ``batch_size`` joins of one guild at a time, looks the role up once for
+    the batch and welcomes its members concurrently.
+
+    Members whose DMs are closed are remembered for ``refusal_ttl`` seconds
+    and not DMed again meanwhile, e.g. when they leave and rejoin. Joins
+    beyond ``max_pending`` are dropped and counted, rather than piling up.
+
+    Args:
+        outbound: Outbound queues for the DMs, member.send if None
+        role_name: Role given to every new member, None to only DM them
+        roles: Role name index to find the role in, a linear search if None
+        workers: Number of worker tasks
+        max_pending: Joins held before new ones are dropped
+        guild_rate: Joins processed per guild in a burst
+        guild_per: Seconds for a guild's budget to refill completely
+        batch_size: Joins a worker takes at once
+        refusal_ttl: Seconds to remember a member who refuses DMs
+        max_refusals: Members remembered before the oldest are forgotten
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        outbound: Optional[Outbound] = None,
+        role_name: Optional[str] = None,
+        roles: Optional[RoleIndex] = None,
+        workers: int = 4,
+        max_pending: int = 5000,
+        guild_rate: int = 10,
+        guild_per: float = 10.0,
+        batch_size: int = 10,
+        refusal_ttl: float = 86400.0,
+        max_refusals: int = 100000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.outbound = outbound
+        self.role_name = role_name
+        self.roles = roles
+        self.workers = workers
+        self.max_pending = max_pending
+        self.guild_rate = guild_rate
+        self.guild_per = guild_per
+        self.batch_size = batch_size
+        self.refusal_ttl = refusal_ttl
+        self.max_refusals = max_refusals
+        self._clock = clock
+        self._pending: "OrderedDict[int, Deque[discord.Member]]" = OrderedDict()
+        self._size = 0
+        self._buckets: "OrderedDict[int, TokenBucket]" = OrderedDict()
+        self._refusals: "OrderedDict[int, float]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    @classmethod
+    def from_config(
+        cls, outbound: Optional[Outbound] = None, roles: Optional[RoleIndex] = None
+    ) -> "WelcomeQueue":
+        """Build a welcome queue from the application configuration."""
+        return cls(
+            outbound,
+            role_name=config.DEFAULT_ROLE if config.WELCOME_ASSIGN_ROLE else None,
+            roles=roles,
+            workers=config.WELCOME_WORKERS,
+            max_pending=config.WELCOME_MAX_PENDING,
+            guild_rate=config.WELCOME_GUILD_RATE,
+            guild_per=config.WELCOME_GUILD_PER,
+            batch_size=config.WELCOME_BATCH_SIZE,
+            refusal_ttl=config.WELCOME_REFUSAL_TTL,
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    def submit(self, member: discord.Member) -> bool:
+        """
+        Queue a member who joined, starting the workers if needed.
+
+        Args:
+            member: The member who joined
+
+        Returns:
+            False if the queue is full and the join was dropped
+        """
+        if self._size >= self.max_pending:
+            WELCOMES.inc(outcome="dropped")
+            return False
+        self._pending.setdefault(member.guild.id, deque()).append(member)
+        self._size += 1
+        WELCOME_PENDING.set(self._size)
+        self._wakeup.set()
+        self.start()
+        return True
+
+    def start(self) -> None:
+        """Start the worker pool."""
+        self._tasks = [task for task in self._tasks if not task.done()]
+        while len(self._tasks) < self.workers:
+            self._tasks.append(asyncio.create_task(self._work()))
+
+    async def stop(self) -> None:
+        """Stop the workers. Joins still queued are dropped."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def refuses_dms(self, member_id: int) -> bool:
+        """Whether a member recently refused a DM."""
+        expires = self._refusals.get(member_id)
+        if expires is None:
+            return False
+        if expires <= self._clock():
+            del self._refusals[member_id]
+            return False
+        return True
+
+    def take(self) -> Tuple[List[discord.Member], float]:
+        """
+        Take the next batch of joins, all from one guild within its budget.
+
+        Returns:
+            Tuple of (members, seconds until a guild has budget again if none was taken)
+        """
+        wait = float("inf")
+        for guild_id in list(self._pending):
+            bucket = self._bucket(guild_id)
+            guild_wait = bucket.wait_time()
+            if guild_wait > 0:
+                wait = min(wait, guild_wait)
+                continue
+            members = self._pending[guild_id]
+            batch = []
+            while members and len(batch) < self.batch_size and bucket.wait_time() == 0:
+                bucket.consume()
+                batch.append(members.popleft())
+            # Next time start with the guild after this one
+            if members:
+                self._pending.move_to_end(guild_id)
+            else:
+                del self._pending[guild_id]
+            self._size -= len(batch)
+            WELCOME_PENDING.set(self._size)
+            return batch, 0.0
+        return [], wait
+
+    async def welcome_batch(self, members: List[discord.Member]) -> None:
+        """
+        Welcome joins of one guild.
+
+        Args:
+            members: Members of the same guild
+        """
+        role = None
+        if self.role_name is not None and members:
+            guild = members[0].guild
+            if self.roles is not None:
+                role = self.roles.get(guild, self.role_name)
+            else:
+                role = discord.utils.get(guild.roles, name=self.role_name)
+            if role is None:
+                logger.warning("Role %s doesn't exist in guild %s", self.role_name, guild.id)
+        await asyncio.gather(*(self._welcome(member, role) for member in members))
+
+    async def _welcome(self, member: discord.Member, role: Optional[discord.Role]) -> None:
+        if role is not None:
+            try:
+                await member.add_roles(role, reason="Welcome")
+            except discord.HTTPException as e:
+                logger.warning("Could not give %s the role %s: %s", member.id, role.name, e)
+
+        if self.refuses_dms(member.id):
+            WELCOMES.inc(outcome="skipped")
+            return
+        text = f"Welcome {member.name}"
+        try:
+            if self.outbound is not None:
+                await self.outbound.send(member, text)
+            else:
+                await member.send(text)
+        except discord.Forbidden:
+            WELCOMES.inc(outcome="refused")
+            self._refusals[member.id] = self._clock() + self.refusal_ttl
+            self._refusals.move_to_end(member.id)
+            while len(self._refusals) > self.max_refusals:
+                self._refusals.popitem(last=False)
+        except discord.HTTPException as e:
+            WELCOMES.inc(outcome="failed")
+            logger.warning("Could not welcome %s: %s", member.id, e)
+        else:
+            WELCOMES.inc(outcome="sent")
+
+    def _bucket(self, guild_id: int) -> TokenBucket:
+        bucket = self._buckets.get(guild_id)
+        if bucket is None:
+            bucket = self._buckets[guild_id] = TokenBucket(
+                self.guild_rate, self.guild_rate / self.guild_per, clock=self._clock
+            )
+            while len(self._buckets) > max(1024, len(self._pending)):
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(guild_id)
+        return bucket
+
+    async def _work(self) -> None:
+        while True:
+            batch, wait = self.take()
+            if batch:
+                try:
+                    await self.welcome_batch(batch)
+                except Exception:
+                    logger.exception("Welcoming %d members failed", len(batch))
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=None if wait == float("inf") else wait
+                )
+            except asyncio.TimeoutError:
+                pass
@@ -15,6 +15,35 @@ class Config:
     DISCORD_TOKEN: str = os.getenv("DISCORD_TOKEN", "")
     DISCORD_COMMAND_PREFIX: str = os.getenv("DISCORD_COMMAND_PREFIX", "!")
     DEFAULT_ROLE: str = os.getenv("DEFAULT_ROLE", "PAPA Follower")
+    DISCORD_IGNORED_CHANNELS: str = os.getenv("DISCORD_IGNORED_CHANNELS", "")  # comma-separated ids
+    COMMAND_COOLDOWN_RATE: int = int(os.getenv("COMMAND_COOLDOWN_RATE", "5"))  # commands per user
+    COMMAND_COOLDOWN_PER: float = float(os.getenv("COMMAND_COOLDOWN_PER", "10"))  # seconds
+    COMMAND_DEDUP_WINDOW: float = float(os.getenv("COMMAND_DEDUP_WINDOW", "2"))  # seconds
+    
+    # Outbound Discord Configuration
+    DISCORD_SEND_RATE: int = int(os.getenv("DISCORD_SEND_RATE", "5"))  # requests per route
+    DISCORD_SEND_PER: float = float(os.getenv("DISCORD_SEND_PER", "5"))  # seconds
+    # Longer 429 waits are handed back to the route queue, at least 30, 0 always waits
+    DISCORD_MAX_RATELIMIT_TIMEOUT: float = float(os.getenv("DISCORD_MAX_RATELIMIT_TIMEOUT", "30"))
+    
+    # Role Configuration
+    ROLE_BULK_CONCURRENCY: int = int(os.getenv("ROLE_BULK_CONCURRENCY", "4"))  # changes in flight
+    ROLE_PROGRESS_INTERVAL: float = float(os.getenv("ROLE_PROGRESS_INTERVAL", "5"))  # seconds
+    
+    # Welcome Configuration
+    WELCOME_ASSIGN_ROLE: bool = os.getenv("WELCOME_ASSIGN_ROLE", "false").lower() == "true"
+    WELCOME_WORKERS: int = int(os.getenv("WELCOME_WORKERS", "4"))
+    WELCOME_MAX_PENDING: int = int(os.getenv("WELCOME_MAX_PENDING", "5000"))  # joins
+    WELCOME_GUILD_RATE: int = int(os.getenv("WELCOME_GUILD_RATE", "10"))  # joins per guild
+    WELCOME_GUILD_PER: float = float(os.getenv("WELCOME_GUILD_PER", "10"))  # seconds
+    WELCOME_BATCH_SIZE: int = int(os.getenv("WELCOME_BATCH_SIZE", "10"))  # joins per worker pass
+    WELCOME_REFUSAL_TTL: float = float(os.getenv("WELCOME_REFUSAL_TTL", "86400"))  # seconds
+    
+    # Sharding Configuration
+    DISCORD_SHARDED: bool = os.getenv("DISCORD_SHARDED", "false").lower() == "true"
+    DISCORD_SHARD_COUNT: int = int(os.getenv("DISCORD_SHARD_COUNT", "0"))  # 0 asks Discord
+    DISCORD_SHARD_PROCESSES: int = int(os.getenv("DISCORD_SHARD_PROCESSES", "0"))  # 0 = CPUs
+    DISCORD_SHARD_RESTART_DELAY: float = float(os.getenv("DISCORD_SHARD_RESTART_DELAY", "5"))
     
     # Habitica Configuration
     HABITICA_BASE_URL: str = os.getenv("HABITICA_BASE_URL", "")
@@ -22,16 +51,89 @@ class Config:
     HABITICA_PW: str = os.getenv("HABITICA_PW", "")
     APPLICATION_NAME: str = os.getenv("APPLICATION_NAME", "")
     
+    # Multi-user Configuration
+    CREDENTIALS_KEY: str = os.getenv("CREDENTIALS_KEY", "")  # Fernet key, see cryptography docs
+    CREDENTIALS_FILE: str = os.getenv("CREDENTIALS_FILE", "credentials.json")
+    TOKEN_STORE_FILE: str = os.getenv("TOKEN_STORE_FILE", "tokens.json")
+    HABITICA_MAX_MANAGERS: int = int(os.getenv("HABITICA_MAX_MANAGERS", "1000"))
+    HABITICA_IDLE_TIMEOUT: float = float(os.getenv("HABITICA_IDLE_TIMEOUT", "900"))  # seconds
+    
+    # Local Task Store Configuration
+    TASK_STORE_FILE: str = os.getenv("TASK_STORE_FILE", "tasks.db")  # empty to disable
+    HABITICA_OUTBOX_INTERVAL: float = float(os.getenv("HABITICA_OUTBOX_INTERVAL", "30"))  # seconds
+    
+    # Background Sync Configuration
+    HABITICA_SYNC_INTERVAL: float = float(os.getenv("HABITICA_SYNC_INTERVAL", "60"))  # 0 disables
+    HABITICA_SYNC_CONCURRENCY: int = int(os.getenv("HABITICA_SYNC_CONCURRENCY", "4"))  # accounts
+    HABITICA_SYNC_TYPES: str = os.getenv("HABITICA_SYNC_TYPES", "todos")  # e.g. "todos,dailys"
+    
+    # Reminder Configuration
+    REMINDER_OWNER_ID: str = os.getenv("REMINDER_OWNER_ID", "")  # Discord id owning HABITICA_USER
+    REMINDER_STATE_FILE: str = os.getenv("REMINDER_STATE_FILE", "reminders.json")
+    REMINDER_TICK: float = float(os.getenv("REMINDER_TICK", "1"))  # seconds
+    REMINDER_REFRESH_INTERVAL: float = float(os.getenv("REMINDER_REFRESH_INTERVAL", "60"))
+    REMINDER_GRACE: float = float(os.getenv("REMINDER_GRACE", "3600"))  # seconds
+    
+    # Reminder Text Generation Configuration
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "anthropic")  # "anthropic" or "local"
+    ANTHROPIC_API_KEY: str = os.getenv("ANTHROPIC_API_KEY", "")  # local templates if empty
+    ANTHROPIC_MODEL: str = os.getenv("ANTHROPIC_MODEL", "claude-3-5-haiku-latest")
+    ANTHROPIC_MAX_TOKENS: int = int(os.getenv("ANTHROPIC_MAX_TOKENS", "1024"))
+    LLM_BATCH_SIZE: int = int(os.getenv("LLM_BATCH_SIZE", "20"))  # reminders per call
+    LLM_BATCH_WINDOW: float = float(os.getenv("LLM_BATCH_WINDOW", "0.05"))  # seconds
+    LLM_CONCURRENCY: int = int(os.getenv("LLM_CONCURRENCY", "2"))  # calls in flight
+    LLM_TIMEOUT: float = float(os.getenv("LLM_TIMEOUT", "15"))  # seconds
+    LLM_CACHE_SIZE: int = int(os.getenv("LLM_CACHE_SIZE", "1024"))  # texts
+    
+    # Moderation Configuration
+    MODERATION_FILE: str = os.getenv("MODERATION_FILE", "moderation.json")  # word lists
+    MODERATION_RELOAD_INTERVAL: float = float(os.getenv("MODERATION_RELOAD_INTERVAL", "30"))
+    
     # Logging Configuration
     LOG_FILE: str = os.getenv("LOG_FILE", "discord.log")
-    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "DEBUG")
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_LEVELS: str = os.getenv("LOG_LEVELS", "discord=INFO,discord.gateway=WARNING")  # per module
+    LOG_MAX_BYTES: int = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # rotate at
+    LOG_BACKUP_COUNT: int = int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    LOG_DEBUG_SAMPLE_RATE: int = int(os.getenv("LOG_DEBUG_SAMPLE_RATE", "10"))  # keep 1 in N
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))  # records
+    LOG_JSON: bool = os.getenv("LOG_JSON", "false").lower() == "true"
     
-    # Flask Keep-Alive Configuration
+    # Keep-Alive Health Server Configuration
     KEEP_ALIVE_HOST: str = os.getenv("KEEP_ALIVE_HOST", "0.0.0.0")
     KEEP_ALIVE_PORT: int = int(os.getenv("KEEP_ALIVE_PORT", "8080"))
+    METRICS_SUMMARY_INTERVAL: float = float(os.getenv("METRICS_SUMMARY_INTERVAL", "300"))  # seconds
     
     # API Rate Limiting
     HABITICA_API_DELAY: int = int(os.getenv("HABITICA_API_DELAY", "30"))  # seconds
+    # Burst size, refilled over the window. X-RateLimit-Remaining can only lower what's left
+    HABITICA_RATE_LIMIT: int = int(os.getenv("HABITICA_RATE_LIMIT", "30"))  # requests per window
+    HABITICA_RATE_WINDOW: int = int(os.getenv("HABITICA_RATE_WINDOW", "60"))  # seconds
+    # Not a cap: background calls wait while this many requests or fewer are left in the
+    # window, so those stay free for interactive commands
+    HABITICA_BACKGROUND_RESERVE: int = int(os.getenv("HABITICA_BACKGROUND_RESERVE", "5"))
+    HABITICA_BULK_CHUNK_SIZE: int = int(os.getenv("HABITICA_BULK_CHUNK_SIZE", "50"))  # tasks
+    HABITICA_BULK_CONCURRENCY: int = int(os.getenv("HABITICA_BULK_CONCURRENCY", "5"))
+    
+    # Retries and Circuit Breaker
+    HABITICA_RETRY_ATTEMPTS: int = int(os.getenv("HABITICA_RETRY_ATTEMPTS", "3"))
+    HABITICA_RETRY_BASE_DELAY: float = float(os.getenv("HABITICA_RETRY_BASE_DELAY", "0.5"))
+    HABITICA_RETRY_MAX_DELAY: float = float(os.getenv("HABITICA_RETRY_MAX_DELAY", "10"))
+    HABITICA_BREAKER_THRESHOLD: int = int(os.getenv("HABITICA_BREAKER_THRESHOLD", "5"))
+    HABITICA_BREAKER_RECOVERY: float = float(os.getenv("HABITICA_BREAKER_RECOVERY", "30"))
+    
+    # HTTP Connection Pool
+    HABITICA_POOL_LIMIT: int = int(os.getenv("HABITICA_POOL_LIMIT", "100"))
+    HABITICA_POOL_LIMIT_PER_HOST: int = int(os.getenv("HABITICA_POOL_LIMIT_PER_HOST", "10"))
+    HABITICA_DNS_CACHE_TTL: int = int(os.getenv("HABITICA_DNS_CACHE_TTL", "300"))  # seconds
+    HABITICA_KEEPALIVE_TIMEOUT: float = float(os.getenv("HABITICA_KEEPALIVE_TIMEOUT", "60"))
+    HABITICA_TIMEOUT_TOTAL: float = float(os.getenv("HABITICA_TIMEOUT_TOTAL", "30"))  # seconds
+    HABITICA_TIMEOUT_CONNECT: float = float(os.getenv("HABITICA_TIMEOUT_CONNECT", "10"))
+    HABITICA_TIMEOUT_READ: float = float(os.getenv("HABITICA_TIMEOUT_READ", "20"))
+    
+    # Task Cache
+    HABITICA_CACHE_TTL: float = float(os.getenv("HABITICA_CACHE_TTL", "60"))  # seconds
+    HABITICA_CACHE_MAX_ENTRIES: int = int(os.getenv("HABITICA_CACHE_MAX_ENTRIES", "1024"))
     
     @classmethod
     def validate(cls) -> None:
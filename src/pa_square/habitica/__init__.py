@@ -1,6 +1,7 @@
 """Habitica API integration module."""
 
 
-__all__ = ["HabiticaManager"]
+__all__ = ["HabiticaManager", "Priority"]
 
 from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.rate_limiter import Priority
@@ -0,0 +1,254 @@
+"""In-process read-through cache for Habitica task lists."""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from src.pa_square.config import config
+from src.pa_square.habitica.models import Task
+
+CacheKey = Tuple[Hashable, str]
+
+
+@dataclass
+class CacheEntry:
+    """A cached task list response and the validator used to revalidate it."""
+
+    data: Any
+    etag: Optional[str] = None
+    stored_at: float = field(default_factory=time.monotonic)
+
+
+class TaskCache:
+    """
+    TTL + LRU cache of task list responses keyed by (user, task_type).
+
+    Fresh entries are served without touching the network. Stale entries are
+    kept around (until evicted) so their ETag can be sent as If-None-Match,
+    letting Habitica answer with a cheap 304 when nothing changed.
+
+    Args:
+        ttl: Seconds an entry is served without revalidation
+        max_entries: Maximum number of entries before least recently used are evicted
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        ttl: float = 60.0,
+        max_entries: int = 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_config(cls) -> "TaskCache":
+        """Build a task cache from the application configuration."""
+        return cls(ttl=config.HABITICA_CACHE_TTL, max_entries=config.HABITICA_CACHE_MAX_ENTRIES)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _is_fresh(self, entry: CacheEntry) -> bool:
+        return self._clock() - entry.stored_at < self.ttl
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        """
+        Get a fresh entry, counting the lookup as a hit or miss.
+
+        Args:
+            key: (user, task_type) cache key
+
+        Returns:
+            Fresh cache entry or None
+        """
+        entry = self._entries.get(key)
+        if entry is not None and self._is_fresh(entry):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def peek(self, key: CacheKey) -> Optional[CacheEntry]:
+        """Get an entry even if it is stale, without affecting counters or recency."""
+        return self._entries.get(key)
+
+    def put(self, key: CacheKey, data: Any, etag: Optional[str] = None) -> CacheEntry:
+        """
+        Store a response, evicting the least recently used entries if full.
+
+        Args:
+            key: (user, task_type) cache key
+            data: Response payload
+            etag: ETag header returned with the payload
+
+        Returns:
+            The stored entry
+        """
+        entry = CacheEntry(data=data, etag=etag, stored_at=self._clock())
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return entry
+
+    def revalidated(self, key: CacheKey) -> Optional[CacheEntry]:
+        """
+        Mark a stale entry as fresh again after a 304 Not Modified.
+
+        Args:
+            key: (user, task_type) cache key
+
+        Returns:
+            The refreshed entry, or None if it was evicted meanwhile
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            entry.stored_at = self._clock()
+            self._entries.move_to_end(key)
+            self.revalidations += 1
+        return entry
+
+    def add_task(self, key: CacheKey, task: Task) -> None:
+        """
+        Write a newly created task through to a cached task list.
+
+        Args:
+            key: (user, task_type) cache key
+            task: Task created on Habitica
+        """
+        tasks = self._task_list(key)
+        if tasks is not None:
+            tasks.append(task)
+
+    def _task_list(self, key: CacheKey) -> Optional[List[Task]]:
+        entry = self._entries.get(key)
+        if entry is None or not isinstance(entry.data, dict):
+            return None
+        tasks = entry.data.get("data")
+        return tasks if isinstance(tasks, list) else None
+
+    def find_task(self, user: Hashable, task_id: str) -> Optional[Tuple[CacheKey, int, Task]]:
+        """
+        Look a task up in any of a user's cached lists.
+
+        Args:
+            user: User the entries belong to
+            task_id: Task id
+
+        Returns:
+            Tuple of (cache key, index in the list, task), or None if not cached
+        """
+        for key in [k for k in self._entries if k[0] == user]:
+            for index, task in enumerate(self._task_list(key) or ()):
+                if isinstance(task, Task) and task.id == task_id:
+                    return key, index, task
+        return None
+
+    def replace_task(self, key: CacheKey, task: Task) -> Optional[Task]:
+        """
+        Swap the cached task with the same id for a new version.
+
+        Returns:
+            The replaced task, or None if it is not in the list
+        """
+        tasks = self._task_list(key) or []
+        for index, cached in enumerate(tasks):
+            if isinstance(cached, Task) and cached.id == task.id:
+                tasks[index] = task
+                return cached
+        return None
+
+    def remove_task(self, key: CacheKey, task_id: str) -> Optional[int]:
+        """
+        Drop a task from a cached list.
+
+        Returns:
+            Index the task had, for insert_task to put it back, or None if not in the list
+        """
+        tasks = self._task_list(key) or []
+        for index, cached in enumerate(tasks):
+            if isinstance(cached, Task) and cached.id == task_id:
+                del tasks[index]
+                return index
+        return None
+
+    def insert_task(self, key: CacheKey, index: int, task: Task) -> None:
+        """Put a task back into a cached list at (or near) its old position."""
+        tasks = self._task_list(key)
+        if tasks is not None and not any(
+            isinstance(cached, Task) and cached.id == task.id for cached in tasks
+        ):
+            tasks.insert(min(index, len(tasks)), task)
+
+    def merge(
+        self, key: CacheKey, tasks: List[Task], etag: Optional[str] = None
+    ) -> Tuple[List[Task], List[str]]:
+        """
+        Apply a freshly fetched task list to a cached one, keeping unchanged task objects.
+
+        Tasks are compared by id and ``updatedAt``. The cached list is updated in
+        place, so views holding a reference to it see the new state.
+
+        Args:
+            key: (user, task_type) cache key
+            tasks: Current task list from Habitica
+            etag: ETag header returned with the list
+
+        Returns:
+            Tuple of (new or changed tasks, ids of removed tasks)
+        """
+        entry = self._entries.get(key)
+        cached = None
+        if entry is not None and isinstance(entry.data, dict):
+            cached = entry.data.get("data")
+        if not isinstance(cached, list):
+            self.put(key, {"success": True, "data": tasks}, etag)
+            return list(tasks), []
+
+        previous = {task.id: task for task in cached}
+        merged, changed = [], []
+        for task in tasks:
+            old = previous.pop(task.id, None)
+            if old is not None and old.updated_at == task.updated_at:
+                merged.append(old)
+            else:
+                merged.append(task)
+                changed.append(task)
+        cached[:] = merged
+        entry.etag = etag
+        entry.stored_at = self._clock()
+        self._entries.move_to_end(key)
+        return changed, [task_id for task_id in previous if task_id]
+
+    def invalidate(self, user: Hashable, task_type: Optional[str] = None) -> None:
+        """
+        Drop cached task lists for a user.
+
+        Args:
+            user: User the entries belong to
+            task_type: Only drop this task type, or all of the user's entries if None
+        """
+        for key in [k for k in self._entries if k[0] == user]:
+            if task_type is None or key[1] == task_type:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        """Get cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
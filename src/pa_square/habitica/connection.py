@@ -0,0 +1,119 @@
+"""Shared HTTP connection pool for Habitica API calls."""
+
+import asyncio
+from typing import Optional
+
+import aiohttp
+
+from src.pa_square.config import config
+from src.pa_square.habitica.models import dumps
+
+
+class ConnectionPool:
+    """
+    Owns a single tuned TCPConnector that every Habitica session borrows.
+
+    Sessions created by the pool do not own the connector, so closing a
+    manager's session (e.g. after a token refresh or a Discord disconnect)
+    keeps warm keep-alive connections around for the next request.
+
+    Args:
+        limit: Total number of simultaneous connections
+        limit_per_host: Simultaneous connections to a single host
+        ttl_dns_cache: Seconds to cache DNS lookups
+        keepalive_timeout: Seconds to keep idle connections open
+        timeout: Default timeouts applied to every session
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 10,
+        ttl_dns_cache: int = 300,
+        keepalive_timeout: float = 60.0,
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+    ) -> None:
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout or aiohttp.ClientTimeout(total=30)
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_config(cls) -> "ConnectionPool":
+        """Build a connection pool from the application configuration."""
+        return cls(
+            limit=config.HABITICA_POOL_LIMIT,
+            limit_per_host=config.HABITICA_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=config.HABITICA_DNS_CACHE_TTL,
+            keepalive_timeout=config.HABITICA_KEEPALIVE_TIMEOUT,
+            timeout=aiohttp.ClientTimeout(
+                total=config.HABITICA_TIMEOUT_TOTAL,
+                connect=config.HABITICA_TIMEOUT_CONNECT,
+                sock_read=config.HABITICA_TIMEOUT_READ,
+            ),
+        )
+
+    @property
+    def closed(self) -> bool:
+        """Whether the pool currently has no open connector."""
+        return self._connector is None or self._connector.closed
+
+    def connector(self) -> aiohttp.TCPConnector:
+        """
+        Get the shared connector, creating it on first use.
+
+        A new connector is created if the previous one was closed or belongs
+        to a different event loop.
+
+        Returns:
+            Shared TCP connector
+        """
+        try:
+            loop: Optional[asyncio.AbstractEventLoop] = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+
+        if self.closed or (loop is not None and loop is not self._loop):
+            self._connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.ttl_dns_cache,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._loop = loop
+        return self._connector
+
+    def create_session(self) -> aiohttp.ClientSession:
+        """
+        Create a lightweight session on top of the shared connector.
+
+        Returns:
+            Session that borrows, but does not own, the pool's connector
+        """
+        return aiohttp.ClientSession(
+            connector=self.connector(),
+            connector_owner=False,
+            timeout=self.timeout,
+            json_serialize=dumps,
+        )
+
+    async def close(self) -> None:
+        """Close the shared connector and all pooled connections."""
+        if self._connector is not None and not self._connector.closed:
+            await self._connector.close()
+        self._connector = None
+        self._loop = None
+
+
+_default_pool: Optional[ConnectionPool] = None
+
+
+def get_default_pool() -> ConnectionPool:
+    """Get the process-wide connection pool shared by all managers."""
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = ConnectionPool.from_config()
+    return _default_pool
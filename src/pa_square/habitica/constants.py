@@ -1,4 +1,16 @@
 """Constants for Habitica API endpoints."""
 
 TODO_ENDPOINT = "/tasks/user"
+TASK_ENDPOINT = "/tasks/{task_id}"
+SCORE_ENDPOINT = "/tasks/{task_id}/score/{direction}"
+TAGS_ENDPOINT = "/tags"
 FETCH_TOKEN = "/user/auth/local/login"
+STATUS_ENDPOINT = "/status"
+
+# Maps the task "type" used when creating a task to the list name used when fetching tasks
+TASK_LIST_TYPES = {
+    "habit": "habits",
+    "daily": "dailys",
+    "todo": "todos",
+    "reward": "rewards",
+}
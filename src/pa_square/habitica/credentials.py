@@ -0,0 +1,201 @@
+"""Encrypted storage for Habitica credentials."""
+
+import json
+import os
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple, Union
+
+from cryptography.fernet import Fernet, InvalidToken
+
+from src.pa_square.config import config
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process lock, writes still merge with the file
+    fcntl = None
+
+
+class EncryptedStore:
+    """
+    Key-value store whose values are encrypted with Fernet.
+
+    Values are kept encrypted in memory and, when a path is given, persisted
+    to a JSON file. Without a configured key a throwaway key is generated and
+    nothing is written to disk, since the file could never be read back.
+
+    Several processes (e.g. the shard launcher's clusters) may share the
+    file: reads reload it when another process replaced it, and writes
+    re-read it under a lock and change only their own key, so no process
+    overwrites another's changes.
+
+    Args:
+        key: Fernet key, generated for this process if None
+        path: Optional JSON file to persist encrypted values to
+    """
+
+    def __init__(self, key: Optional[Union[str, bytes]] = None, path: Optional[str] = None) -> None:
+        if key:
+            self._fernet = Fernet(key)
+            self.path = path
+        else:
+            self._fernet = Fernet(Fernet.generate_key())
+            self.path = None
+        self._values: Dict[str, str] = {}
+        self._version: Optional[Tuple[int, int, int]] = None
+        self._load()
+
+    def __contains__(self, name: str) -> bool:
+        self._refresh()
+        return name in self._values
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self._values)
+
+    def get(self, name: str) -> Optional[str]:
+        """
+        Decrypt and return a stored value.
+
+        Args:
+            name: Key of the value
+
+        Returns:
+            Plain-text value, or None if missing or not decryptable with our key
+        """
+        self._refresh()
+        encrypted = self._values.get(name)
+        if encrypted is None:
+            return None
+        try:
+            return self._fernet.decrypt(encrypted.encode()).decode()
+        except InvalidToken:
+            return None
+
+    def set(self, name: str, value: str) -> None:
+        """
+        Encrypt and store a value.
+
+        Args:
+            name: Key of the value
+            value: Plain-text value
+        """
+        encrypted = self._fernet.encrypt(value.encode()).decode()
+        with self._locked():
+            self._load()
+            self._values[name] = encrypted
+            self._save()
+
+    def delete(self, name: str) -> None:
+        """Remove a stored value if present."""
+        with self._locked():
+            self._load()
+            if self._values.pop(name, None) is not None:
+                self._save()
+
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        # Every save replaces the file, so the inode changes even within one mtime tick
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def _refresh(self) -> None:
+        """Reload the file if another process replaced it since we last read it."""
+        if self.path and self._stat() != self._version:
+            self._load()
+
+    def _load(self) -> None:
+        if not self.path:
+            return
+        version = self._stat()
+        if version is None:
+            self._values, self._version = {}, None
+            return
+        with open(self.path, encoding="utf-8") as file:
+            self._values = json.load(file)
+        self._version = version
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Hold an exclusive lock on the store's lock file while changing it."""
+        if not self.path or fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        # Write to a temp file first so a crash never leaves a half-written store
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".store-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as file:
+                json.dump(self._values, file)
+            os.chmod(tmp_path, 0o600)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._version = self._stat()
+
+
+def token_store_from_config() -> EncryptedStore:
+    """
+    Build the encrypted API token store.
+
+    The bot's own token is keyed by Habitica username, tokens of linked
+    accounts by Discord user id and username, see ManagerRegistry.token_key.
+    """
+    return EncryptedStore(config.CREDENTIALS_KEY or None, config.TOKEN_STORE_FILE)
+
+
+class CredentialStore:
+    """
+    Habitica credentials of Discord users, keyed by Discord user id.
+
+    Args:
+        store: Encrypted backing store
+    """
+
+    def __init__(self, store: EncryptedStore) -> None:
+        self._store = store
+
+    @classmethod
+    def from_config(cls) -> "CredentialStore":
+        """Build a credential store from the application configuration."""
+        return cls(EncryptedStore(config.CREDENTIALS_KEY or None, config.CREDENTIALS_FILE))
+
+    def __contains__(self, discord_id: int) -> bool:
+        return str(discord_id) in self._store
+
+    def get(self, discord_id: int) -> Optional[Tuple[str, str]]:
+        """
+        Get a user's Habitica credentials.
+
+        Args:
+            discord_id: Discord user id
+
+        Returns:
+            Tuple of (username, password) or None if not registered
+        """
+        raw = self._store.get(str(discord_id))
+        if raw is None:
+            return None
+        credentials = json.loads(raw)
+        return credentials["username"], credentials["password"]
+
+    def set(self, discord_id: int, username: str, password: str) -> None:
+        """Store a user's Habitica credentials."""
+        self._store.set(str(discord_id), json.dumps({"username": username, "password": password}))
+
+    def delete(self, discord_id: int) -> None:
+        """Forget a user's Habitica credentials."""
+        self._store.delete(str(discord_id))
@@ -1,12 +1,104 @@
 """Habitica API manager for async operations."""
 
 import asyncio
-from typing import Any, Dict, Optional, Tuple
+import json
+import logging
+import re
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import aiohttp
 
 from src.pa_square.config import config
-from src.pa_square.habitica.constants import FETCH_TOKEN, TODO_ENDPOINT
+from src.pa_square.habitica.cache import TaskCache
+from src.pa_square.habitica.connection import ConnectionPool, get_default_pool
+from src.pa_square.habitica.constants import (
+    FETCH_TOKEN,
+    SCORE_ENDPOINT,
+    STATUS_ENDPOINT,
+    TAGS_ENDPOINT,
+    TASK_ENDPOINT,
+    TASK_LIST_TYPES,
+    TODO_ENDPOINT,
+)
+from src.pa_square.habitica.credentials import EncryptedStore
+from src.pa_square.habitica.models import Task, decode_tasks, dumps, encode_task, loads
+from src.pa_square.habitica.rate_limiter import (
+    Priority,
+    RequestScheduler,
+    parse_rate_limit_headers,
+)
+from src.pa_square.habitica.retry import CircuitBreaker, CircuitOpenError, RetryPolicy
+from src.pa_square.habitica.singleflight import SingleFlight, freeze
+from src.pa_square.habitica.store import TaskStore
+from src.pa_square.utils.metrics import (
+    HABITICA_ERRORS,
+    HABITICA_QUEUE_SECONDS,
+    HABITICA_RATE_LIMIT_REMAINING,
+    HABITICA_REQUEST_BYTES,
+    HABITICA_REQUEST_SECONDS,
+    HABITICA_RESPONSE_BYTES,
+    HABITICA_RESPONSES,
+)
+
+logger = logging.getLogger(__name__)
+
+# Task, tag and checklist ids in a path, collapsed so metric labels stay bounded
+_PATH_ID = re.compile(r"/[0-9a-fA-F]{8}-[0-9a-fA-F-]{27}(?=/|$)")
+
+# Errors of requests that certainly never reached Habitica: no connection, a 429,
+# the circuit breaker or a missing session refused them before anything was applied
+_NOT_SENT = (
+    "Connection failed",
+    "Rate limited",
+    "Habitica is unavailable",
+    "No header info",
+    "No x_client info",
+)
+# Appended to the error of a write that waits in the outbox
+_QUEUED = "Queued, it will be sent once Habitica is back"
+
+
+def endpoint_label(endpoint: str) -> str:
+    """Normalize an endpoint path for use as a metric label."""
+    return _PATH_ID.sub("/{id}", endpoint)
+
+
+async def check_status(pool: ConnectionPool, base_url: str) -> bool:
+    """
+    Check whether Habitica reports itself as up. Used as the circuit breaker probe.
+    
+    Args:
+        pool: Connection pool to borrow a connection from
+        base_url: Habitica API base URL
+        
+    Returns:
+        True if Habitica answered with status "up"
+    """
+    session = pool.create_session()
+    try:
+        async with session.get(f"{base_url}{STATUS_ENDPOINT}") as response:
+            if response.status != 200:
+                return False
+            body = await response.json()
+            return body.get("data", {}).get("status") == "up"
+    except (aiohttp.ClientError, asyncio.TimeoutError):
+        return False
+    finally:
+        await session.close()
+
+
+@dataclass
+class BulkResult:
+    """Outcome of one task in a bulk operation."""
+    
+    index: int
+    ok: bool
+    task: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    queued: bool = False
 
 
 class HabiticaManager:
@@ -19,16 +111,62 @@ class HabiticaManager:
     - For automated scripts that run in the background, include a delay of 30 seconds
       between API calls. This includes POST, PUT, and GET calls.
     - All API calls must include an "x-client" header.
+    
+    Every call goes through a RequestScheduler, which enforces the rate limit
+    reported by Habitica and serves interactive commands before background work.
+    Sessions borrow connections from a shared ConnectionPool so requests reuse
+    warm keep-alive connections instead of repeating TLS handshakes. Task lists
+    are decoded into slotted Task models (with orjson when it is installed),
+    read through a TaskCache and revalidated with If-None-Match. Concurrent
+    identical reads and logins are coalesced into a single in-flight call.
+    Failed calls are retried according to a RetryPolicy, and a CircuitBreaker
+    fails fast while Habitica is down. API tokens are persisted to an optional
+    encrypted token store and refreshed transparently when Habitica answers 401.
+    With a TaskStore, fetched lists are kept in SQLite and served from there
+    while Habitica is unreachable, and writes go through a durable outbox that
+    is flushed in the background lane once Habitica is back. Scores, updates
+    and deletions are applied to the cached task optimistically and rolled
+    back if Habitica rejects them.
     """
     
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        scheduler: Optional[RequestScheduler] = None,
+        pool: Optional[ConnectionPool] = None,
+        cache: Optional[TaskCache] = None,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        token_store: Optional[EncryptedStore] = None,
+        store: Optional[TaskStore] = None,
+        token_key: Optional[str] = None,
+    ) -> None:
         self.session: Optional[aiohttp.ClientSession] = None
         self.token: Optional[str] = None
-        self.username: str = config.HABITICA_USER
+        self.username: str = username or config.HABITICA_USER
+        self._password: str = password if password is not None else config.HABITICA_PW
         self.user_id: Optional[str] = None
         self.x_client: Optional[str] = None
         self.headers: Optional[Dict[str, str]] = None
         self.base_url: str = config.HABITICA_BASE_URL
+        self.scheduler: RequestScheduler = scheduler or RequestScheduler.from_config()
+        self.pool: ConnectionPool = pool or get_default_pool()
+        self.cache: TaskCache = cache if cache is not None else TaskCache.from_config()
+        self._flights = SingleFlight()
+        self.token_store: Optional[EncryptedStore] = token_store
+        # Managers of linked accounts key their token by Discord user too, so nobody
+        # gets another user's token by linking their username with any password
+        self.token_key: Optional[str] = token_key
+        self._login_status: Optional[int] = None
+        # Whether Habitica ever accepted this manager's credentials
+        self._authenticated = False
+        self.retry_policy: RetryPolicy = retry_policy or RetryPolicy.from_config()
+        self.breaker: CircuitBreaker = breaker or CircuitBreaker.from_config(
+            probe=lambda: check_status(self.pool, self.base_url)
+        )
+        self.store: Optional[TaskStore] = store
+        self._writes_in_flight: set = set()
     
     def get_username(self) -> str:
         """Get current user's Habitica username."""
@@ -59,13 +197,13 @@ class HabiticaManager:
             elif not self.x_client:
                 return 404, "No x_client info available"
             else:
-                self.session = aiohttp.ClientSession(headers=self.headers)
+                self.session = self.pool.create_session()
                 return 200, "Session created"
         else:
             return 100, "Session already active"
     
     async def close_session(self) -> None:
-        """Close and clean up the session."""
+        """Close and clean up the session. Pooled connections stay open for reuse."""
         if self.session and not self.session.closed:
             await self.session.close()
     
@@ -73,7 +211,8 @@ class HabiticaManager:
         self,
         endpoint: str,
         method: str = "GET",
-        data: Optional[Dict[str, Any]] = None
+        data: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = None,
+        lane: Priority = Priority.INTERACTIVE,
     ) -> Any:
         """
         Make async request to Habitica API.
@@ -81,69 +220,327 @@ class HabiticaManager:
         Args:
             endpoint: API endpoint path
             method: HTTP method (GET, POST, etc.)
-            data: Optional data payload
+            data: Optional data payload, a list of task bodies is accepted for bulk POSTs
+            lane: Scheduling lane, background automation should use Priority.BACKGROUND
             
         Returns:
             API response or tuple of (None, error_message)
         """
+        not_ready = await self._prepare()
+        if not_ready is not None:
+            return not_ready
+        
+        if method == "GET":
+            key = (method, endpoint, freeze(data), lane)
+            return await self._flights.do(key, lambda: self._call(endpoint, method, data, lane))
+        return await self._call(endpoint, method, data, lane)
+    
+    async def _call(self, endpoint: str, method: str, data: Any, lane: Priority) -> Any:
+        """Send a request and map the outcome onto the (None, error_message) convention."""
+        try:
+            status, payload, _ = await self._send_with_retry(endpoint, method, data, lane)
+        except CircuitOpenError as e:
+            return None, str(e)
+        except aiohttp.ClientConnectorError as e:
+            return None, f"Connection failed: {str(e)}"
+        except aiohttp.ClientError as e:
+            return None, f"Request failed: {str(e)}"
+        except asyncio.TimeoutError:
+            return None, "Request timed out"
+        return self._result(method, status, payload)
+    
+    async def _prepare(self) -> Optional[Tuple[Optional[int], str]]:
+        """
+        Make sure a session and token exist before sending a request.
+        
+        Tokens are restored from the token store when possible, so a restart
+        does not need a login round trip.
+        
+        Returns:
+            None when ready, (None, error_message) if the login failed or Habitica
+            rejected it, otherwise the (status_code, message) from ensure_session
+        """
+        if self.token is None or self.user_id is None:
+            if not self._load_token():
+                try:
+                    await self.fetch_token()
+                except CircuitOpenError as e:
+                    return None, str(e)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    # The request itself was never sent, so writes may safely be replayed
+                    return None, f"Connection failed: {str(e) or 'login timed out'}"
+                if self.token is None and self._login_status == 401:
+                    return None, "Unauthorized: 401"
+        
         active_session = self.ensure_session()
         if active_session[0] not in (200, 100):
             return active_session
+        return None
+    
+    def _set_token(self, token: str, user_id: str) -> None:
+        """Install an API token and build the auth headers from it."""
+        self.token = token
+        self.user_id = user_id
+        self._authenticated = True
+        self.set_x_client(f"{user_id}-PAPA")
+        self.headers = {
+            "x-client": self.x_client,
+            "x-api-user": self.user_id,
+            "x-api-key": self.token,
+        }
+    
+    def _load_token(self) -> bool:
+        """
+        Restore a previously issued token from the token store.
         
-        if self.token is None or self.user_id is None:
+        Returns:
+            True if a token was restored and no login is needed
+        """
+        if self.token_store is None:
+            return False
+        stored = self.token_store.get(self.account_key())
+        if stored is None:
+            return False
+        credentials = json.loads(stored)
+        self._set_token(credentials["token"], credentials["user_id"])
+        return True
+    
+    async def _reauthenticate(self, rejected_token: Optional[str]) -> bool:
+        """
+        Replace a token Habitica rejected with a fresh one.
+        
+        Concurrent callers that saw the same rejected token share one login.
+        
+        Args:
+            rejected_token: Token that was sent with the 401 response
+            
+        Returns:
+            True if a different, fresh token is now installed
+        """
+        if self.token == rejected_token:
+            self.token = None
+            if self.token_store is not None:
+                self.token_store.delete(self.account_key())
             await self.fetch_token()
+        return self.token is not None and self.token != rejected_token
+    
+    async def _send_with_retry(
+        self,
+        endpoint: str,
+        method: str,
+        data: Any,
+        lane: Priority,
+        extra_headers: Optional[Dict[str, str]] = None,
+        reauthenticate: bool = True,
+    ) -> Tuple[int, Any, Any]:
+        """
+        Send a request through the circuit breaker, retrying per the retry policy.
+        
+        A 401 triggers one transparent re-login followed by a replay of the request.
+        
+        Args:
+            endpoint: API endpoint path
+            method: HTTP method
+            data: Query parameters for GET, JSON body otherwise
+            lane: Scheduling lane
+            extra_headers: Headers added on top of the auth headers
+            reauthenticate: Whether to log in again on a 401, False for the login itself
+            
+        Returns:
+            Tuple of (status, decoded JSON body or None, response headers) of the last attempt
+            
+        Raises:
+            CircuitOpenError: If Habitica is considered down
+            aiohttp.ClientError: If the last attempt failed without a response
+            asyncio.TimeoutError: If the last attempt timed out
+        """
+        attempt = 0
+        reauthenticated = not reauthenticate
+        while True:
+            if not self.breaker.allow():
+                raise CircuitOpenError("Habitica is unavailable, try again later")
+            
+            sent_token = self.token
+            try:
+                status, payload, headers = await self._send(
+                    endpoint, method, data, lane, extra_headers
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                self.breaker.record_failure()
+                delay = None
+                if self.retry_policy.should_retry(method, attempt, error=error):
+                    delay = self.retry_policy.backoff(attempt)
+                if delay is None:
+                    raise
+            else:
+                if status >= 500 or status == 408:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                if status < 400:
+                    self._authenticated = True
+                
+                # An expired or rotated key: log in again and replay the request once
+                if status == 401 and not reauthenticated:
+                    reauthenticated = True
+                    if await self._reauthenticate(sent_token):
+                        continue
+                
+                delay = None
+                if self.retry_policy.should_retry(method, attempt, status=status):
+                    retry_after = None
+                    if status in (429, 503):
+                        _, retry_after = parse_rate_limit_headers(headers)
+                    delay = self.retry_policy.backoff(attempt, retry_after)
+                if delay is None:
+                    return status, payload, headers
+            
+            attempt += 1
+            await asyncio.sleep(delay)
+    
+    async def _send(
+        self,
+        endpoint: str,
+        method: str,
+        data: Any,
+        lane: Priority,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> Tuple[int, Any, Any]:
+        """
+        Send a single scheduled request.
         
+        Args:
+            endpoint: API endpoint path
+            method: HTTP method
+            data: Query parameters for GET, JSON body otherwise
+            lane: Scheduling lane
+            extra_headers: Headers added on top of the auth headers
+            
+        Returns:
+            Tuple of (status, decoded JSON body or None, response headers)
+        """
         url = f"{self.base_url}{endpoint}"
+        label = endpoint_label(endpoint)
+        headers = self.headers or {}
+        if extra_headers:
+            headers = {**headers, **extra_headers}
+        body = None
+        if method in ("POST", "PUT"):
+            # Serialized here rather than by aiohttp so the size sent can be recorded
+            body = dumps(data).encode()
+            headers = {**headers, "Content-Type": "application/json"}
+            HABITICA_REQUEST_BYTES.inc(len(body), endpoint=label)
+        queued_at = time.perf_counter()
+        await self.scheduler.acquire(lane)
+        started_at = time.perf_counter()
+        HABITICA_QUEUE_SECONDS.observe(started_at - queued_at, lane=lane.name.lower())
         
-        try:
-            if method == "GET":
-                async with self.session.get(url, headers=self.headers, params=data) as response:
-                    print(f"Got response from Habitica: {response}")
-                    if response.status == 200:
-                        return await response.json()
-                    elif response.status == 400:
-                        return None, f"Bad Request: {response.status}"
-                    elif response.status == 401:
-                        return None, f"Unauthorized: {response.status}"
-                    else:
-                        return None, f"API Error: {response.status}"
-            
-            elif method == "POST":
-                async with self.session.post(url, headers=self.headers, json=data) as response:
-                    print(f"Got response from Habitica: {response}")
-                    if response.status == 201:
-                        return await response.json()
-                    elif response.status == 400:
-                        return None, f"Bad Request: {response.status}"
-                    elif response.status == 401:
-                        return None, f"Unauthorized: {response.status}"
-                    else:
-                        return None, f"API Error: {response.status}"
+        if method == "GET":
+            request = self.session.get(url, headers=headers, params=data)
+        elif method == "POST":
+            request = self.session.post(url, headers=headers, data=body)
+        elif method == "PUT":
+            request = self.session.put(url, headers=headers, data=body)
+        elif method == "DELETE":
+            request = self.session.delete(url, headers=headers)
+        else:
+            raise ValueError(f"Unsupported method: {method}")
         
-        except aiohttp.ClientError as e:
-            return None, f"Request failed: {str(e)}"
-        except asyncio.TimeoutError:
-            return None, "Request timed out"
+        try:
+            async with request as response:
+                logger.debug("Habitica %s %s -> %s", method, label, response.status)
+                self._observe_rate_limit(response)
+                payload = (
+                    await response.json(loads=loads) if response.status in (200, 201) else None
+                )
+                # The decompressed body json() read, or the error body, read once here
+                received = len(await response.read())
+                self._record_response(method, label, response.status, received, started_at)
+                return response.status, payload, response.headers
+        except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+            HABITICA_ERRORS.inc(method=method, error=type(error).__name__)
+            raise
+    
+    @staticmethod
+    def _record_response(
+        method: str, endpoint: str, status: int, size: int, started_at: float
+    ) -> None:
+        """Record latency, status and body size of a response."""
+        HABITICA_REQUEST_SECONDS.observe(
+            time.perf_counter() - started_at, method=method, endpoint=endpoint
+        )
+        HABITICA_RESPONSES.inc(method=method, endpoint=endpoint, status=status)
+        HABITICA_RESPONSE_BYTES.inc(size, endpoint=endpoint)
+    
+    @staticmethod
+    def _result(method: str, status: int, payload: Any) -> Any:
+        """Map a response status onto the (None, error_message) convention."""
+        # Creating answers 201, everything else (including POST .../score) answers 200
+        if status == 200 or (status == 201 and method == "POST"):
+            return payload
+        elif status == 400:
+            return None, f"Bad Request: {status}"
+        elif status == 401:
+            return None, f"Unauthorized: {status}"
+        elif status == 404:
+            return None, f"Not Found: {status}"
+        elif status == 429:
+            return None, f"Rate limited: {status}"
+        else:
+            return None, f"API Error: {status}"
+    
+    def _observe_rate_limit(self, response: aiohttp.ClientResponse) -> None:
+        """Feed rate limit headers (and 429 backoff) from a response into the scheduler."""
+        self.scheduler.observe(response.headers)
+        # Linked accounts have their own limits, a shared gauge would flip between them
+        if self.token_key is None:
+            HABITICA_RATE_LIMIT_REMAINING.set(self.scheduler.bucket.tokens)
+        if response.status == 429:
+            _, retry_after = parse_rate_limit_headers(response.headers)
+            self.scheduler.penalize(retry_after)
     
     async def fetch_token(self) -> None:
-        """Fetch a new token from Habitica."""
-        # Ensure we have a session for the login request
+        """Fetch a new token from Habitica. Concurrent callers share one login."""
+        await self._flights.do(("POST", FETCH_TOKEN), self._login)
+    
+    async def _login(self) -> None:
+        """
+        Log in with username and password and store the resulting API token.
+        
+        The login goes through the circuit breaker and retry policy like any
+        other request, so it fails fast while Habitica is down.
+        
+        Raises:
+            CircuitOpenError: If Habitica is considered down
+            aiohttp.ClientError: If the login failed without a response
+            asyncio.TimeoutError: If the login timed out
+        """
+        # Login uses the same pooled session as every other call, auth headers are sent
+        # per request so nothing needs to be rebuilt once the token arrives
         if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
-        
-        body = {"username": self.username, "password": config.HABITICA_PW}
-        async with self.session.post(f"{self.base_url}{FETCH_TOKEN}", json=body) as response:
-            if response.status == 200:
-                response_json = await response.json()
-                login_body = response_json["data"]
-                self.token = login_body["apiToken"]
-                self.user_id = login_body["id"]
-                self.set_x_client(f"{login_body['id']}-PAPA")
-                self.headers = {
-                    "x-client": self.x_client,
-                    "x-api-user": self.user_id,
-                    "x-api-key": self.token,
-                }
+            self.session = self.pool.create_session()
+        
+        body = {"username": self.username, "password": self._password}
+        status, payload, _ = await self._send_with_retry(
+            FETCH_TOKEN, "POST", body, Priority.INTERACTIVE, reauthenticate=False
+        )
+        self._login_status = status
+        if status == 200:
+            login_body = payload["data"]
+            self._set_token(login_body["apiToken"], login_body["id"])
+            if self.token_store is not None:
+                self.token_store.set(
+                    self.account_key(),
+                    json.dumps({"token": self.token, "user_id": self.user_id}),
+                )
+    
+    def account_key(self) -> str:
+        """Key of this manager's account in the token store and the outbox."""
+        return self.token_key or self.username
+    
+    def logs_in_as(self, username: str, password: str) -> bool:
+        """Whether this manager logs in with the given credentials."""
+        return (self.username, self._password) == (username, password)
     
     async def create_todo(
         self,
@@ -168,6 +565,7 @@ class HabiticaManager:
         up: bool = True,
         down: bool = False,
         value: float = 0.0,
+        lane: Priority = Priority.INTERACTIVE,
     ) -> Any:
         """
         Create a to-do task item in Habitica.
@@ -200,8 +598,415 @@ class HabiticaManager:
             :param text: The text to be displayed for the task
             :param alias: Alias to assign to task
             :param tags: Array of UUIDs of tags
+            :param lane: Scheduling lane for the request
+        """
+        body = self._task_body(
+            text,
+            task_type,
+            tags=tags,
+            alias=alias,
+            attribute=attribute,
+            checklist=checklist,
+            collapse_checklist=collapse_checklist,
+            notes=notes,
+            date=date,
+            priority=priority,
+            reminders=reminders,
+            frequency=frequency,
+            repeat=repeat,
+            every_x=every_x,
+            streak=streak,
+            days_of_month=days_of_month,
+            weeks_of_month=weeks_of_month,
+            start_date=start_date,
+            up=up,
+            down=down,
+            value=value,
+        )
+        result = await self._write(TODO_ENDPOINT, "POST", body, lane)
+        if isinstance(result, dict) and isinstance(result.get("data"), dict):
+            await self._write_through(result["data"])
+        return result
+    
+    async def _write(self, endpoint: str, method: str, body: Any, lane: Priority) -> Any:
+        """Send a write, through the outbox when a TaskStore is configured."""
+        if self.store is None:
+            return await self.habitica_request(endpoint, method=method, data=body, lane=lane)
+        return await self._write_behind(endpoint, method, body, lane)
+    
+    async def _write_behind(self, endpoint: str, method: str, body: Any, lane: Priority) -> Any:
+        """
+        Queue a write durably, then try to deliver it right away.
+        
+        If Habitica can't be reached the write stays queued for flush_outbox.
+        A POST (creating or scoring a task) stays queued only if it certainly
+        never reached Habitica, since replaying one that did would create a
+        duplicate todo or score a task twice.
+        
+        Returns:
+            API response, or (None, error_message) noting whether the write is still queued
+        """
+        seq = await self.store.enqueue(self.account_key(), method, endpoint, body)
+        self._writes_in_flight.add(seq)
+        try:
+            result = await self.habitica_request(endpoint, method=method, data=body, lane=lane)
+        finally:
+            self._writes_in_flight.discard(seq)
+        
+        if isinstance(result, dict) or not self._is_transient(result, method):
+            await self.store.ack(seq)
+            return result
+        await self.store.retry_later(seq)
+        return None, f"{result[1]}. {_QUEUED}"
+    
+    def _is_transient(self, result: Any, method: str) -> bool:
+        """
+        Whether a failed write may be replayed later.
+        
+        Idempotent writes are replayed unless Habitica rejected them outright.
+        Other writes only if they certainly never reached Habitica.
+        
+        Args:
+            result: Error result of the write
+            method: HTTP method of the write
+        """
+        message = str(result[1]) if isinstance(result, tuple) else ""
+        if method not in self.retry_policy.idempotent_methods:
+            return message.startswith(_NOT_SENT)
+        return not message.startswith(("Bad Request", "Unauthorized", "Not Found"))
+    
+    async def flush_outbox(self, limit: int = 50, settled_before: Optional[float] = None) -> int:
+        """
+        Send queued writes in order, in the background lane.
+        
+        Stops at the first write that still can't be delivered. Writes Habitica
+        rejects outright are dropped.
+        
+        Args:
+            limit: Maximum writes to send in one pass
+            settled_before: Skip writes queued after this time (epoch seconds) and
+                never attempted, which another process may still be sending
+            
+        Returns:
+            Number of writes delivered
+        """
+        if self.store is None:
+            return 0
+        delivered = 0
+        for entry in await self.store.pending(self.account_key(), limit, settled_before):
+            if entry.seq in self._writes_in_flight:
+                continue
+            self._writes_in_flight.add(entry.seq)
+            try:
+                result = await self.habitica_request(
+                    entry.endpoint, method=entry.method, data=entry.body, lane=Priority.BACKGROUND
+                )
+            finally:
+                self._writes_in_flight.discard(entry.seq)
+            
+            if isinstance(result, dict):
+                await self.store.ack(entry.seq)
+                delivered += 1
+                if entry.method == "POST" and entry.endpoint == TODO_ENDPOINT:
+                    created = result.get("data")
+                    # Bulk creates answer with a list of tasks
+                    for task in created if isinstance(created, list) else [created]:
+                        if isinstance(task, dict):
+                            await self._write_through(task)
+            elif self._is_transient(result, entry.method):
+                await self.store.retry_later(entry.seq)
+                break
+            else:
+                logger.warning(
+                    "Dropping queued %s %s for %s: %s",
+                    entry.method, entry.endpoint, entry.user, result[1],
+                )
+                await self.store.ack(entry.seq)
+        return delivered
+    
+    async def create_todos_bulk(
+        self,
+        specs: Iterable[Dict[str, Any]],
+        chunk_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        lane: Priority = Priority.INTERACTIVE,
+    ) -> List[BulkResult]:
+        """
+        Create many tasks in as few round trips as possible.
+        
+        Tasks are sent as array bodies to POST /tasks/user, ``chunk_size`` at a
+        time. Habitica validates an array body as a whole, so if a chunk is
+        rejected with a 400 its tasks are retried one by one, at most
+        ``concurrency`` at a time, to find out which ones are invalid. Like
+        create_todo, chunks go through the outbox when a TaskStore is
+        configured; tasks that are queued until Habitica is back are marked
+        ``queued``.
+        
+        Args:
+            specs: Keyword arguments for create_todo, one dict per task. "task_type"
+                defaults to "todo"
+            chunk_size: Tasks per array request
+            concurrency: Maximum single-task requests in flight during fallback
+            lane: Scheduling lane for the requests
+            
+        Returns:
+            One BulkResult per spec, in input order
+        """
+        chunk_size = chunk_size or config.HABITICA_BULK_CHUNK_SIZE
+        concurrency = concurrency or config.HABITICA_BULK_CONCURRENCY
+        # Never run more requests at once than the rate limiter can release in one burst
+        semaphore = asyncio.Semaphore(max(1, min(concurrency, int(self.scheduler.bucket.capacity))))
+        
+        bodies = [self._task_body(**{"task_type": "todo", **spec}) for spec in specs]
+        results: List[BulkResult] = []
+        for start in range(0, len(bodies), chunk_size):
+            chunk = bodies[start:start + chunk_size]
+            response = await self._write(TODO_ENDPOINT, "POST", chunk, lane)
+            
+            if isinstance(response, dict):
+                tasks = response.get("data")
+                if isinstance(tasks, dict):
+                    tasks = [tasks]
+                for offset, task in enumerate(tasks or []):
+                    await self._write_through(task)
+                    results.append(BulkResult(start + offset, True, task=task))
+            elif str(response[1]).startswith("Bad Request"):
+                results.extend(await asyncio.gather(*(
+                    self._create_one(start + offset, body, semaphore, lane)
+                    for offset, body in enumerate(chunk)
+                )))
+            else:
+                queued = not self._rejected(response)
+                results.extend(
+                    BulkResult(start + offset, False, error=response[1], queued=queued)
+                    for offset in range(len(chunk))
+                )
+        return results
+    
+    async def _create_one(
+        self, index: int, body: Dict[str, Any], semaphore: asyncio.Semaphore, lane: Priority
+    ) -> BulkResult:
+        """Create a single task from a prepared body as part of a bulk fallback."""
+        async with semaphore:
+            response = await self._write(TODO_ENDPOINT, "POST", body, lane)
+        if isinstance(response, dict) and isinstance(response.get("data"), dict):
+            await self._write_through(response["data"])
+            return BulkResult(index, True, task=response["data"])
+        if not response:
+            return BulkResult(index, False, error="No response")
+        return BulkResult(index, False, error=response[1], queued=not self._rejected(response))
+    
+    async def _write_through(self, created: Dict[str, Any]) -> None:
+        """Add a created task to the cached and stored list of its type."""
+        task = Task.from_dict(created)
+        list_type = TASK_LIST_TYPES.get(task.type, task.type)
+        self.cache.add_task(self.cache_key(list_type), task)
+        if self.store is not None:
+            await self.store.add_task(self.username, task)
+    
+    @staticmethod
+    def is_queued(result: Any) -> bool:
+        """Whether a write result means the write is waiting in the outbox."""
+        return isinstance(result, tuple) and str(result[1]).endswith(_QUEUED)
+    
+    def _rejected(self, result: Any) -> bool:
+        """Whether a write failed for good, as opposed to succeeding or waiting in the outbox."""
+        return isinstance(result, tuple) and not self.is_queued(result)
+    
+    async def score_task(
+        self, task_id: str, direction: str = "up", lane: Priority = Priority.INTERACTIVE
+    ) -> Any:
+        """
+        Score a task: "up" completes a todo or daily, "down" reopens it.
+        
+        The cached task is updated before the request is sent and rolled back
+        if Habitica rejects the score. Once Habitica confirms, a completed todo
+        leaves the cached todo list, as it does on Habitica.
+        
+        Args:
+            task_id: Task id
+            direction: "up" or "down"
+            lane: Scheduling lane for the request
+            
+        Returns:
+            API response with the user's new stats, or tuple of (None, error_message)
+        """
+        return await self._score(task_id, direction, lane, None)
+    
+    async def score_tasks(
+        self,
+        task_ids: Iterable[str],
+        direction: str = "up",
+        concurrency: Optional[int] = None,
+        lane: Priority = Priority.INTERACTIVE,
+    ) -> List[BulkResult]:
         """
-        body = {
+        Score many tasks, all optimistic updates at once and the requests pipelined.
+        
+        Args:
+            task_ids: Task ids
+            direction: "up" or "down"
+            concurrency: Maximum requests in flight
+            lane: Scheduling lane for the requests
+            
+        Returns:
+            One BulkResult per task id, in input order. Scores waiting in the
+            outbox are marked ``queued``
+        """
+        concurrency = concurrency or config.HABITICA_BULK_CONCURRENCY
+        semaphore = asyncio.Semaphore(max(1, min(concurrency, int(self.scheduler.bucket.capacity))))
+        results = await asyncio.gather(*(
+            self._score(task_id, direction, lane, semaphore) for task_id in task_ids
+        ))
+        return [
+            BulkResult(index, True) if isinstance(result, dict)
+            else BulkResult(index, False, error=result[1], queued=not self._rejected(result))
+            for index, result in enumerate(results)
+        ]
+    
+    async def _score(
+        self,
+        task_id: str,
+        direction: str,
+        lane: Priority,
+        semaphore: Optional[asyncio.Semaphore],
+    ) -> Any:
+        """
+        Score a task with an optimistic cache update, see score_task.
+        
+        Args:
+            task_id: Task id
+            direction: "up" or "down"
+            lane: Scheduling lane for the request
+            semaphore: Optional semaphore bounding the requests in flight
+            
+        Returns:
+            API response, or tuple of (None, error_message)
+        """
+        found = self.cache.find_task(self.cache_key("todos")[0], task_id)
+        previous = found[2] if found is not None else None
+        if previous is not None and previous.type in ("todo", "daily"):
+            self.cache.replace_task(found[0], replace(previous, completed=direction == "up"))
+        
+        endpoint = SCORE_ENDPOINT.format(task_id=task_id, direction=direction)
+        if semaphore is None:
+            result = await self._write(endpoint, "POST", None, lane)
+        else:
+            async with semaphore:
+                result = await self._write(endpoint, "POST", None, lane)
+        
+        if previous is None:
+            return result
+        if self._rejected(result):
+            self.cache.replace_task(found[0], previous)
+        elif isinstance(result, dict) and previous.type in ("todo", "daily"):
+            scored = replace(previous, completed=direction == "up")
+            if scored.type == "todo" and scored.completed:
+                self.cache.remove_task(found[0], task_id)
+            if self.store is not None:
+                await self.store.add_task(self.username, scored)
+        return result
+    
+    async def update_task(
+        self,
+        task_id: str,
+        text: Optional[str] = None,
+        notes: Optional[str] = None,
+        date: Optional[str] = None,
+        priority: Optional[float] = None,
+        lane: Priority = Priority.INTERACTIVE,
+    ) -> Any:
+        """
+        Change a task's text, notes, due date or difficulty. Unset arguments are left alone.
+        
+        The cached task is changed before the request is sent, replaced by the
+        version Habitica returns, or rolled back if Habitica rejects the update.
+        
+        Args:
+            task_id: Task id
+            text: New title
+            notes: New notes
+            date: New due date, ISO format
+            priority: New difficulty, 0.1, 1, 1.5 or 2
+            lane: Scheduling lane for the request
+            
+        Returns:
+            API response with the updated task, or tuple of (None, error_message)
+        """
+        changes = {
+            name: value
+            for name, value in (("text", text), ("notes", notes), ("date", date),
+                                ("priority", priority))
+            if value is not None
+        }
+        found = self.cache.find_task(self.cache_key("todos")[0], task_id)
+        if found is not None:
+            self.cache.replace_task(found[0], replace(found[2], **changes))
+        
+        result = await self._write(TASK_ENDPOINT.format(task_id=task_id), "PUT", changes, lane)
+        
+        if found is not None and self._rejected(result):
+            self.cache.replace_task(found[0], found[2])
+        elif isinstance(result, dict) and isinstance(result.get("data"), dict):
+            task = Task.from_dict(result["data"])
+            if found is not None:
+                self.cache.replace_task(found[0], task)
+            if self.store is not None:
+                await self.store.add_task(self.username, task)
+        return result
+    
+    async def delete_task(self, task_id: str, lane: Priority = Priority.INTERACTIVE) -> Any:
+        """
+        Delete a task.
+        
+        The task leaves the cached list before the request is sent and is put
+        back if Habitica rejects the deletion.
+        
+        Args:
+            task_id: Task id
+            lane: Scheduling lane for the request
+            
+        Returns:
+            API response, or tuple of (None, error_message)
+        """
+        found = self.cache.find_task(self.cache_key("todos")[0], task_id)
+        if found is not None:
+            self.cache.remove_task(found[0], task_id)
+        
+        result = await self._write(TASK_ENDPOINT.format(task_id=task_id), "DELETE", None, lane)
+        
+        if found is not None and self._rejected(result):
+            self.cache.insert_task(found[0], found[1], found[2])
+        elif isinstance(result, dict) and self.store is not None:
+            await self.store.delete_tasks(self.username, [task_id])
+        return result
+    
+    @staticmethod
+    def _task_body(
+        text: str,
+        task_type: str,
+        tags: Optional[list] = None,
+        alias: Optional[str] = None,
+        attribute: Optional[str] = None,
+        checklist: Optional[list] = None,
+        collapse_checklist: bool = False,
+        notes: Optional[str] = None,
+        date: Optional[str] = None,
+        priority: float = 1.0,
+        reminders: Optional[list] = None,
+        frequency: str = "daily",
+        repeat: Optional[Dict] = None,
+        every_x: int = 1,
+        streak: int = 0,
+        days_of_month: Optional[list] = None,
+        weeks_of_month: Optional[list] = None,
+        start_date: Optional[str] = None,
+        up: bool = True,
+        down: bool = False,
+        value: float = 0.0,
+    ) -> Dict[str, Any]:
+        """Build the JSON body for a new task. See create_todo for the arguments."""
+        return encode_task({
             "text": text,
             "type": task_type,
             "tags": tags or [],
@@ -223,18 +1028,162 @@ class HabiticaManager:
             "up": up,
             "down": down,
             "value": value,
-        }
-        return await self.habitica_request(TODO_ENDPOINT, method="POST", data=body)
+        })
     
-    async def get_todos(self, task_type: str = "todos") -> Any:
+    async def get_todos(
+        self, task_type: str = "todos", lane: Priority = Priority.INTERACTIVE
+    ) -> Any:
         """
         Get todos from Habitica.
         
+        Fresh cached lists are returned without a network call. Stale ones are
+        revalidated with If-None-Match so an unchanged list costs a 304 only.
+        When Habitica can't be reached, the list last stored in the TaskStore is
+        returned with ``"offline": True``, provided Habitica accepted this
+        manager's credentials at some point.
+        
         Args:
             task_type: Type of tasks to retrieve
+            lane: Scheduling lane for the request
             
         Returns:
             API response with todos
         """
-        params = {"type": task_type}
-        return await self.habitica_request(TODO_ENDPOINT, method="GET", data=params)
+        cached = self.cache.get(self.cache_key(task_type))
+        if cached is not None:
+            return cached.data
+        
+        key = ("GET", TODO_ENDPOINT, freeze({"type": task_type}), lane)
+        result = await self._flights.do(key, lambda: self._fetch_todos(task_type, lane))
+        if isinstance(result, tuple) and self.store is not None and self._authenticated:
+            tasks = await self.store.get_tasks(self.username, task_type)
+            if tasks is not None:
+                return {"success": True, "data": tasks, "offline": True}
+        return result
+    
+    async def _fetch_todos(self, task_type: str, lane: Priority) -> Any:
+        """Fetch a task list from Habitica, revalidating any stale cached copy."""
+        not_ready = await self._prepare()
+        if not_ready is not None:
+            return not_ready
+        
+        # The key may change once fetch_token has resolved the user id
+        key = self.cache_key(task_type)
+        stale = self.cache.peek(key)
+        extra_headers = {"If-None-Match": stale.etag} if stale and stale.etag else None
+        
+        try:
+            status, payload, headers = await self._send_with_retry(
+                TODO_ENDPOINT, "GET", {"type": task_type}, lane, extra_headers
+            )
+        except CircuitOpenError as e:
+            return None, str(e)
+        except aiohttp.ClientError as e:
+            return None, f"Request failed: {str(e)}"
+        except asyncio.TimeoutError:
+            return None, "Request timed out"
+        
+        if status == 304 and stale is not None:
+            self.cache.revalidated(key)
+            return stale.data
+        if status == 200:
+            payload = self._decode_list(payload)
+            etag = headers.get("ETag") if isinstance(headers, Mapping) else None
+            self.cache.put(key, payload, etag)
+            if self.store is not None and isinstance(payload, dict):
+                await self.store.replace_tasks(self.username, task_type, payload.get("data") or [])
+        return self._result("GET", status, payload)
+    
+    @staticmethod
+    def _decode_list(payload: Any) -> Any:
+        """Replace the raw task dicts of a list response with Task models."""
+        if isinstance(payload, dict) and isinstance(payload.get("data"), list):
+            payload["data"] = decode_tasks(payload["data"])
+        return payload
+    
+    async def sync_tasks(self, task_type: str = "todos") -> Any:
+        """
+        Refresh a cached task list in the background lane, applying only what changed.
+        
+        The list is revalidated with If-None-Match, so an unchanged list costs
+        a 304. A changed list is diffed against the cached one by task id and
+        ``updatedAt``: unchanged task objects are kept, and only new, changed
+        and removed tasks are written to the TaskStore.
+        
+        Args:
+            task_type: Type of tasks to refresh
+            
+        Returns:
+            Number of new, changed or removed tasks, or tuple of (None, error_message)
+        """
+        not_ready = await self._prepare()
+        if not_ready is not None:
+            return not_ready
+        
+        key = self.cache_key(task_type)
+        stale = self.cache.peek(key)
+        extra_headers = {"If-None-Match": stale.etag} if stale and stale.etag else None
+        
+        try:
+            status, payload, headers = await self._send_with_retry(
+                TODO_ENDPOINT, "GET", {"type": task_type}, Priority.BACKGROUND, extra_headers
+            )
+        except CircuitOpenError as e:
+            return None, str(e)
+        except aiohttp.ClientError as e:
+            return None, f"Request failed: {str(e)}"
+        except asyncio.TimeoutError:
+            return None, "Request timed out"
+        
+        if status == 304 and stale is not None:
+            self.cache.revalidated(key)
+            return 0
+        if status != 200 or not isinstance(payload, dict):
+            return self._result("GET", status, payload)
+        
+        payload = self._decode_list(payload)
+        tasks = payload.get("data") or []
+        etag = headers.get("ETag") if isinstance(headers, Mapping) else None
+        if stale is None or not isinstance(stale.data, dict):
+            self.cache.put(key, payload, etag)
+            if self.store is not None:
+                await self.store.replace_tasks(self.username, task_type, tasks)
+            return len(tasks)
+        
+        changed, removed = self.cache.merge(key, tasks, etag)
+        if self.store is not None:
+            for task in changed:
+                await self.store.add_task(self.username, task)
+            await self.store.delete_tasks(self.username, removed)
+        return len(changed) + len(removed)
+    
+    async def get_tags(self, lane: Priority = Priority.INTERACTIVE) -> Any:
+        """
+        Get the user's tags, cached like task lists.
+        
+        Args:
+            lane: Scheduling lane for the request
+            
+        Returns:
+            API response with tags
+        """
+        key = self.cache_key("tags")
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached.data
+        result = await self.habitica_request(TAGS_ENDPOINT, method="GET", lane=lane)
+        if isinstance(result, dict):
+            self.cache.put(self.cache_key("tags"), result)
+        return result
+    
+    def cache_key(self, task_type: str) -> Tuple[str, str]:
+        """
+        Build the task cache key for this manager's user.
+        
+        Args:
+            task_type: Task list, e.g. "todos"
+            
+        Returns:
+            Key of the list in the shared task cache
+        """
+        return self.user_id or self.username, task_type
@@ -0,0 +1,186 @@
+"""Typed Habitica task models, per-type request encoders and the JSON backend."""
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    JSON_BACKEND = "orjson"
+    loads: Callable[[Any], Any] = orjson.loads
+
+    def dumps(obj: Any) -> str:
+        """Serialize to a compact JSON string."""
+        return orjson.dumps(obj).decode()
+else:
+    JSON_BACKEND = "json"
+    loads = json.loads
+
+    def dumps(obj: Any) -> str:
+        """Serialize to a compact JSON string."""
+        return json.dumps(obj, separators=(",", ":"))
+
+
+@dataclass(slots=True)
+class ChecklistItem:
+    """One item of a task's checklist."""
+
+    text: str
+    completed: bool = False
+    id: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ChecklistItem":
+        """Decode a checklist item from the API."""
+        return cls(data.get("text") or "", bool(data.get("completed")), data.get("id"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Encode as the API represents it."""
+        item: Dict[str, Any] = {"text": self.text, "completed": self.completed}
+        if self.id is not None:
+            item["id"] = self.id
+        return item
+
+
+@dataclass(slots=True)
+class TaskReminder:
+    """A reminder time set on a task."""
+
+    time: str
+    id: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TaskReminder":
+        """Decode a reminder from the API."""
+        return cls(data.get("time") or "", data.get("id"))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Encode as the API represents it."""
+        reminder: Dict[str, Any] = {"time": self.time}
+        if self.id is not None:
+            reminder["id"] = self.id
+        return reminder
+
+
+@dataclass(slots=True)
+class Task:
+    """
+    A Habitica task, keeping only the fields the bot uses.
+
+    Args:
+        id: Task id
+        type: "habit", "daily", "todo" or "reward"
+        text: Task title
+        notes: Extra notes
+        date: Due date of a todo, as an ISO string
+        completed: Whether a todo or daily is done
+        priority: Difficulty, 0.1 to 2
+        value: Task value, the price of a reward
+        tags: Tag ids
+        checklist: Checklist items
+        reminders: Reminder times
+        updated_at: Last modification time, used to diff lists
+        alias: User-defined alias
+    """
+
+    id: str
+    type: str = "todo"
+    text: str = ""
+    notes: str = ""
+    date: Optional[str] = None
+    completed: bool = False
+    priority: float = 1.0
+    value: float = 0.0
+    tags: List[str] = field(default_factory=list)
+    checklist: List[ChecklistItem] = field(default_factory=list)
+    reminders: List[TaskReminder] = field(default_factory=list)
+    updated_at: Optional[str] = None
+    alias: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Task":
+        """Decode a task from the API, ignoring fields the bot doesn't use."""
+        return cls(
+            id=data.get("id") or data.get("_id") or "",
+            type=data.get("type") or "todo",
+            text=data.get("text") or "",
+            notes=data.get("notes") or "",
+            date=data.get("date") or None,
+            completed=bool(data.get("completed")),
+            priority=data.get("priority", 1.0),
+            value=data.get("value", 0.0),
+            tags=list(data.get("tags") or ()),
+            checklist=[ChecklistItem.from_dict(item) for item in data.get("checklist") or ()],
+            reminders=[TaskReminder.from_dict(item) for item in data.get("reminders") or ()],
+            updated_at=data.get("updatedAt"),
+            alias=data.get("alias"),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Encode as the API represents it."""
+        return {
+            "id": self.id,
+            "type": self.type,
+            "text": self.text,
+            "notes": self.notes,
+            "date": self.date,
+            "completed": self.completed,
+            "priority": self.priority,
+            "value": self.value,
+            "tags": self.tags,
+            "checklist": [item.to_dict() for item in self.checklist],
+            "reminders": [reminder.to_dict() for reminder in self.reminders],
+            "updatedAt": self.updated_at,
+            "alias": self.alias,
+        }
+
+
+def decode_tasks(items: Iterable[Dict[str, Any]]) -> List[Task]:
+    """Decode a task list from the API."""
+    return [Task.from_dict(item) for item in items]
+
+
+# Body fields Habitica reads per task type when creating a task
+_COMMON_FIELDS = ("text", "type", "tags", "alias", "attribute", "notes", "priority")
+TASK_FIELDS = {
+    "habit": _COMMON_FIELDS + ("up", "down"),
+    "daily": _COMMON_FIELDS + (
+        "checklist", "collapseChecklist", "reminders", "frequency", "repeat", "everyX",
+        "streak", "daysOfMonth", "weeksOfMonth", "startDate",
+    ),
+    "todo": _COMMON_FIELDS + ("checklist", "collapseChecklist", "reminders", "date"),
+    "reward": _COMMON_FIELDS + ("value",),
+}
+
+# Values Habitica fills in by itself, not worth sending
+_SERVER_DEFAULTS = {"priority": 1, "collapseChecklist": False, "everyX": 1, "streak": 0}
+
+
+def encode_task(body: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shrink a task body to the fields that matter for its type.
+
+    Fields of other task types, unset (None or empty) fields and fields equal
+    to Habitica's own defaults are left out. Bodies of unknown types are only
+    stripped of unset fields.
+
+    Args:
+        body: Full task body keyed by API field name, including "type"
+
+    Returns:
+        Request body for POST /tasks/user
+    """
+    names = TASK_FIELDS.get(body.get("type"), body)
+    encoded = {}
+    for name in names:
+        value = body.get(name)
+        if value is None or value == [] or value == {}:
+            continue
+        if name in _SERVER_DEFAULTS and value == _SERVER_DEFAULTS[name]:
+            continue
+        encoded[name] = value
+    return encoded
@@ -0,0 +1,286 @@
+"""Rate limiting and priority scheduling for Habitica API calls."""
+
+import asyncio
+import heapq
+import itertools
+import re
+import time
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from enum import IntEnum
+from typing import Any, Callable, List, Optional, Tuple
+
+from src.pa_square.config import config
+
+
+class Priority(IntEnum):
+    """Scheduling lanes. Lower values are dispatched first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+class TokenBucket:
+    """
+    Token bucket that can be corrected by server-reported rate limit state.
+
+    Args:
+        capacity: Maximum number of tokens (burst size)
+        refill_rate: Tokens added per second
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        capacity: float,
+        refill_rate: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_rate)
+            self._updated = now
+
+    def wait_time(self, min_tokens: float = 1.0) -> float:
+        """
+        Get seconds until at least ``min_tokens`` tokens are available.
+
+        Args:
+            min_tokens: Number of tokens that must be in the bucket
+
+        Returns:
+            Seconds to wait, 0 if the tokens are available now
+        """
+        self._refill()
+        blocked = max(0.0, self._blocked_until - self._clock())
+        if self.tokens >= min_tokens:
+            return blocked
+        return max(blocked, (min_tokens - self.tokens) / self.refill_rate)
+
+    def consume(self) -> None:
+        """Take one token from the bucket."""
+        self._refill()
+        self.tokens -= 1
+
+    def block_for(self, seconds: float) -> None:
+        """Refuse to hand out tokens for the given number of seconds."""
+        self._refill()
+        self.tokens = min(self.tokens, 0.0)
+        self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    def update(self, remaining: Optional[int], reset_in: Optional[float]) -> None:
+        """
+        Align the bucket with the rate limit state reported by the server.
+
+        Args:
+            remaining: Requests the server says are left in the current window
+            reset_in: Seconds until the server's window resets
+        """
+        if remaining is None:
+            return
+        self._refill()
+        self.tokens = min(self.tokens, float(remaining))
+        if remaining <= 0 and reset_in is not None:
+            self.block_for(reset_in)
+
+
+def _parse_reset(value: str) -> Optional[float]:
+    """Convert an ``X-RateLimit-Reset`` value into seconds from now."""
+    value = value.strip()
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is not None:
+        # Large values are epoch timestamps (seconds or milliseconds), small ones are deltas
+        if number > 1e12:
+            return max(0.0, number / 1000 - time.time())
+        if number > 1e9:
+            return max(0.0, number - time.time())
+        return max(0.0, number)
+
+    reset_at: Optional[datetime] = None
+    # Habitica sends a JavaScript Date string: "Tue Oct 17 2026 10:00:00 GMT+0000 (UTC)"
+    js_date = re.sub(r"\s*\(.*\)$", "", value)
+    try:
+        reset_at = datetime.strptime(js_date, "%a %b %d %Y %H:%M:%S GMT%z")
+    except ValueError:
+        try:
+            reset_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if reset_at.tzinfo is None:
+        reset_at = reset_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (reset_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def parse_rate_limit_headers(headers: Any) -> Tuple[Optional[int], Optional[float]]:
+    """
+    Extract rate limit state from Habitica response headers.
+
+    Args:
+        headers: Response headers mapping
+
+    Returns:
+        Tuple of (remaining_requests, seconds_until_reset), either may be None
+    """
+    if not isinstance(headers, Mapping):
+        return None, None
+
+    remaining: Optional[int] = None
+    raw_remaining = headers.get("X-RateLimit-Remaining")
+    if raw_remaining is not None:
+        try:
+            remaining = int(float(raw_remaining))
+        except ValueError:
+            remaining = None
+
+    reset_in: Optional[float] = None
+    raw_reset = headers.get("Retry-After") or headers.get("X-RateLimit-Reset")
+    if raw_reset is not None:
+        reset_in = _parse_reset(str(raw_reset))
+
+    return remaining, reset_in
+
+
+class RequestScheduler:
+    """
+    Hands out permission to call the API in priority order.
+
+    Interactive requests (Discord commands) are dispatched as soon as the token
+    bucket allows. Background requests additionally wait for ``background_delay``
+    seconds since the previous background call, as required by Habitica for
+    automated scripts, and leave ``background_reserve`` tokens untouched so a
+    user typing a command never queues behind automation.
+
+    Args:
+        bucket: Token bucket shared by all lanes
+        background_delay: Minimum seconds between background requests
+        background_reserve: Tokens kept back for interactive requests
+    """
+
+    def __init__(
+        self,
+        bucket: TokenBucket,
+        background_delay: float = 0.0,
+        background_reserve: float = 0.0,
+    ) -> None:
+        self.bucket = bucket
+        self.background_delay = background_delay
+        self.background_reserve = background_reserve
+        self._queue: List[Tuple[int, int, asyncio.Future]] = []
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._pump_task: Optional[asyncio.Task] = None
+        self._last_background: Optional[float] = None
+
+    @classmethod
+    def from_config(cls) -> "RequestScheduler":
+        """Build a scheduler from the application configuration."""
+        bucket = TokenBucket(
+            capacity=config.HABITICA_RATE_LIMIT,
+            refill_rate=config.HABITICA_RATE_LIMIT / config.HABITICA_RATE_WINDOW,
+        )
+        return cls(
+            bucket,
+            background_delay=config.HABITICA_API_DELAY,
+            background_reserve=config.HABITICA_BACKGROUND_RESERVE,
+        )
+
+    @property
+    def pending(self) -> int:
+        """Number of requests waiting for a slot."""
+        return sum(1 for _, _, fut in self._queue if not fut.done())
+
+    def _delay_for(self, priority: Priority) -> float:
+        if priority == Priority.INTERACTIVE:
+            return self.bucket.wait_time()
+
+        delay = self.bucket.wait_time(1.0 + self.background_reserve)
+        if self._last_background is not None:
+            since_last = time.monotonic() - self._last_background
+            delay = max(delay, self.background_delay - since_last)
+        return delay
+
+    def _dispatch(self, priority: Priority) -> None:
+        self.bucket.consume()
+        if priority == Priority.BACKGROUND:
+            self._last_background = time.monotonic()
+
+    def _wake(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        self._wakeup.set()
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE) -> None:
+        """
+        Wait until a request in the given lane may be sent.
+
+        Args:
+            priority: Scheduling lane of the request
+        """
+        head_priority = self._queue[0][0] if self._queue else None
+        if (head_priority is None or head_priority > priority) and self._delay_for(priority) <= 0:
+            self._dispatch(priority)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._counter), future))
+        if self._pump_task is None or self._pump_task.done():
+            self._pump_task = asyncio.create_task(self._pump())
+        self._wake()
+        await future
+
+    def observe(self, headers: Any) -> None:
+        """
+        Feed rate limit headers from a response back into the bucket.
+
+        Args:
+            headers: Response headers mapping
+        """
+        remaining, reset_in = parse_rate_limit_headers(headers)
+        self.bucket.update(remaining, reset_in)
+
+    def penalize(self, retry_after: Optional[float]) -> None:
+        """
+        Back off after a 429 response.
+
+        Args:
+            retry_after: Seconds the server asked us to wait, if provided
+        """
+        if retry_after is None:
+            retry_after = 1 / self.bucket.refill_rate
+        self.bucket.block_for(retry_after)
+
+    async def _pump(self) -> None:
+        while self._queue:
+            priority, _, future = self._queue[0]
+            if future.done():
+                # Waiter was cancelled while queued
+                heapq.heappop(self._queue)
+                continue
+
+            delay = self._delay_for(Priority(priority))
+            if delay <= 0:
+                heapq.heappop(self._queue)
+                self._dispatch(Priority(priority))
+                future.set_result(None)
+                continue
+
+            if self._wakeup is None:
+                self._wakeup = asyncio.Event()
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
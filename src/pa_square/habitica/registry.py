@@ -0,0 +1,312 @@
+"""Per-Discord-user pool of Habitica managers."""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.pa_square.config import config
+from src.pa_square.habitica.cache import TaskCache
+from src.pa_square.habitica.connection import ConnectionPool, get_default_pool
+from src.pa_square.habitica.credentials import (
+    CredentialStore,
+    EncryptedStore,
+    token_store_from_config,
+)
+from src.pa_square.habitica.manager import HabiticaManager, check_status
+from src.pa_square.habitica.retry import CircuitBreaker
+from src.pa_square.habitica.store import TaskStore
+
+logger = logging.getLogger(__name__)
+
+
+class ManagerRegistry:
+    """
+    Maps Discord user ids to their own HabiticaManager.
+
+    Managers are created lazily from encrypted credentials the first time a
+    user needs one. At most ``max_managers`` are kept alive (least recently
+    used are evicted first), and managers unused for ``idle_timeout`` seconds
+    are closed by the eviction loop. All managers share one connection pool
+    and one task cache, so memory stays bounded by those two limits, and one
+    circuit breaker, since a Habitica outage affects every account. With a
+    task store, a background loop flushes the queued writes of every account,
+    including ones queued by other processes or by users without a live
+    manager. API tokens and queued writes of linked accounts are keyed per
+    Discord user, so they are only ever used with the credentials that
+    produced them.
+
+    Args:
+        credentials: Encrypted credential store
+        default: Manager used for Discord users without their own credentials
+        max_managers: Maximum number of live managers
+        idle_timeout: Seconds of inactivity before a manager is closed
+        pool: Connection pool shared by all managers
+        cache: Task cache shared by all managers
+        breaker: Circuit breaker shared by all managers
+        token_store: Encrypted API token store shared by all managers
+        store: Task store and write-behind outbox shared by all managers
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        credentials: CredentialStore,
+        default: Optional[HabiticaManager] = None,
+        max_managers: int = 1000,
+        idle_timeout: float = 900.0,
+        pool: Optional[ConnectionPool] = None,
+        cache: Optional[TaskCache] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        token_store: Optional[EncryptedStore] = None,
+        store: Optional[TaskStore] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.credentials = credentials
+        self.default = default
+        self.max_managers = max_managers
+        self.idle_timeout = idle_timeout
+        self.pool = pool or get_default_pool()
+        self.cache = cache if cache is not None else TaskCache.from_config()
+        self.breaker = breaker or CircuitBreaker.from_config(
+            probe=lambda: check_status(self.pool, config.HABITICA_BASE_URL)
+        )
+        self.token_store = token_store
+        self.store = store
+        self._clock = clock
+        self._managers: "OrderedDict[int, HabiticaManager]" = OrderedDict()
+        self._last_used: Dict[int, float] = {}
+        self._eviction_task: Optional[asyncio.Task] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(cls, default: Optional[HabiticaManager] = None) -> "ManagerRegistry":
+        """Build a registry from the application configuration."""
+        token_store = default.token_store if default is not None else None
+        store = default.store if default is not None else None
+        return cls(
+            CredentialStore.from_config(),
+            default=default,
+            max_managers=config.HABITICA_MAX_MANAGERS,
+            idle_timeout=config.HABITICA_IDLE_TIMEOUT,
+            # One outage trips one circuit, whichever account noticed it first
+            breaker=default.breaker if default is not None else None,
+            token_store=token_store or token_store_from_config(),
+            store=store if store is not None else TaskStore.from_config(),
+        )
+
+    def __len__(self) -> int:
+        return len(self._managers)
+
+    def __contains__(self, discord_id: int) -> bool:
+        return discord_id in self._managers
+
+    async def register(self, discord_id: int, username: str, password: str) -> None:
+        """
+        Store a user's Habitica credentials.
+
+        Any live manager for the user is closed so the next request logs in
+        with the new credentials.
+
+        Args:
+            discord_id: Discord user id
+            username: Habitica username
+            password: Habitica password
+        """
+        self._forget_token(discord_id)
+        self.credentials.set(discord_id, username, password)
+        manager = self._discard(discord_id)
+        if manager is not None:
+            await manager.close_session()
+
+    async def unregister(self, discord_id: int) -> None:
+        """Forget a user's credentials and API token and close their manager."""
+        self._forget_token(discord_id)
+        self.credentials.delete(discord_id)
+        manager = self._discard(discord_id)
+        if manager is not None:
+            await manager.close_session()
+
+    def has_credentials(self, discord_id: int) -> bool:
+        """Whether the user has registered their own Habitica account."""
+        return discord_id in self.credentials
+
+    async def get(self, discord_id: int) -> Optional[HabiticaManager]:
+        """
+        Get the manager for a Discord user, creating it if needed.
+
+        Args:
+            discord_id: Discord user id
+
+        Returns:
+            The user's manager, the default manager if they have no credentials,
+            or None if neither exists
+        """
+        credentials = self.credentials.get(discord_id)
+        manager = self._managers.get(discord_id)
+        if manager is not None and (
+            credentials is None or not manager.logs_in_as(*credentials)
+        ):
+            # Relinked or unlinked through another process sharing the credential file
+            self._discard(discord_id)
+            await manager.close_session()
+            manager = None
+        if manager is None:
+            if credentials is None:
+                return self.default
+            manager = self._build(discord_id, *credentials)
+            self._managers[discord_id] = manager
+            await self._enforce_limit()
+
+        self._managers.move_to_end(discord_id)
+        self._last_used[discord_id] = self._clock()
+        return manager
+
+    def active_users(self) -> List[int]:
+        """Discord ids of users with a live manager, most recently used last."""
+        return list(self._managers)
+
+    def live_managers(self) -> List[Tuple[int, HabiticaManager]]:
+        """(Discord id, manager) pairs of live managers, without marking them as used."""
+        return list(self._managers.items())
+
+    async def evict_idle(self) -> int:
+        """
+        Close managers that have not been used within the idle timeout.
+
+        Returns:
+            Number of managers evicted
+        """
+        cutoff = self._clock() - self.idle_timeout
+        idle = [user for user in self._managers if self._last_used.get(user, 0.0) <= cutoff]
+        for user in idle:
+            manager = self._discard(user)
+            if manager is not None:
+                await manager.close_session()
+        return len(idle)
+
+    def start(self, interval: float = 60.0, flush_interval: Optional[float] = None) -> None:
+        """
+        Start the background idle-eviction and outbox flush loops.
+
+        Args:
+            interval: Seconds between eviction passes
+            flush_interval: Seconds between outbox flushes, 0 disables flushing
+        """
+        if self._eviction_task is None or self._eviction_task.done():
+            self._eviction_task = asyncio.create_task(self._eviction_loop(interval))
+        if flush_interval is None:
+            flush_interval = config.HABITICA_OUTBOX_INTERVAL
+        if (
+            self.store is not None
+            and flush_interval > 0
+            and (self._flush_task is None or self._flush_task.done())
+        ):
+            self._flush_task = asyncio.create_task(self._flush_loop(flush_interval))
+
+    async def flush_outboxes(self) -> int:
+        """
+        Flush the queued writes of every account in the task store.
+
+        Accounts without a live manager are flushed with a temporary one built
+        from their credentials. Writes of users who have since unlinked or
+        relinked another account are dropped, since nobody can send them.
+        Writes queued within the last few request timeouts and never attempted
+        are left alone, as another process may still be sending them.
+
+        Returns:
+            Number of writes delivered
+        """
+        if self.store is None:
+            return 0
+        settled_before = (
+            time.time() - config.HABITICA_TIMEOUT_TOTAL * config.HABITICA_RETRY_ATTEMPTS
+        )
+        live = {manager.account_key(): manager for manager in self._managers.values()}
+        if self.default is not None:
+            live[self.default.account_key()] = self.default
+        delivered = 0
+        for key in await self.store.pending_users():
+            manager = live.get(key)
+            temporary = manager is None
+            if temporary:
+                manager = self._manager_for_key(key)
+            if manager is None:
+                dropped = await self.store.drop(key)
+                logger.warning("Dropping %d queued writes of unlinked account %s", dropped, key)
+                continue
+            try:
+                delivered += await manager.flush_outbox(settled_before=settled_before)
+            finally:
+                if temporary:
+                    await manager.close_session()
+        return delivered
+
+    async def close(self) -> None:
+        """Stop the eviction loop and close every manager."""
+        for task in (self._eviction_task, self._flush_task):
+            if task is not None:
+                task.cancel()
+        self._eviction_task = self._flush_task = None
+        await self.breaker.close()
+        managers = list(self._managers.values())
+        self._managers.clear()
+        self._last_used.clear()
+        for manager in managers:
+            await manager.close_session()
+
+    async def _enforce_limit(self) -> None:
+        while len(self._managers) > self.max_managers:
+            user, manager = self._managers.popitem(last=False)
+            self._last_used.pop(user, None)
+            await manager.close_session()
+
+    async def _eviction_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.evict_idle()
+
+    async def _flush_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush_outboxes()
+            except Exception:
+                logger.exception("Flushing queued Habitica writes failed")
+
+    @staticmethod
+    def token_key(discord_id: int, username: str) -> str:
+        """Key of a linked account's API token in the token store."""
+        return f"{discord_id}:{username}"
+
+    def _build(self, discord_id: int, username: str, password: str) -> HabiticaManager:
+        return HabiticaManager(
+            pool=self.pool,
+            cache=self.cache,
+            breaker=self.breaker,
+            token_store=self.token_store,
+            store=self.store,
+            username=username,
+            password=password,
+            token_key=self.token_key(discord_id, username),
+        )
+
+    def _manager_for_key(self, key: str) -> Optional[HabiticaManager]:
+        """Build a manager for an account key, None if its user no longer links it."""
+        discord_id, _, username = key.partition(":")
+        if not discord_id.isdigit():
+            return None
+        credentials = self.credentials.get(int(discord_id))
+        if credentials is None or credentials[0] != username:
+            return None
+        return self._build(int(discord_id), *credentials)
+
+    def _forget_token(self, discord_id: int) -> None:
+        credentials = self.credentials.get(discord_id)
+        if credentials is not None and self.token_store is not None:
+            self.token_store.delete(self.token_key(discord_id, credentials[0]))
+
+    def _discard(self, discord_id: int) -> Optional[HabiticaManager]:
+        self._last_used.pop(discord_id, None)
+        return self._managers.pop(discord_id, None)
@@ -0,0 +1,218 @@
+"""Retry policy and circuit breaker for Habitica API calls."""
+
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Awaitable, Callable, FrozenSet, Optional
+
+import aiohttp
+
+from src.pa_square.config import config
+
+
+class CircuitOpenError(Exception):
+    """Raised when a request is refused because Habitica is considered down."""
+
+
+@dataclass
+class RetryPolicy:
+    """
+    Decides whether and when a failed request is retried.
+
+    Idempotent methods are retried on timeouts, connection problems and
+    retryable statuses. Other methods (POST) are only retried when the request
+    cannot have been applied: the connection was never made or the server
+    answered 429.
+
+    Args:
+        max_attempts: Total attempts including the first one
+        base_delay: Backoff base in seconds
+        max_delay: Upper bound for a single backoff; a longer Retry-After gives up instead
+        retry_statuses: Statuses worth retrying for idempotent methods
+        idempotent_methods: Methods that are safe to replay
+    """
+
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 10.0
+    retry_statuses: FrozenSet[int] = field(
+        default_factory=lambda: frozenset({408, 429, 500, 502, 503, 504})
+    )
+    idempotent_methods: FrozenSet[str] = field(
+        default_factory=lambda: frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+    )
+
+    @classmethod
+    def from_config(cls) -> "RetryPolicy":
+        """Build a retry policy from the application configuration."""
+        return cls(
+            max_attempts=config.HABITICA_RETRY_ATTEMPTS,
+            base_delay=config.HABITICA_RETRY_BASE_DELAY,
+            max_delay=config.HABITICA_RETRY_MAX_DELAY,
+        )
+
+    def should_retry(
+        self,
+        method: str,
+        attempt: int,
+        status: Optional[int] = None,
+        error: Optional[BaseException] = None,
+    ) -> bool:
+        """
+        Decide whether a failed attempt should be retried.
+
+        Args:
+            method: HTTP method of the request
+            attempt: Zero-based number of the attempt that just failed
+            status: Response status, if a response was received
+            error: Exception raised, if no response was received
+
+        Returns:
+            True if the request should be sent again
+        """
+        if attempt + 1 >= self.max_attempts:
+            return False
+
+        idempotent = method in self.idempotent_methods
+        if error is not None:
+            if isinstance(error, aiohttp.ClientConnectorError):
+                return True
+            return idempotent and isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+        if status == 429:
+            return True
+        return idempotent and status in self.retry_statuses
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        Get the delay before the next attempt.
+
+        Uses exponential backoff with full jitter, or the server's Retry-After.
+
+        Args:
+            attempt: Zero-based number of the attempt that just failed
+            retry_after: Seconds the server asked us to wait, if any
+
+        Returns:
+            Seconds to sleep, or None if the server asked for longer than max_delay
+        """
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class CircuitState(str, Enum):
+    """States of a circuit breaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the upstream is down.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    requests are refused. With a probe, recovery is checked in the background
+    every ``recovery_timeout`` seconds and the circuit closes once the probe
+    succeeds. Without one, a single trial request is let through after the
+    timeout (half-open) and its outcome decides the state.
+
+    Args:
+        failure_threshold: Consecutive failures that open the circuit
+        recovery_timeout: Seconds to wait before checking for recovery
+        probe: Optional coroutine function returning True if the upstream is healthy
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        probe: Optional[Callable[[], Awaitable[bool]]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.probe = probe
+        self._clock = clock
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._probe_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(
+        cls, probe: Optional[Callable[[], Awaitable[bool]]] = None
+    ) -> "CircuitBreaker":
+        """Build a circuit breaker from the application configuration."""
+        return cls(
+            failure_threshold=config.HABITICA_BREAKER_THRESHOLD,
+            recovery_timeout=config.HABITICA_BREAKER_RECOVERY,
+            probe=probe,
+        )
+
+    @property
+    def state(self) -> CircuitState:
+        """Current circuit state."""
+        return self._state
+
+    def allow(self) -> bool:
+        """
+        Check whether a request may be sent now.
+
+        Returns:
+            True if the request may proceed
+        """
+        if self._state == CircuitState.CLOSED:
+            return True
+        if self._state == CircuitState.OPEN:
+            if self.probe is not None:
+                return False
+            if self._clock() - self._opened_at < self.recovery_timeout:
+                return False
+            self._state = CircuitState.HALF_OPEN
+        if self._trial_in_flight:
+            return False
+        self._trial_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        self._failures = 0
+        self._trial_in_flight = False
+        self._state = CircuitState.CLOSED
+
+    def record_failure(self) -> None:
+        """Record a failed call, opening the circuit past the threshold."""
+        self._failures += 1
+        self._trial_in_flight = False
+        if self._state == CircuitState.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._open()
+
+    def _open(self) -> None:
+        self._state = CircuitState.OPEN
+        self._opened_at = self._clock()
+        if self.probe is not None and (self._probe_task is None or self._probe_task.done()):
+            self._probe_task = asyncio.create_task(self._probe_loop())
+
+    async def _probe_loop(self) -> None:
+        while self._state != CircuitState.CLOSED:
+            await asyncio.sleep(self.recovery_timeout)
+            try:
+                healthy = await self.probe()
+            except Exception:
+                healthy = False
+            if healthy:
+                self.record_success()
+            else:
+                self._opened_at = self._clock()
+
+    async def close(self) -> None:
+        """Stop any background recovery probe."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            self._probe_task = None
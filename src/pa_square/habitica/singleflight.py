@@ -0,0 +1,70 @@
+"""Coalescing of concurrent identical Habitica requests."""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+def freeze(value: Any) -> Hashable:
+    """
+    Convert request parameters into a hashable, order-independent value.
+
+    Args:
+        value: Parameters made of dicts, lists and scalars
+
+    Returns:
+        Hashable equivalent of the value
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((key, freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+class SingleFlight:
+    """
+    Runs at most one call per key at a time and shares its outcome.
+
+    The first caller for a key starts the call, later callers with the same key
+    await the same in-flight task. The call keeps running if the caller that
+    started it is cancelled, so the remaining waiters still get the result.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run ``func`` unless a call with the same key is already in flight.
+
+        Args:
+            key: Identity of the call
+            func: Zero-argument coroutine function performing the call
+
+        Returns:
+            Result of the (possibly shared) call
+        """
+        existing = self._inflight.get(key)
+        if existing is not None:
+            self.shared += 1
+            return await asyncio.shield(existing)
+
+        self.calls += 1
+        task = asyncio.ensure_future(func())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled
+            task.exception()
@@ -0,0 +1,254 @@
+"""SQLite-backed local copy of Habitica tasks and a durable queue of pending writes."""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional
+
+from src.pa_square.config import config
+from src.pa_square.habitica.constants import TASK_LIST_TYPES
+from src.pa_square.habitica.models import Task, dumps, loads
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    user TEXT NOT NULL,
+    id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    due TEXT,
+    completed INTEGER NOT NULL DEFAULT 0,
+    body TEXT NOT NULL,
+    PRIMARY KEY (user, id)
+);
+CREATE INDEX IF NOT EXISTS tasks_by_type ON tasks (user, type, completed, due);
+CREATE TABLE IF NOT EXISTS outbox (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    method TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    body TEXT,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS outbox_by_user ON outbox (user, seq);
+"""
+
+
+@dataclass
+class OutboxEntry:
+    """A write waiting to be sent to Habitica."""
+
+    seq: int
+    user: str
+    method: str
+    endpoint: str
+    body: Any
+    attempts: int = 0
+
+
+def _row(user: str, task: Task) -> tuple:
+    return (
+        user,
+        task.id,
+        TASK_LIST_TYPES.get(task.type, task.type),
+        task.date,
+        int(task.completed),
+        dumps(task.to_dict()),
+    )
+
+
+class TaskStore:
+    """
+    Local task copy and write-behind outbox in one SQLite database.
+
+    Tasks are stored per user and list type ("todos", "dailys", ...) with
+    indexed due date and completion columns. The outbox keeps writes that
+    could not be delivered yet, in order, until they are acknowledged.
+    SQLite calls run in a worker thread so they never block the event loop.
+
+    Args:
+        path: Database file, ":memory:" for a throwaway store
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    @classmethod
+    def from_config(cls) -> Optional["TaskStore"]:
+        """Build a task store from the application configuration, None if disabled."""
+        return cls(config.TASK_STORE_FILE) if config.TASK_STORE_FILE else None
+
+    async def _run(self, func, *args) -> Any:
+        def locked() -> Any:
+            with self._lock:
+                return func(*args)
+        return await asyncio.to_thread(locked)
+
+    async def replace_tasks(
+        self, user: str, list_type: str, tasks: Iterable[Task]
+    ) -> None:
+        """
+        Replace a user's stored list with a fresh copy from Habitica.
+
+        Args:
+            user: Habitica username
+            list_type: Task list type, e.g. "todos"
+            tasks: Tasks as returned by Habitica
+        """
+        rows = [_row(user, task) for task in tasks if task.id]
+
+        def replace() -> None:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.execute(
+                    "DELETE FROM tasks WHERE user = ? AND type = ?", (user, list_type)
+                )
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?)", rows
+                )
+
+        await self._run(replace)
+
+    async def add_task(self, user: str, task: Task) -> None:
+        """Store or update a single task."""
+        if not task.id:
+            return
+        await self._run(
+            self._db.execute, "INSERT OR REPLACE INTO tasks VALUES (?, ?, ?, ?, ?, ?)",
+            _row(user, task),
+        )
+
+    async def delete_tasks(self, user: str, task_ids: Iterable[str]) -> None:
+        """Remove tasks that no longer exist on Habitica."""
+        rows = [(user, task_id) for task_id in task_ids]
+        if rows:
+            await self._run(
+                self._db.executemany, "DELETE FROM tasks WHERE user = ? AND id = ?", rows
+            )
+
+    async def get_tasks(
+        self, user: str, list_type: str, include_completed: bool = False
+    ) -> Optional[List[Task]]:
+        """
+        Read a user's stored list, ordered by due date (undated last).
+
+        Args:
+            user: Habitica username
+            list_type: Task list type, e.g. "todos"
+            include_completed: Also return completed tasks
+
+        Returns:
+            Stored tasks, or None if the list was never stored
+        """
+        query = "SELECT body FROM tasks WHERE user = ? AND type = ?"
+        if not include_completed:
+            query += " AND completed = 0"
+        query += " ORDER BY due IS NULL, due"
+
+        def select() -> List[str]:
+            return [body for (body,) in self._db.execute(query, (user, list_type))]
+
+        bodies = await self._run(select)
+        if not bodies and not await self.has_tasks(user, list_type):
+            return None
+        return [Task.from_dict(loads(body)) for body in bodies]
+
+    async def has_tasks(self, user: str, list_type: str) -> bool:
+        """Whether any task of the list was ever stored."""
+        def exists() -> bool:
+            return self._db.execute(
+                "SELECT 1 FROM tasks WHERE user = ? AND type = ? LIMIT 1", (user, list_type)
+            ).fetchone() is not None
+        return await self._run(exists)
+
+    async def enqueue(self, user: str, method: str, endpoint: str, body: Any) -> int:
+        """
+        Durably queue a write for Habitica.
+
+        Returns:
+            Sequence number of the entry
+        """
+        def insert() -> int:
+            cursor = self._db.execute(
+                "INSERT INTO outbox (user, method, endpoint, body, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (user, method, endpoint, dumps(body), time.time()),
+            )
+            return cursor.lastrowid
+        return await self._run(insert)
+
+    async def pending(
+        self,
+        user: Optional[str] = None,
+        limit: int = 100,
+        settled_before: Optional[float] = None,
+    ) -> List[OutboxEntry]:
+        """
+        Get queued writes, oldest first.
+
+        Args:
+            user: Only entries of this account key, all accounts if None
+            limit: Maximum entries to return
+            settled_before: Only entries already attempted or queued before this
+                time (epoch seconds), leaving writes still being sent alone
+        """
+        query = "SELECT seq, user, method, endpoint, body, attempts FROM outbox"
+        conditions, params = [], ()
+        if user is not None:
+            conditions.append("user = ?")
+            params += (user,)
+        if settled_before is not None:
+            conditions.append("(attempts > 0 OR created_at < ?)")
+            params += (settled_before,)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY seq LIMIT ?"
+
+        def select() -> List[tuple]:
+            return self._db.execute(query, params + (limit,)).fetchall()
+
+        return [
+            OutboxEntry(seq, user, method, endpoint, loads(body), attempts)
+            for seq, user, method, endpoint, body, attempts in await self._run(select)
+        ]
+
+    async def pending_users(self) -> List[str]:
+        """Account keys with queued writes, in order of their oldest write."""
+        def select() -> List[str]:
+            rows = self._db.execute(
+                "SELECT user FROM outbox GROUP BY user ORDER BY MIN(seq)"
+            ).fetchall()
+            return [user for (user,) in rows]
+        return await self._run(select)
+
+    async def drop(self, user: str) -> int:
+        """
+        Remove every queued write of an account.
+
+        Returns:
+            Number of writes removed
+        """
+        def delete() -> int:
+            return self._db.execute("DELETE FROM outbox WHERE user = ?", (user,)).rowcount
+        return await self._run(delete)
+
+    async def ack(self, seq: int) -> None:
+        """Remove a delivered (or permanently rejected) write from the queue."""
+        await self._run(self._db.execute, "DELETE FROM outbox WHERE seq = ?", (seq,))
+
+    async def retry_later(self, seq: int) -> None:
+        """Record a failed delivery attempt."""
+        await self._run(
+            self._db.execute, "UPDATE outbox SET attempts = attempts + 1 WHERE seq = ?", (seq,)
+        )
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
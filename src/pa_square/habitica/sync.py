@@ -0,0 +1,122 @@
+"""Background worker that keeps cached task lists of active users up to date."""
+
+import asyncio
+import logging
+from typing import List, Optional, Sequence
+
+from src.pa_square.config import config
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.registry import ManagerRegistry
+from src.pa_square.utils.metrics import HABITICA_SYNC_CHANGES, HABITICA_SYNCS
+
+logger = logging.getLogger(__name__)
+
+
+class SyncWorker:
+    """
+    Periodically pulls task list changes so commands find a fresh cache.
+
+    Every ``interval`` seconds the default manager and every live manager of
+    the registry (users active within the idle timeout) refresh their task
+    lists through ``HabiticaManager.sync_tasks`` in the background lane,
+    ``concurrency`` accounts at a time. Consecutive calls for one account are
+    at least ``api_delay`` seconds apart, as Habitica asks of automated
+    scripts, and the interval is never shorter than that delay.
+
+    Args:
+        default: Manager of the bot's own Habitica account
+        registry: Registry whose live managers are synced
+        task_types: Task lists to keep warm, e.g. ("todos", "dailys")
+        interval: Seconds between sync passes
+        concurrency: Accounts synced at the same time
+        api_delay: Minimum seconds between two calls for the same account
+    """
+
+    def __init__(
+        self,
+        default: Optional[HabiticaManager] = None,
+        registry: Optional[ManagerRegistry] = None,
+        task_types: Sequence[str] = ("todos",),
+        interval: float = 60.0,
+        concurrency: int = 4,
+        api_delay: float = 30.0,
+    ) -> None:
+        self.default = default
+        self.registry = registry
+        self.task_types = tuple(task_types)
+        self.api_delay = api_delay
+        self.interval = max(interval, api_delay)
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    def from_config(
+        cls,
+        default: Optional[HabiticaManager] = None,
+        registry: Optional[ManagerRegistry] = None,
+    ) -> "SyncWorker":
+        """Build a sync worker from the application configuration."""
+        return cls(
+            default,
+            registry,
+            task_types=[t for t in config.HABITICA_SYNC_TYPES.replace(" ", "").split(",") if t],
+            interval=config.HABITICA_SYNC_INTERVAL,
+            concurrency=config.HABITICA_SYNC_CONCURRENCY,
+            api_delay=config.HABITICA_API_DELAY,
+        )
+
+    def managers(self) -> List[HabiticaManager]:
+        """Managers to sync in the next pass, the default one first."""
+        managers = []
+        if self.default is not None and self.default.username:
+            managers.append(self.default)
+        if self.registry is not None:
+            managers.extend(manager for _, manager in self.registry.live_managers())
+        return managers
+
+    async def sync_all(self) -> int:
+        """
+        Run one sync pass over every active account.
+
+        Returns:
+            Number of tasks added, changed or removed
+        """
+        results = await asyncio.gather(*(self._sync_one(m) for m in self.managers()))
+        return sum(results)
+
+    async def _sync_one(self, manager: HabiticaManager) -> int:
+        changed = 0
+        async with self._semaphore:
+            for index, task_type in enumerate(self.task_types):
+                if index:
+                    await asyncio.sleep(self.api_delay)
+                result = await manager.sync_tasks(task_type)
+                if isinstance(result, tuple):
+                    HABITICA_SYNCS.inc(outcome="error")
+                    logger.debug("Syncing %s of %s failed: %s", task_type, manager.username,
+                                 result[1])
+                    # Further lists would fail the same way, try again next pass
+                    break
+                HABITICA_SYNCS.inc(outcome="changed" if result else "unchanged")
+                HABITICA_SYNC_CHANGES.inc(result)
+                changed += result
+        return changed
+
+    def start(self) -> None:
+        """Start syncing in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop syncing."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.sync_all()
+            except Exception:
+                logger.exception("Background task sync failed")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,238 @@
+"""Multi-process launcher running the bot's gateway shards in clusters."""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+
+from src.pa_square.config import config
+from src.pa_square.main import run_bot, setup_logging
+
+logger = logging.getLogger(__name__)
+
+GATEWAY_BOT_URL = "https://discord.com/api/v10/gateway/bot"
+
+
+def shard_clusters(shard_count: int, processes: int) -> List[List[int]]:
+    """
+    Split shard ids into contiguous clusters of (nearly) equal size.
+
+    Args:
+        shard_count: Total number of shards
+        processes: Wanted number of clusters, capped at the shard count
+
+    Returns:
+        Shard ids of each cluster
+    """
+    processes = max(1, min(processes, shard_count))
+    size, extra = divmod(shard_count, processes)
+    clusters = []
+    start = 0
+    for index in range(processes):
+        end = start + size + (index < extra)
+        clusters.append(list(range(start, end)))
+        start = end
+    return clusters
+
+
+def cluster_log_file(filename: str, cluster: int) -> str:
+    """
+    Log file of one cluster, so processes never rotate each other's files.
+
+    Args:
+        filename: Configured log file, e.g. discord.log
+        cluster: Cluster number
+
+    Returns:
+        Log file for the cluster, e.g. discord.1.log
+    """
+    root, ext = os.path.splitext(filename)
+    return f"{root}.{cluster}{ext}"
+
+
+async def recommended_shard_count(token: str) -> int:
+    """
+    Ask Discord how many shards the bot should run.
+
+    Args:
+        token: Discord bot token
+
+    Returns:
+        Recommended shard count
+    """
+    headers = {"Authorization": f"Bot {token}"}
+    async with aiohttp.ClientSession() as session:
+        async with session.get(GATEWAY_BOT_URL, headers=headers) as response:
+            response.raise_for_status()
+            return int((await response.json())["shards"])
+
+
+def run_cluster(cluster: int, shard_ids: List[int], shard_count: int) -> None:
+    """
+    Process entry point: run the bot for one cluster of shards.
+
+    SIGTERM is turned into KeyboardInterrupt so the bot shuts down cleanly.
+
+    Args:
+        cluster: Cluster number
+        shard_ids: Shards this process connects
+        shard_count: Total shards across all processes
+    """
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    listener = setup_logging(cluster_log_file(config.LOG_FILE, cluster))
+    try:
+        logger.info("Cluster %d starting shards %s of %d", cluster, shard_ids, shard_count)
+        asyncio.run(run_bot(shard_ids, shard_count, cluster))
+    except KeyboardInterrupt:
+        logger.info("Cluster %d stopped", cluster)
+    except Exception:
+        logger.exception("Error running cluster %d", cluster)
+        raise
+    finally:
+        listener.stop()
+
+
+class Launcher:
+    """
+    Runs every cluster of shards in its own process and restarts clusters that exit.
+
+    Each process builds its own bot, Habitica managers and connection pool and
+    serves its own health endpoints on ``KEEP_ALIVE_PORT`` plus its cluster
+    number, so /readyz and /metrics report the shards of that process.
+
+    Args:
+        clusters: Shard ids of each cluster, see shard_clusters
+        shard_count: Total number of shards
+        restart_delay: Seconds to wait before restarting a cluster that exited
+        context: Multiprocessing context, "spawn" by default
+        target: Process entry point, run_cluster by default
+    """
+
+    def __init__(
+        self,
+        clusters: List[List[int]],
+        shard_count: int,
+        restart_delay: float = config.DISCORD_SHARD_RESTART_DELAY,
+        context: Optional[BaseContext] = None,
+        target: Callable[[int, List[int], int], None] = run_cluster,
+    ) -> None:
+        self.clusters = clusters
+        self.shard_count = shard_count
+        self.restart_delay = restart_delay
+        self.processes: Dict[int, BaseProcess] = {}
+        self._context = context if context is not None else multiprocessing.get_context("spawn")
+        self._target = target
+        self._restart_at: Dict[int, float] = {}
+        self._stopping = False
+
+    @classmethod
+    def from_config(cls, shard_count: int) -> "Launcher":
+        """Build a launcher from the application configuration."""
+        processes = config.DISCORD_SHARD_PROCESSES or os.cpu_count() or 1
+        return cls(shard_clusters(shard_count, processes), shard_count)
+
+    def start(self) -> None:
+        """Start a process for every cluster."""
+        for cluster in range(len(self.clusters)):
+            self._start_cluster(cluster)
+
+    def check(self, now: Optional[float] = None) -> List[int]:
+        """
+        Restart the clusters whose process exited at least ``restart_delay`` ago.
+
+        Args:
+            now: Current monotonic time
+
+        Returns:
+            Clusters restarted by this check
+        """
+        now = now if now is not None else time.monotonic()
+        restarted = []
+        for cluster, process in list(self.processes.items()):
+            if self._stopping or process.is_alive():
+                continue
+            restart_at = self._restart_at.get(cluster)
+            if restart_at is None:
+                logger.warning(
+                    "Cluster %d exited with code %s, restarting in %.0fs",
+                    cluster, process.exitcode, self.restart_delay,
+                )
+                self._restart_at[cluster] = now + self.restart_delay
+            elif now >= restart_at:
+                del self._restart_at[cluster]
+                self._start_cluster(cluster)
+                restarted.append(cluster)
+        return restarted
+
+    def supervise(self, poll: float = 1.0) -> None:
+        """Keep the clusters running until stop() is called or the launcher is interrupted."""
+        while not self._stopping:
+            self.check()
+            time.sleep(poll)
+
+    def stop(self, timeout: float = 30.0) -> None:
+        """
+        Stop every cluster, killing those that don't exit within the timeout.
+
+        Args:
+            timeout: Seconds to wait for each process
+        """
+        self._stopping = True
+        for process in self.processes.values():
+            if process.is_alive():
+                process.terminate()
+        for cluster, process in self.processes.items():
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning("Cluster %d did not stop, killing it", cluster)
+                process.kill()
+                process.join()
+
+    def _start_cluster(self, cluster: int) -> None:
+        process = self._context.Process(
+            target=self._target,
+            args=(cluster, self.clusters[cluster], self.shard_count),
+            name=f"pa-square-cluster-{cluster}",
+        )
+        process.start()
+        self.processes[cluster] = process
+        logger.info(
+            "Started cluster %d (pid %s) with shards %s", cluster, process.pid,
+            self.clusters[cluster],
+        )
+
+
+def main() -> None:
+    """Entry point running the bot sharded across processes."""
+    listener = setup_logging()
+    try:
+        config.validate()
+        shard_count = config.DISCORD_SHARD_COUNT or asyncio.run(
+            recommended_shard_count(config.DISCORD_TOKEN)
+        )
+        launcher = Launcher.from_config(shard_count)
+        logger.info("Running %d shards in %d processes", shard_count, len(launcher.clusters))
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        launcher.start()
+        try:
+            launcher.supervise()
+        except KeyboardInterrupt:
+            logger.info("Launcher stopped by user")
+        finally:
+            launcher.stop()
+    except Exception:
+        logger.exception("Error running launcher")
+        raise
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""Text generation for reminder messages."""
+
+
+__all__ = ["AnthropicBackend", "LocalBackend", "ReminderWriter"]
+
+from src.pa_square.llm.backends import AnthropicBackend, LocalBackend
+from src.pa_square.llm.writer import ReminderWriter
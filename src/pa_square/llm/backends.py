@@ -0,0 +1,167 @@
+"""Text generation backends for reminder messages."""
+
+import hashlib
+import json
+from typing import List, Optional, Protocol, Sequence, Tuple
+
+import aiohttp
+
+from src.pa_square.config import config
+
+# (task text, tone)
+Request = Tuple[str, str]
+
+TEMPLATES = (
+    "Just a gentle reminder that {task} still exists. Not that anyone's counting.",
+    "{task}. Remember that? Because I do.",
+    "No pressure, but {task} isn't going to do itself.",
+    "I'm sure you're very busy. Anyway, {task}.",
+    "Per my last reminder: {task}.",
+)
+
+ANTHROPIC_MESSAGES_URL = "https://api.anthropic.com/v1/messages"
+ANTHROPIC_VERSION = "2023-06-01"
+
+
+class BackendError(Exception):
+    """Raised when a backend can't produce text for a batch."""
+
+
+class TextBackend(Protocol):
+    """Writes one reminder per request, in request order."""
+
+    async def generate(self, requests: Sequence[Request]) -> List[str]:
+        """
+        Write reminder texts.
+
+        Args:
+            requests: (task text, tone) pairs
+
+        Returns:
+            One text per request, in the same order
+
+        Raises:
+            BackendError: If the batch could not be written
+        """
+        ...
+
+    async def close(self) -> None:
+        """Release any resources held by the backend."""
+        ...
+
+
+class LocalBackend:
+    """
+    Deterministic template backend that needs no network.
+
+    The same task and tone always get the same template, which keeps tests
+    stable and serves as the fallback when the model is unavailable.
+    """
+
+    def __init__(self, templates: Sequence[str] = TEMPLATES) -> None:
+        self.templates = tuple(templates)
+
+    async def generate(self, requests: Sequence[Request]) -> List[str]:
+        """Fill a template per request."""
+        return [self.render(task, tone) for task, tone in requests]
+
+    def render(self, task: str, tone: str) -> str:
+        """Pick the template for a request and fill it in."""
+        digest = hashlib.blake2b(f"{tone}\0{task}".encode(), digest_size=4).digest()
+        template = self.templates[int.from_bytes(digest, "big") % len(self.templates)]
+        return template.format(task=f"**{task}**")
+
+    async def close(self) -> None:
+        """Nothing to release."""
+
+
+class AnthropicBackend:
+    """
+    Claude Messages API backend writing a whole batch in one call.
+
+    The batch is sent as a numbered list and the model is asked for a JSON
+    array with one reminder per item.
+
+    Args:
+        api_key: Anthropic API key
+        model: Model name
+        max_tokens: Output token limit for one batch
+        url: Messages endpoint
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "claude-3-5-haiku-latest",
+        max_tokens: int = 1024,
+        url: str = ANTHROPIC_MESSAGES_URL,
+    ) -> None:
+        self.api_key = api_key
+        self.model = model
+        self.max_tokens = max_tokens
+        self.url = url
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    @staticmethod
+    def prompt(requests: Sequence[Request]) -> str:
+        """Build the prompt for a batch."""
+        items = "\n".join(
+            f"{number}. Task: {json.dumps(task)} Tone: {tone}"
+            for number, (task, tone) in enumerate(requests, start=1)
+        )
+        return (
+            "You write one-sentence reminders for a Discord bot that nags people about their "
+            "to-do lists. Write one reminder per numbered item below, in the requested tone, "
+            "mentioning the task. Answer with only a JSON array of strings, one per item, "
+            f"in the same order.\n\n{items}"
+        )
+
+    async def generate(self, requests: Sequence[Request]) -> List[str]:
+        """Write a batch with one API call."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+        headers = {
+            "x-api-key": self.api_key,
+            "anthropic-version": ANTHROPIC_VERSION,
+            "content-type": "application/json",
+        }
+        body = {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "messages": [{"role": "user", "content": self.prompt(requests)}],
+        }
+        try:
+            async with self.session.post(self.url, headers=headers, json=body) as response:
+                if response.status != 200:
+                    raise BackendError(f"API Error: {response.status}")
+                payload = await response.json()
+        except aiohttp.ClientError as e:
+            raise BackendError(f"Request failed: {e}") from e
+
+        text = "".join(
+            block.get("text", "") for block in payload.get("content", [])
+            if block.get("type") == "text"
+        )
+        try:
+            texts = json.loads(text[text.index("["):text.rindex("]") + 1])
+        except ValueError as e:
+            raise BackendError("Response is not a JSON array") from e
+        if len(texts) != len(requests) or not all(isinstance(t, str) for t in texts):
+            raise BackendError(f"Expected {len(requests)} reminders, got {len(texts)}")
+        return texts
+
+    async def close(self) -> None:
+        """Close the HTTP session."""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+
+def backend_from_config() -> TextBackend:
+    """Build the configured backend, the local one if no API key is set."""
+    if config.LLM_BACKEND == "anthropic" and config.ANTHROPIC_API_KEY:
+        return AnthropicBackend(
+            config.ANTHROPIC_API_KEY,
+            model=config.ANTHROPIC_MODEL,
+            max_tokens=config.ANTHROPIC_MAX_TOKENS,
+        )
+    return LocalBackend()
@@ -0,0 +1,158 @@
+"""Batched, cached reminder text generation."""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from src.pa_square.config import config
+from src.pa_square.llm.backends import (
+    BackendError,
+    LocalBackend,
+    Request,
+    TextBackend,
+    backend_from_config,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TONE = "passive-aggressive"
+
+
+def cache_key(task: str, tone: str) -> Request:
+    """Normalize a request so trivially different task texts share a cache entry."""
+    return " ".join(task.casefold().split()), tone.casefold()
+
+
+class ReminderWriter:
+    """
+    Writes reminder texts through a backend, batching and caching requests.
+
+    Requests arriving within ``batch_window`` seconds of each other are sent
+    to the backend as one batch of at most ``batch_size``, at most
+    ``concurrency`` batches at a time. Identical requests share one result,
+    finished ones are kept in an LRU cache. A batch that fails or takes longer
+    than ``timeout`` seconds is answered by the fallback backend, so callers
+    always get a text.
+
+    Args:
+        backend: Backend that writes the texts
+        batch_size: Maximum requests per backend call
+        batch_window: Seconds to wait for more requests before sending a batch
+        concurrency: Maximum backend calls in flight
+        timeout: Seconds before a backend call is abandoned
+        cache_size: Maximum cached texts
+        fallback: Backend used when the main one fails
+    """
+
+    def __init__(
+        self,
+        backend: TextBackend,
+        batch_size: int = 20,
+        batch_window: float = 0.05,
+        concurrency: int = 2,
+        timeout: float = 15.0,
+        cache_size: int = 1024,
+        fallback: Optional[TextBackend] = None,
+    ) -> None:
+        self.backend = backend
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.fallback: TextBackend = fallback if fallback is not None else LocalBackend()
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._cache: "OrderedDict[Request, str]" = OrderedDict()
+        self._pending: Dict[Request, Tuple[Request, asyncio.Future]] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches: set = set()
+        self.calls = 0
+
+    @classmethod
+    def from_config(cls) -> "ReminderWriter":
+        """Build a reminder writer from the application configuration."""
+        return cls(
+            backend_from_config(),
+            batch_size=config.LLM_BATCH_SIZE,
+            batch_window=config.LLM_BATCH_WINDOW,
+            concurrency=config.LLM_CONCURRENCY,
+            timeout=config.LLM_TIMEOUT,
+            cache_size=config.LLM_CACHE_SIZE,
+        )
+
+    async def write(self, task: str, tone: str = DEFAULT_TONE) -> str:
+        """
+        Get a reminder text for a task.
+
+        Args:
+            task: Task text
+            tone: Requested tone
+
+        Returns:
+            Reminder text
+        """
+        key = cache_key(task, tone)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        pending = self._pending.get(key)
+        if pending is None:
+            future = asyncio.get_running_loop().create_future()
+            pending = self._pending[key] = ((task, tone), future)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(
+                    self.batch_window, self._flush
+                )
+        return await asyncio.shield(pending[1])
+
+    async def write_many(self, tasks: List[str], tone: str = DEFAULT_TONE) -> List[str]:
+        """Get reminder texts for several tasks, batched together."""
+        return list(await asyncio.gather(*(self.write(task, tone) for task in tasks)))
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            keys = list(self._pending)[: self.batch_size]
+            batch = [(key, *self._pending.pop(key)) for key in keys]
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Request, Request, asyncio.Future]]) -> None:
+        requests = [request for _, request, _ in batch]
+        try:
+            async with self._semaphore:
+                self.calls += 1
+                texts = await asyncio.wait_for(self.backend.generate(requests), self.timeout)
+        except (BackendError, asyncio.TimeoutError) as e:
+            logger.warning("Reminder backend failed for %d requests: %s", len(requests), e)
+            texts = await self.fallback.generate(requests)
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (key, _, future), text in zip(batch, texts):
+            self._remember(key, text)
+            if not future.done():
+                future.set_result(text)
+
+    def _remember(self, key: Request, text: str) -> None:
+        self._cache[key] = text
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def close(self) -> None:
+        """Wait for running batches and close the backends."""
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        await self.backend.close()
+        await self.fallback.close()
@@ -1,37 +1,70 @@
 """Main bot runner for PA-Square Discord bot."""
 
 import logging
+from logging.handlers import QueueListener
+from typing import List, Optional
 
+import aiohttp
 import discord
 from discord.ext import commands
 
 from src.pa_square.bot.commands import setup_commands
 from src.pa_square.bot.events import setup_events
+from src.pa_square.bot.outbound import Outbound
+from src.pa_square.bot.reminders import ReminderEngine
+from src.pa_square.bot.roles import RoleIndex
+from src.pa_square.bot.welcome import WelcomeQueue
 from src.pa_square.config import config
+from src.pa_square.habitica.credentials import token_store_from_config
 from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.registry import ManagerRegistry
+from src.pa_square.habitica.store import TaskStore
+from src.pa_square.habitica.sync import SyncWorker
 from src.pa_square.utils.keep_alive import keep_alive
+from src.pa_square.utils.log import configure_logging, parse_module_levels
+from src.pa_square.utils.metrics import REGISTRY, MetricsReporter
 
+logger = logging.getLogger(__name__)
 
-def setup_logging() -> logging.FileHandler:
+
+def setup_logging(filename: str = config.LOG_FILE) -> QueueListener:
     """
     Set up logging configuration.
     
+    Args:
+        filename: Log file, rotated by size
+        
     Returns:
-        Configured file handler
+        Started queue listener, stop it on shutdown to flush pending records
     """
-    handler = logging.FileHandler(
-        filename=config.LOG_FILE,
-        encoding="utf-8",
-        mode="w"
+    return configure_logging(
+        level=config.LOG_LEVEL,
+        filename=filename,
+        max_bytes=config.LOG_MAX_BYTES,
+        backup_count=config.LOG_BACKUP_COUNT,
+        module_levels=parse_module_levels(config.LOG_LEVELS),
+        sample_rate=config.LOG_DEBUG_SAMPLE_RATE,
+        queue_size=config.LOG_QUEUE_SIZE,
+        json_format=config.LOG_JSON,
     )
-    logging.getLogger("asyncio").setLevel(getattr(logging, config.LOG_LEVEL))
-    return handler
 
 
-def create_bot() -> commands.Bot:
+def create_bot(
+    shard_ids: Optional[List[int]] = None,
+    shard_count: Optional[int] = None,
+    http_trace: Optional[aiohttp.TraceConfig] = None,
+) -> commands.Bot:
     """
     Create and configure Discord bot instance.
     
+    With ``DISCORD_SHARDED`` set, or when shard ids are given, the bot is an
+    AutoShardedBot running one gateway connection per shard.
+    
+    Args:
+        shard_ids: Shards this process connects, all of them if None
+        shard_count: Total shards across all processes, Discord's recommendation if None
+        http_trace: Optional trace config for the bot's HTTP client, see Outbound.trace_config
+        
     Returns:
         Configured Discord bot
     """
@@ -41,46 +74,113 @@ def create_bot() -> commands.Bot:
     intents.message_content = True
     intents.members = True
     
+    # Long rate limit waits raise RateLimited instead, so Outbound can reschedule the route
+    options = {
+        "command_prefix": config.DISCORD_COMMAND_PREFIX,
+        "intents": intents,
+        "http_trace": http_trace,
+        "max_ratelimit_timeout": config.DISCORD_MAX_RATELIMIT_TIMEOUT or None,
+    }
+    
     # Initialize bot with command prefix and permissions determined by intents
-    bot = commands.Bot(command_prefix=config.DISCORD_COMMAND_PREFIX, intents=intents)
+    if config.DISCORD_SHARDED or shard_ids is not None:
+        bot = commands.AutoShardedBot(
+            shard_ids=shard_ids,
+            shard_count=shard_count or config.DISCORD_SHARD_COUNT or None,
+            **options,
+        )
+    else:
+        bot = commands.Bot(**options)
     
     return bot
 
 
-async def run_bot() -> None:
-    """Run the Discord bot with all configurations."""
-    # Validate configuration
-    config.validate()
+async def run_bot(
+    shard_ids: Optional[List[int]] = None,
+    shard_count: Optional[int] = None,
+    cluster: int = 0,
+) -> None:
+    """
+    Run the Discord bot with all configurations.
     
-    # Start keep-alive server
-    keep_alive()
+    Every process running the bot has its own Habitica managers and health
+    server, on ``KEEP_ALIVE_PORT`` plus its cluster number. Reminders, the
+    background sync and the outbox flush are per account rather than per
+    guild, so only the process connecting shard 0 runs them; its flush also
+    sends writes the other processes queued.
     
-    # Set up logging
-    handler = setup_logging()
+    Args:
+        shard_ids: Shards this process connects, all of them if None
+        shard_count: Total shards across all processes
+        cluster: Number of this process among the launcher's processes
+    """
+    # Validate configuration
+    config.validate()
+    primary = shard_ids is None or 0 in shard_ids
     
-    # Create bot and Habitica manager
-    bot = create_bot()
-    habitica_manager = HabiticaManager()
+    # Create bot, the default Habitica manager and the per-user registry
+    outbound = Outbound.from_config()
+    bot = create_bot(shard_ids, shard_count, http_trace=outbound.trace_config())
+    habitica_manager = HabiticaManager(
+        token_store=token_store_from_config(), store=TaskStore.from_config()
+    )
+    registry = ManagerRegistry.from_config(default=habitica_manager)
+    registry.start(flush_interval=None if primary else 0)
     
     # Set up events and commands
-    await setup_events(bot, habitica_manager)
-    await setup_commands(bot, habitica_manager)
+    roles = RoleIndex()
+    welcome = WelcomeQueue.from_config(outbound, roles)
+    await setup_events(bot, habitica_manager, registry, outbound=outbound, welcome=welcome)
+    await setup_commands(bot, habitica_manager, registry, outbound=outbound, roles=roles)
+    
+    # Start keep-alive server on the same event loop
+    health_server = await keep_alive(
+        bot, habitica_manager, registry, port=config.KEEP_ALIVE_PORT + cluster
+    )
+    reporter = MetricsReporter(REGISTRY, config.METRICS_SUMMARY_INTERVAL)
+    reporter.start()
+    reminders = (
+        ReminderEngine.from_config(bot, habitica_manager, registry, outbound) if primary else None
+    )
+    if reminders is not None:
+        reminders.start()
+    sync = SyncWorker.from_config(habitica_manager, registry)
+    if primary and config.HABITICA_SYNC_INTERVAL > 0:
+        sync.start()
     
     # Run the bot
-    await bot.start(config.DISCORD_TOKEN)
+    try:
+        await bot.start(config.DISCORD_TOKEN)
+    finally:
+        await sync.stop()
+        if reminders is not None:
+            await reminders.stop()
+        await reporter.stop()
+        await health_server.stop()
+        await welcome.stop()
+        await outbound.close()
+        await registry.close()
+        await habitica_manager.breaker.close()
+        await habitica_manager.close_session()
+        await habitica_manager.pool.close()
+        if habitica_manager.store is not None:
+            habitica_manager.store.close()
 
 
 def main() -> None:
     """Entry point for the bot."""
     import asyncio
     
+    listener = setup_logging()
     try:
         asyncio.run(run_bot())
     except KeyboardInterrupt:
-        print("\nBot stopped by user")
-    except Exception as e:
-        print(f"Error running bot: {e}")
+        logger.info("Bot stopped by user")
+    except Exception:
+        logger.exception("Error running bot")
         raise
+    finally:
+        listener.stop()
 
 
 if __name__ == "__main__":
@@ -1,3 +1,7 @@
 """Utility modules for PA-Square bot."""
 
-__all__ = ["keep_alive"]
+# HealthServer stays in utils.keep_alive: importing it here would be circular, since
+# the Habitica manager it reports on records its metrics through this package
+__all__ = ["MetricsRegistry", "keep_alive"]
+
+from src.pa_square.utils.metrics import MetricsRegistry
@@ -1,26 +1,222 @@
-"""Keep-alive Flask server for bot monitoring."""
+"""Keep-alive health and metrics server for bot monitoring."""
 
-from threading import Thread
+import math
+from typing import Any, Dict, List, Optional, Tuple
 
-from flask import Flask
+from aiohttp import web
+from discord.ext import commands
 
 from src.pa_square.config import config
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.registry import ManagerRegistry
+from src.pa_square.habitica.retry import CircuitState
+from src.pa_square.utils.metrics import REGISTRY, MetricsRegistry
 
-app = Flask(__name__)
+Metric = Tuple[str, str, str, float]
 
 
-@app.route("/")
-def home() -> str:
-    """Health check endpoint."""
-    return "Bot is running!"
+def format_metrics(metrics: List[Metric]) -> str:
+    """
+    Render metrics in the Prometheus text exposition format.
 
+    Args:
+        metrics: (name, type, help, value) tuples. A name may carry labels, e.g.
+            ``discord_shard_up{shard="0"}``; samples of one metric must be adjacent
 
-def run() -> None:
-    """Run Flask server."""
-    app.run(host=config.KEEP_ALIVE_HOST, port=config.KEEP_ALIVE_PORT)
+    Returns:
+        Exposition text
+    """
+    lines = []
+    previous = None
+    for name, metric_type, help_text, value in metrics:
+        base = name.split("{", 1)[0]
+        if base != previous:
+            lines.append(f"# HELP {base} {help_text}")
+            lines.append(f"# TYPE {base} {metric_type}")
+            previous = base
+        lines.append(f"{name} {value:g}")
+    return "\n".join(lines) + "\n"
 
 
-def keep_alive() -> None:
-    """Start keep-alive server in background thread."""
-    t = Thread(target=run, daemon=True)
-    t.start()
+class HealthServer:
+    """
+    Liveness, readiness and metrics endpoints served on the bot's own event loop.
+
+    Endpoints:
+    - ``/`` and ``/healthz``: liveness, answers as long as the event loop runs
+    - ``/readyz``: 200 once the Discord gateway is ready and Habitica is reachable
+      (neither the default manager's nor the registry's circuit open), 503 otherwise. A sharded bot also lists every shard and
+      is only ready while all of them are connected
+    - ``/metrics``: Prometheus metrics
+
+    Args:
+        bot: Discord bot instance
+        habitica_manager: Default Habitica manager
+        registry: Optional per-user manager registry
+        host: Interface to bind to
+        port: Port to listen on
+        metrics_registry: Registry of request and command metrics to export
+    """
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        habitica_manager: HabiticaManager,
+        registry: Optional[ManagerRegistry] = None,
+        host: str = config.KEEP_ALIVE_HOST,
+        port: int = config.KEEP_ALIVE_PORT,
+        metrics_registry: MetricsRegistry = REGISTRY,
+    ) -> None:
+        self.bot = bot
+        self.habitica_manager = habitica_manager
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.metrics_registry = metrics_registry
+        self.app = web.Application()
+        self.app.router.add_get("/", self.home)
+        self.app.router.add_get("/healthz", self.liveness)
+        self.app.router.add_get("/readyz", self.readiness)
+        self.app.router.add_get("/metrics", self.metrics)
+        self._runner: Optional[web.AppRunner] = None
+
+    async def start(self) -> None:
+        """Start serving."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        """Stop serving and release the port."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def circuit(self) -> CircuitState:
+        """State of the Habitica circuit breakers, the worst one if they differ."""
+        states = {self.habitica_manager.breaker.state}
+        if self.registry is not None:
+            states.add(self.registry.breaker.state)
+        for state in (CircuitState.OPEN, CircuitState.HALF_OPEN):
+            if state in states:
+                return state
+        return CircuitState.CLOSED
+
+    def status(self) -> Dict[str, Any]:
+        """Collect the component states used by readiness."""
+        latency = self.bot.latency
+        return {
+            "discord_ready": self.bot.is_ready() and not self.bot.is_closed(),
+            "discord_latency": latency if math.isfinite(latency) else None,
+            "habitica_circuit": self.circuit().value,
+            "habitica_session": self.habitica_manager.session is not None
+            and not self.habitica_manager.session.closed,
+            **({"shards": self.shards()} if isinstance(self.bot, commands.AutoShardedBot) else {}),
+        }
+
+    def shards(self) -> Dict[str, Dict[str, Any]]:
+        """State of each gateway connection of a sharded bot, by shard id."""
+        guilds: Dict[int, int] = {}
+        for guild in self.bot.guilds:
+            guilds[guild.shard_id] = guilds.get(guild.shard_id, 0) + 1
+        shards = {}
+        for shard_id, shard in sorted(self.bot.shards.items()):
+            latency = shard.latency
+            shards[str(shard_id)] = {
+                "up": not shard.is_closed(),
+                "latency": latency if math.isfinite(latency) else None,
+                "guilds": guilds.get(shard_id, 0),
+            }
+        return shards
+
+    async def home(self, request: web.Request) -> web.Response:
+        """Health check endpoint."""
+        return web.Response(text="Bot is running!")
+
+    async def liveness(self, request: web.Request) -> web.Response:
+        """Liveness endpoint."""
+        return web.json_response({"status": "alive"})
+
+    async def readiness(self, request: web.Request) -> web.Response:
+        """Readiness endpoint."""
+        status = self.status()
+        ready = (
+            status["discord_ready"]
+            and status["habitica_circuit"] != CircuitState.OPEN.value
+            and all(shard["up"] for shard in status.get("shards", {}).values())
+        )
+        return web.json_response(
+            {"status": "ready" if ready else "not ready", **status}, status=200 if ready else 503
+        )
+
+    def collect(self) -> List[Metric]:
+        """Gather the current metric values."""
+        manager = self.habitica_manager
+        cache = manager.cache.stats()
+        latency = self.bot.latency
+        metrics: List[Metric] = [
+            ("discord_gateway_up", "gauge", "Whether the Discord gateway is ready",
+             float(self.bot.is_ready() and not self.bot.is_closed())),
+            ("discord_gateway_latency_seconds", "gauge", "Discord heartbeat latency",
+             latency if math.isfinite(latency) else -1),
+            ("discord_guilds", "gauge", "Guilds the bot is in", len(self.bot.guilds)),
+            ("habitica_circuit_open", "gauge", "Whether the Habitica circuit breaker is open",
+             float(self.circuit() == CircuitState.OPEN)),
+            ("habitica_scheduler_pending", "gauge", "Requests waiting for a rate limit slot",
+             manager.scheduler.pending),
+            ("habitica_cache_hits_total", "counter", "Task cache hits", cache["hits"]),
+            ("habitica_cache_misses_total", "counter", "Task cache misses", cache["misses"]),
+            ("habitica_cache_entries", "gauge", "Task lists in the cache", cache["size"]),
+        ]
+        if isinstance(self.bot, commands.AutoShardedBot):
+            shards = self.shards()
+            metrics.extend(
+                (f'discord_shard_up{{shard="{shard_id}"}}', "gauge",
+                 "Whether a gateway shard is connected", float(shard["up"]))
+                for shard_id, shard in shards.items()
+            )
+            metrics.extend(
+                (f'discord_shard_latency_seconds{{shard="{shard_id}"}}', "gauge",
+                 "Heartbeat latency of a gateway shard",
+                 shard["latency"] if shard["latency"] is not None else -1)
+                for shard_id, shard in shards.items()
+            )
+            metrics.extend(
+                (f'discord_shard_guilds{{shard="{shard_id}"}}', "gauge",
+                 "Guilds served by a gateway shard", shard["guilds"])
+                for shard_id, shard in shards.items()
+            )
+        if self.registry is not None:
+            metrics.append(
+                ("habitica_managers", "gauge", "Live per-user Habitica managers",
+                 len(self.registry))
+            )
+        return metrics
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        """Prometheus metrics endpoint."""
+        text = format_metrics(self.collect()) + self.metrics_registry.render()
+        return web.Response(text=text, content_type="text/plain")
+
+
+async def keep_alive(
+    bot: commands.Bot,
+    habitica_manager: HabiticaManager,
+    registry: Optional[ManagerRegistry] = None,
+    port: int = config.KEEP_ALIVE_PORT,
+) -> HealthServer:
+    """
+    Start the keep-alive server on the running event loop.
+
+    Args:
+        bot: Discord bot instance
+        habitica_manager: Default Habitica manager
+        registry: Optional per-user manager registry
+        port: Port to listen on
+
+    Returns:
+        The running server, stop it with ``await server.stop()``
+    """
+    server = HealthServer(bot, habitica_manager, registry, port=port)
+    await server.start()
+    return server
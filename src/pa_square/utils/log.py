@@ -0,0 +1,158 @@
+"""Non-blocking logging pipeline: records are queued on the event loop and written by a thread."""
+
+import json
+import logging
+import queue
+import sys
+from collections import defaultdict
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
+
+from src.pa_square.utils.metrics import REGISTRY
+
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "log_records_dropped_total", "Log records dropped because the log queue was full"
+)
+LOG_RECORDS_SAMPLED = REGISTRY.counter(
+    "log_records_sampled_out_total", "Debug log records skipped by sampling"
+)
+
+TEXT_FORMAT = "%(asctime)s %(levelname)-8s %(name)s: %(message)s"
+
+
+def parse_module_levels(spec: str) -> Dict[str, int]:
+    """
+    Parse per-module log levels like ``discord=INFO,discord.gateway=WARNING``.
+
+    Args:
+        spec: Comma-separated logger=LEVEL pairs
+
+    Returns:
+        Map of logger names to numeric levels
+
+    Raises:
+        ValueError: If a pair or level is not understood
+    """
+    levels: Dict[str, int] = {}
+    for pair in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = pair.partition("=")
+        numeric = logging.getLevelName(level.strip().upper())
+        if not name.strip() or not isinstance(numeric, int):
+            raise ValueError(f"Invalid log level setting: {pair}")
+        levels[name.strip()] = numeric
+    return levels
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through one in ``rate`` records per call site below ``max_level``.
+
+    Call sites are told apart by logger name and message template, so a chatty
+    debug line is thinned out without hiding rarer ones.
+
+    Args:
+        rate: Keep one record out of this many, 1 keeps everything
+        max_level: Records at or above this level are never sampled
+    """
+
+    def __init__(self, rate: int, max_level: int = logging.INFO) -> None:
+        super().__init__()
+        self.rate = max(1, rate)
+        self.max_level = max_level
+        self._seen: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate == 1 or record.levelno >= self.max_level:
+            return True
+        key = (record.name, str(record.msg))
+        count = self._seen[key]
+        self._seen[key] = count + 1
+        if count % self.rate:
+            LOG_RECORDS_SAMPLED.inc()
+            return False
+        return True
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Queue handler that drops records instead of blocking when the queue is full."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def configure_logging(
+    level: str = "INFO",
+    filename: Optional[str] = None,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    module_levels: Optional[Dict[str, int]] = None,
+    sample_rate: int = 1,
+    queue_size: int = 10000,
+    json_format: bool = False,
+) -> QueueListener:
+    """
+    Route every log record through a bounded queue to file and console handlers.
+
+    The root logger only gets a queue handler, so logging on the event loop
+    never touches the disk. A listener thread formats the records and writes
+    them to a size-rotated file and stderr. Stop the returned listener on
+    shutdown to flush what is left in the queue.
+
+    Args:
+        level: Root log level name
+        filename: Log file, rotated once it reaches max_bytes; None logs to stderr only
+        max_bytes: Size at which the log file is rotated
+        backup_count: Rotated files to keep
+        module_levels: Levels for specific loggers, overriding the root level
+        sample_rate: Keep one in this many debug records per call site
+        queue_size: Records buffered before new ones are dropped
+        json_format: Write JSON lines instead of plain text
+
+    Returns:
+        The started queue listener
+    """
+    formatter: logging.Formatter = (
+        JsonFormatter() if json_format else logging.Formatter(TEXT_FORMAT)
+    )
+    handlers: List[logging.Handler] = [logging.StreamHandler(sys.stderr)]
+    if filename:
+        handlers.append(
+            RotatingFileHandler(
+                filename, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+        )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = DroppingQueueHandler(queue.Queue(queue_size))
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(logging.getLevelName(level.upper()))
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
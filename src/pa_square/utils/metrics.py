@@ -0,0 +1,297 @@
+"""In-process metrics registry with Prometheus export and periodic summaries."""
+
+import asyncio
+import logging
+import math
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Sequence[str], values: LabelValues) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{value}"'.replace("\n", " ") for name, value in zip(names, values)
+    )
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """Base for metrics with a fixed set of label names."""
+
+    metric_type = ""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+
+    def render(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> None:
+        super().__init__(name, help_text, label_names)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        """Increase the counter for a label set."""
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels: object) -> float:
+        """Current value for a label set."""
+        return self.values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+        lines = self._header()
+        for key, value in sorted(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(self.label_names, key)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    metric_type = "gauge"
+
+    def set(self, value: float, **labels: object) -> None:
+        """Set the gauge for a label set."""
+        self.values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """
+    Bucketed distribution of observed values per label set.
+
+    Args:
+        name: Metric name
+        help_text: Metric description
+        label_names: Names of the labels
+        buckets: Upper bounds of the buckets, ascending
+    """
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+        # Per label set: [bucket counts..., +Inf count], sum
+        self.counts: Dict[LabelValues, List[int]] = {}
+        self.sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: object) -> None:
+        """Record an observation for a label set."""
+        key = self._key(labels)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = [0] * (len(self.buckets) + 1)
+            self.sums[key] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def count(self, **labels: object) -> int:
+        """Number of observations for a label set."""
+        return sum(self.counts.get(self._key(labels), ()))
+
+    def quantile(self, q: float, key: LabelValues) -> float:
+        """
+        Estimate a quantile by interpolating within the matching bucket.
+
+        Args:
+            q: Quantile between 0 and 1
+            key: Label values of the series
+
+        Returns:
+            Estimated value, NaN without observations
+        """
+        counts = self.counts.get(key)
+        total = sum(counts) if counts else 0
+        if not total:
+            return math.nan
+        rank = q * total
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                if index == len(self.buckets):
+                    return lower
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def render(self) -> List[str]:
+        """Render the metric in the Prometheus text format."""
+        lines = self._header()
+        names = self.label_names + ("le",)
+        for key, counts in sorted(self.counts.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + (le,))} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {self.sums[key]:g}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric of the process."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Counter:
+        """Get or create a counter."""
+        return self._register(Counter(name, help_text, label_names))  # type: ignore[return-value]
+
+    def gauge(self, name: str, help_text: str, label_names: Sequence[str] = ()) -> Gauge:
+        """Get or create a gauge."""
+        return self._register(Gauge(name, help_text, label_names))  # type: ignore[return-value]
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        """Get or create a histogram."""
+        return self._register(  # type: ignore[return-value]
+            Histogram(name, help_text, label_names, buckets)
+        )
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text format."""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n" if lines else ""
+
+    def summary(self) -> List[str]:
+        """
+        Summarize histograms as one line per series with count and p50/p95/p99.
+
+        Returns:
+            Human-readable summary lines
+        """
+        lines = []
+        for metric in self._metrics.values():
+            if not isinstance(metric, Histogram):
+                continue
+            for key, counts in sorted(metric.counts.items()):
+                labels = " ".join(f"{n}={v}" for n, v in zip(metric.label_names, key))
+                p50, p95, p99 = (metric.quantile(q, key) for q in (0.5, 0.95, 0.99))
+                lines.append(
+                    f"{metric.name} {labels} count={sum(counts)} "
+                    f"p50={p50:.3f}s p95={p95:.3f}s p99={p99:.3f}s"
+                )
+        return lines
+
+
+class MetricsReporter:
+    """
+    Logs a summary of the registry at a fixed interval.
+
+    Args:
+        registry: Registry to summarize
+        interval: Seconds between summaries
+    """
+
+    def __init__(self, registry: MetricsRegistry, interval: float) -> None:
+        self.registry = registry
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start logging summaries in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop logging summaries."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            for line in self.registry.summary():
+                logger.info(line)
+
+
+# Process-wide registry and the instruments recorded on the hot paths
+REGISTRY = MetricsRegistry()
+
+HABITICA_REQUEST_SECONDS = REGISTRY.histogram(
+    "habitica_request_duration_seconds",
+    "Time from sending a Habitica request to receiving the response",
+    ("method", "endpoint"),
+)
+HABITICA_QUEUE_SECONDS = REGISTRY.histogram(
+    "habitica_queue_wait_seconds", "Time spent waiting for a rate limit slot", ("lane",)
+)
+HABITICA_RESPONSES = REGISTRY.counter(
+    "habitica_responses_total", "Habitica responses by status", ("method", "endpoint", "status")
+)
+HABITICA_ERRORS = REGISTRY.counter(
+    "habitica_request_errors_total", "Habitica requests that got no response", ("method", "error")
+)
+HABITICA_REQUEST_BYTES = REGISTRY.counter(
+    "habitica_request_bytes_total", "Bytes of request bodies sent to Habitica", ("endpoint",)
+)
+HABITICA_RESPONSE_BYTES = REGISTRY.counter(
+    "habitica_response_bytes_total", "Bytes of response bodies read from Habitica", ("endpoint",)
+)
+HABITICA_RATE_LIMIT_REMAINING = REGISTRY.gauge(
+    "habitica_rate_limit_remaining",
+    "Requests the default account's scheduler may still send right away, "
+    "never more than X-RateLimit-Remaining",
+)
+HABITICA_SYNCS = REGISTRY.counter(
+    "habitica_syncs_total", "Background task list syncs by outcome", ("outcome",)
+)
+HABITICA_SYNC_CHANGES = REGISTRY.counter(
+    "habitica_sync_changed_tasks_total", "Tasks added, changed or removed by background syncs"
+)
+COMMAND_SECONDS = REGISTRY.histogram(
+    "discord_command_duration_seconds", "Discord command execution time", ("command",)
+)
+COMMANDS = REGISTRY.counter(
+    "discord_commands_total", "Discord commands by outcome", ("command", "outcome")
+)
@@ -0,0 +1,79 @@
+import discord
+import pytest
+import pytest_asyncio
+from discord.ext import commands
+from unittest.mock import AsyncMock, Mock
+
+from src.pa_square.bot.commands import setup_commands
+from src.pa_square.habitica.connection import ConnectionPool
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.models import Task
+
+
+@pytest.fixture
+def manager():
+    """Fixture to create a manager with three cached todos and a stubbed write"""
+    manager = HabiticaManager(pool=ConnectionPool())
+    tasks = [Task(id=task_id, text=f"Task {task_id}", type="todo") for task_id in "abc"]
+    manager.cache.put(manager.cache_key("todos"), {"success": True, "data": tasks})
+    manager.habitica_request = AsyncMock(return_value={"success": True, "data": {}})
+    return manager
+
+
+@pytest_asyncio.fixture
+async def bot(manager):
+    """Fixture to create a bot with the commands set up and a stand-in outbound"""
+    bot = commands.Bot(command_prefix="!", intents=discord.Intents.none())
+    bot.outbound = Mock(send=AsyncMock())
+    await setup_commands(bot, manager, outbound=bot.outbound)
+    return bot
+
+
+def context(author_id=1):
+    """Create a command context for an author"""
+    ctx = Mock()
+    ctx.author.id = author_id
+    return ctx
+
+
+def scored(manager):
+    """Ids of the tasks scored so far"""
+    return [call.args[0].split("/")[-3] for call in manager.habitica_request.call_args_list]
+
+
+class TestDone:
+    @pytest.mark.asyncio
+    async def test_done_twice_uses_listed_numbers(self, bot, manager):
+        """Test a second !done picks the task listed under that number, not the shifted one"""
+        ctx = context()
+        await bot.get_command("todo").callback(ctx)
+        view = bot.outbound.send.call_args.kwargs["view"]
+
+        await bot.get_command("done").callback(ctx, "1")
+        await bot.get_command("done").callback(ctx, "2")
+
+        assert scored(manager) == ["a", "b"]
+        assert [task.id for task in view.tasks] == ["a", "b", "c"]
+        assert view.total == 3
+        assert view.render().fields[2].name == "3. Task c"
+
+    @pytest.mark.asyncio
+    async def test_done_same_number_twice(self, bot, manager):
+        """Test completing an already completed listed todo is refused"""
+        ctx = context()
+        await bot.get_command("todo").callback(ctx)
+
+        await bot.get_command("done").callback(ctx, "1")
+        await bot.get_command("done").callback(ctx, "1")
+
+        assert scored(manager) == ["a"]
+        assert "already gone" in bot.outbound.post.call_args.args[1]
+
+    @pytest.mark.asyncio
+    async def test_done_without_listing_uses_cache(self, bot, manager):
+        """Test numbers follow the current list when there is no live !todo view"""
+        ctx = context()
+        await bot.get_command("done").callback(ctx, "1")
+        await bot.get_command("done").callback(ctx, "1")
+
+        assert scored(manager) == ["a", "b"]
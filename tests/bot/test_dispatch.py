@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import Mock
+
+from src.pa_square.bot.dispatch import MESSAGES, CommandGate, Verdict, parse_ids
+
+
+def make_message(content, author_id=1, channel_id=10, bot=False):
+    """Create a stand-in Discord message"""
+    message = Mock()
+    message.content = content
+    message.author.id = author_id
+    message.author.bot = bot
+    message.channel.id = channel_id
+    return message
+
+
+@pytest.fixture
+def clock():
+    """Fixture to create a controllable clock"""
+    now = [0.0]
+    clock = lambda: now[0]
+    clock.now = now
+    return clock
+
+
+class TestCommandGate:
+    def test_rejects_before_parsing(self, clock):
+        """Test bots, ignored channels and plain chat never reach dispatch"""
+        gate = CommandGate("!", ignored_channels={99}, clock=clock)
+        assert gate.check(make_message("!todo", bot=True)) == Verdict.BOT_AUTHOR
+        assert gate.check(make_message("!todo", channel_id=99)) == Verdict.IGNORED_CHANNEL
+        assert gate.check(make_message("just chatting")) == Verdict.NO_PREFIX
+        assert gate.check(make_message("!todo")) == Verdict.DISPATCH
+
+    def test_duplicates_dropped_within_window(self, clock):
+        """Test a repeated command is only dispatched once per window"""
+        gate = CommandGate("!", dedup_window=2, clock=clock)
+        assert gate.check(make_message("!todo")) == Verdict.DISPATCH
+        assert gate.check(make_message("!todo")) == Verdict.DUPLICATE
+        assert gate.check(make_message("!todo", author_id=2)) == Verdict.DISPATCH
+        clock.now[0] = 2
+        assert gate.check(make_message("!todo")) == Verdict.DISPATCH
+
+    def test_cooldown_per_user(self, clock):
+        """Test users get a refilling command budget"""
+        gate = CommandGate("!", rate=2, per=10, dedup_window=0, clock=clock)
+        assert gate.check(make_message("!a")) == Verdict.DISPATCH
+        assert gate.check(make_message("!b")) == Verdict.DISPATCH
+        assert gate.check(make_message("!c")) == Verdict.COOLDOWN
+        assert gate.check(make_message("!c", author_id=2)) == Verdict.DISPATCH
+        clock.now[0] = 5
+        assert gate.check(make_message("!c")) == Verdict.DISPATCH
+
+    def test_dynamic_prefix_passes_everything(self, clock):
+        """Test without a static prefix only the other checks apply"""
+        gate = CommandGate(None, clock=clock)
+        assert gate.check(make_message("hello")) == Verdict.DISPATCH
+
+    def test_tracking_is_bounded(self, clock):
+        """Test the oldest users are forgotten past max_tracked"""
+        gate = CommandGate("!", max_tracked=2, clock=clock)
+        for author_id in range(5):
+            gate.check(make_message("!todo", author_id=author_id))
+        assert len(gate._buckets) == 2
+        assert len(gate._recent) == 2
+
+    def test_verdicts_are_counted(self, clock):
+        """Test every verdict is counted"""
+        gate = CommandGate("!", clock=clock)
+        before = MESSAGES.get(verdict="no_prefix")
+        gate.check(make_message("hi"))
+        assert MESSAGES.get(verdict="no_prefix") == before + 1
+
+    def test_parse_ids(self):
+        """Test channel id lists are parsed"""
+        assert parse_ids("1, 2,3") == {1, 2, 3}
+        assert parse_ids("") == frozenset()
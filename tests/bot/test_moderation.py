@@ -0,0 +1,81 @@
+import json
+import os
+
+import pytest
+
+from src.pa_square.bot.moderation import (
+    AUTOMATON_MIN_WORDS,
+    ModerationFilter,
+    WordAutomaton,
+    compile_matcher,
+    normalize,
+)
+
+
+@pytest.fixture
+def word_file(tmp_path):
+    """Fixture to create a word list file"""
+    path = tmp_path / "moderation.json"
+    path.write_text(json.dumps({"default": ["shit"], "guilds": {"42": ["heck"]}}))
+    return path
+
+
+class TestModeration:
+    def test_normalize_folds_case_width_and_leetspeak(self):
+        """Test look-alike spellings are folded together"""
+        assert normalize("SH1T") == "shit"
+        assert normalize("ｓｈｉｔ") == "shit"
+        assert normalize("sh\u200bit") == "shit"
+        assert normalize("Straße") == "strasse"
+
+    @pytest.mark.parametrize("filler", [0, AUTOMATON_MIN_WORDS])
+    def test_compile_matcher_matches_any_word(self, filler):
+        """Test words sharing prefixes are all matched, by short and long lists alike"""
+        find = compile_matcher(["car", "cart", "cat", "dog"] + [f"zz{n}q" for n in range(filler)])
+        bulk = normalize("zz7q zz")
+        assert find("a cart here") in ("car", "cart")
+        assert find("my cat") == "cat"
+        assert find("hotdog") == "dog"
+        assert find("ca") is None
+        assert find(bulk) == (normalize("zz7q") if filler else None)
+        assert compile_matcher(["", "  "]) is None
+
+    def test_automaton_follows_failure_links(self):
+        """Test a word inside a longer partial match is found"""
+        automaton = WordAutomaton(["abcd", "bc", "cde"])
+        assert automaton.find("xabce") == "bc"
+        assert automaton.find("abcde") == "bc"
+        assert automaton.find("abxcdx") is None
+
+    def test_default_words(self):
+        """Test the built-in list keeps the original behavior"""
+        moderation = ModerationFilter()
+        assert moderation.check(None, "well $h!t") == "shit"
+        assert moderation.check(1, "all good") is None
+
+    def test_guild_words_extend_default(self, word_file):
+        """Test guild lists add to the default list"""
+        moderation = ModerationFilter(str(word_file))
+        assert moderation.check(42, "what the HECK") == "heck"
+        assert moderation.check(42, "shit") == "shit"
+        assert moderation.check(7, "what the heck") is None
+
+    def test_hot_reload(self, word_file):
+        """Test a changed file is picked up after the reload interval"""
+        now = [0.0]
+        moderation = ModerationFilter(str(word_file), reload_interval=10, clock=lambda: now[0])
+        word_file.write_text(json.dumps({"default": ["darn"]}))
+        os.utime(word_file, (1e9, 1e9))
+
+        assert moderation.check(None, "darn") is None
+        now[0] = 10
+        assert moderation.check(None, "darn") == "darn"
+        assert moderation.check(42, "heck") is None
+
+    def test_invalid_file_keeps_lists(self, word_file):
+        """Test a broken file leaves the previous lists in place"""
+        moderation = ModerationFilter(str(word_file))
+        word_file.write_text("{not json")
+        os.utime(word_file, (1e9, 1e9))
+        assert moderation.reload() is False
+        assert moderation.check(42, "heck") == "heck"
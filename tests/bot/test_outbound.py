@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import discord
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.pa_square.bot.outbound import Outbound
+
+
+def channel(channel_id=1):
+    """Create a stand-in text channel whose send returns a message"""
+    target = Mock(spec=["id", "send"])
+    target.id = channel_id
+    target.send = AsyncMock(side_effect=lambda content=None, **kwargs: Mock(content=content))
+    return target
+
+
+class TestOutbound:
+    @pytest.mark.asyncio
+    async def test_burst_is_coalesced(self):
+        """Test plain texts queued together go out as one message"""
+        outbound = Outbound()
+        target = channel()
+        futures = [outbound.post(target, f"line {n}") for n in range(3)]
+        messages = await asyncio.gather(*futures)
+
+        target.send.assert_awaited_once_with("line 0\nline 1\nline 2")
+        assert messages[0] is messages[2]
+
+    @pytest.mark.asyncio
+    async def test_rich_messages_keep_order_and_stay_separate(self):
+        """Test messages with embeds or replies are never merged"""
+        outbound = Outbound()
+        target = channel()
+        embed = discord.Embed(title="Poll")
+        outbound.post(target, "first")
+        outbound.post(target, embed=embed)
+        outbound.post(target, "last")
+        await outbound.join(target)
+
+        assert [c.args[:1] or (None,) for c in target.send.call_args_list] == [
+            ("first",), (None,), ("last",),
+        ]
+        assert target.send.call_args_list[1].kwargs == {"embed": embed}
+
+    @pytest.mark.asyncio
+    async def test_merged_messages_respect_length_limit(self):
+        """Test a burst longer than Discord allows is split"""
+        outbound = Outbound()
+        target = channel()
+        for _ in range(3):
+            outbound.post(target, "x" * 900)
+        await outbound.join(target)
+        assert [len(c.args[0]) for c in target.send.call_args_list] == [1801, 900]
+
+    @pytest.mark.asyncio
+    async def test_routes_are_paced_independently(self):
+        """Test a busy channel waits for its budget without holding up another"""
+        outbound = Outbound(rate=1, per=0.05)
+        busy, quiet = channel(1), channel(2)
+        started = time.monotonic()
+        for _ in range(3):
+            outbound.post(busy, embed=discord.Embed())
+        await outbound.send(quiet, "hi")
+        assert time.monotonic() - started < 0.04
+
+        await outbound.join()
+        assert busy.send.await_count == 3
+        assert time.monotonic() - started >= 0.09
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_route_is_retried(self):
+        """Test a long 429 handed back by discord.py blocks the route, then retries"""
+        outbound = Outbound()
+        target = channel()
+        sent = Mock()
+        target.send = AsyncMock(side_effect=[discord.RateLimited(0.02), sent])
+
+        assert await outbound.send(target, "hello") is sent
+        assert target.send.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_failures_reach_the_caller(self):
+        """Test errors are raised by send and only logged by post"""
+        outbound = Outbound()
+        target = channel()
+        target.send = AsyncMock(side_effect=discord.Forbidden(Mock(status=403), "no"))
+
+        with pytest.raises(discord.Forbidden):
+            await outbound.send(target, "hello")
+        future = outbound.post(target, "again")
+        await outbound.join(target)
+        assert isinstance(future.exception(), discord.Forbidden)
+
+    @pytest.mark.asyncio
+    async def test_bucket_follows_discord_headers(self):
+        """Test an exhausted Discord bucket pauses the route until it resets"""
+        outbound = Outbound()
+        target = channel(42)
+        await outbound.send(target, "first")
+
+        outbound.observe("POST", "/api/v10/channels/42/messages",
+                         {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "0.05"})
+        started = time.monotonic()
+        await outbound.send(target, "second")
+        assert time.monotonic() - started >= 0.04
+
+    @pytest.mark.asyncio
+    async def test_dm_route_learns_its_channel(self):
+        """Test headers of a DM channel reach the route of the user it belongs to"""
+        outbound = Outbound()
+        member = Mock(spec=discord.Member)
+        member.id = 7
+        member.send = AsyncMock(return_value=Mock(spec=discord.Message, channel=Mock(id=99)))
+        await outbound.send(member, "psst")
+
+        outbound.observe("POST", "/api/v10/channels/99/messages",
+                         {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset-After": "5"})
+        assert outbound._routes[("dm", 7)].bucket.wait_time() > 4
@@ -0,0 +1,69 @@
+import pytest
+from datetime import date
+
+from src.pa_square.bot.pagination import TaskFilter, TaskPaginator, count_matching, render_page
+from src.pa_square.habitica.models import ChecklistItem, Task
+
+
+def make_tasks(count):
+    return [
+        Task(
+            id=str(i),
+            text=f"task {i}",
+            date=f"2026-10-{i % 28 + 1:02d}T00:00:00.000Z",
+            tags=["work"] if i % 2 else [],
+            checklist=[ChecklistItem("step", completed=i % 3 == 0)],
+        )
+        for i in range(count)
+    ]
+
+
+class TestTaskFilter:
+    def test_parse(self):
+        """Test parsing filter arguments and resolving tag names"""
+        task_filter = TaskFilter.parse(
+            ["due:2026-10-05", "tag:Work", "checklist:open"], {"work": "tag-id"}
+        )
+        assert task_filter.due_before == date(2026, 10, 5)
+        assert task_filter.tag == "tag-id"
+        assert task_filter.checklist == "open"
+
+    def test_parse_unknown(self):
+        """Test unknown filters are rejected"""
+        with pytest.raises(ValueError):
+            TaskFilter.parse(["colour:blue"])
+
+    def test_matches(self):
+        """Test due date, tag and checklist criteria"""
+        tasks = make_tasks(10)
+        assert count_matching(tasks, TaskFilter(due_before=date(2026, 10, 3))) == 3
+        assert count_matching(tasks, TaskFilter(tag="work")) == 5
+        assert count_matching(tasks, TaskFilter(checklist="done")) == 4
+
+
+class TestRenderPage:
+    def test_page_size_is_constant(self):
+        """Test only one page of tasks is rendered regardless of list size"""
+        tasks = make_tasks(500)
+        embed = render_page(tasks, TaskFilter(), page=3, total=500, per_page=10)
+        assert len(embed.fields) == 10
+        assert embed.fields[0].name == "31. task 30"
+        assert embed.footer.text == "Page 4/50"
+
+    def test_long_text_truncated(self):
+        """Test field names stay within Discord's limits"""
+        embed = render_page([Task(id="a", text="x" * 1000)], TaskFilter(), page=0, total=1)
+        assert len(embed.fields[0].name) == 256
+
+
+class TestTaskPaginator:
+    @pytest.mark.asyncio
+    async def test_buttons_follow_page(self):
+        """Test navigation buttons are disabled at the ends"""
+        view = TaskPaginator(make_tasks(25), TaskFilter(), author_id=1, per_page=10)
+        assert view.pages == 3
+        assert view.previous_page.disabled
+        assert not view.next_page.disabled
+        view.page = 2
+        view._sync_buttons()
+        assert view.next_page.disabled
@@ -0,0 +1,178 @@
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.pa_square.bot.reminders import ReminderEngine, TimingWheel, reminders_for
+from src.pa_square.habitica.connection import ConnectionPool
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.models import Task
+
+# 2026-10-17T00:00:00Z
+NOW = 1792195200.0
+
+
+def task(task_id, date=None, reminders=(), completed=False):
+    """Create a Habitica task"""
+    return Task.from_dict({
+        "id": task_id,
+        "text": f"Task {task_id}",
+        "date": date,
+        "reminders": list(reminders),
+        "completed": completed,
+    })
+
+
+@pytest.fixture
+def clock():
+    """Fixture to create a controllable wall clock"""
+    now = [NOW]
+    clock = lambda: now[0]
+    clock.now = now
+    return clock
+
+
+@pytest.fixture
+def engine(clock, tmp_path):
+    """Fixture to create a reminder engine with a stand-in bot"""
+    bot = Mock()
+    user = Mock()
+    user.send = AsyncMock()
+    bot.get_user.return_value = user
+    manager = HabiticaManager(pool=ConnectionPool())
+    return ReminderEngine(
+        bot, manager, owner_id=1, state_path=str(tmp_path / "reminders.json"), clock=clock
+    )
+
+
+class TestTimingWheel:
+    def test_expires_in_order(self):
+        """Test items expire on their tick, oldest first"""
+        wheel = TimingWheel(tick=1.0, slots=10, now=0)
+        wheel.schedule(3, "c")
+        wheel.schedule(1.5, "b")
+        wheel.schedule(1, "a")
+        assert wheel.advance(1) == ["a"]
+        assert wheel.advance(5) == ["b", "c"]
+        assert len(wheel) == 0
+
+    def test_far_deadlines_wait_in_overflow(self):
+        """Test deadlines beyond one revolution are promoted when in range"""
+        wheel = TimingWheel(tick=1.0, slots=10, now=0)
+        wheel.schedule(25, "far")
+        wheel.schedule(-5, "past")
+        assert wheel.advance(1) == ["past"]
+        assert wheel.advance(20) == []
+        assert wheel.advance(25) == ["far"]
+
+    def test_catches_up_after_falling_behind(self):
+        """Test a jump of several revolutions expires everything due"""
+        wheel = TimingWheel(tick=1.0, slots=10, now=0)
+        for at in (5, 9, 50, 500):
+            wheel.schedule(at, at)
+        assert wheel.advance(100) == [5, 9, 50]
+        assert wheel.advance(500) == [500]
+
+
+class TestReminderEngine:
+    def test_reminders_for_tasks(self):
+        """Test due dates and reminder times become reminders, completed tasks don't"""
+        reminders = reminders_for(1, [
+            task("a", date="2026-10-18T00:00:00Z",
+                 reminders=[{"id": "r1", "time": "2026-10-17T09:00:00Z"}]),
+            task("b", date="2026-10-18", completed=True),
+            task("c"),
+        ])
+        assert sorted(r.key for r in reminders) == ["a:due", "a:r1"]
+
+    @pytest.mark.asyncio
+    async def test_due_reminders_batched_per_user(self, engine, clock):
+        """Test reminders due on the same tick are sent in one DM"""
+        engine.sync(1, [task("a", date="2026-10-17T00:00:05Z"),
+                        task("b", date="2026-10-17T00:00:05Z"),
+                        task("c", date="2026-10-18T00:00:00Z")])
+        clock.now[0] = NOW + 10
+        due = engine.due()
+        assert sorted(r.task for r in due) == ["a", "b"]
+        await engine.send(due)
+        user = engine.bot.get_user.return_value
+        user.send.assert_awaited_once()
+        assert "Task a" in user.send.call_args[0][0]
+        assert len(engine) == 1
+
+    @pytest.mark.asyncio
+    async def test_writer_failure_still_sends(self, engine, clock):
+        """Test a crashing writer falls back to templates instead of dropping the batch"""
+        engine.writer.write_many = AsyncMock(side_effect=RuntimeError("boom"))
+        engine.sync(1, [task("a", date="2026-10-17T00:00:05Z")])
+        clock.now[0] = NOW + 10
+        await engine.send(engine.due())
+        user = engine.bot.get_user.return_value
+        user.send.assert_awaited_once()
+        assert "Task a" in user.send.call_args[0][0]
+
+    def test_sync_cancels_and_reschedules(self, engine, clock):
+        """Test completed tasks are cancelled and moved due dates rescheduled"""
+        engine.sync(1, [task("a", date="2026-10-17T00:00:05Z"),
+                        task("b", date="2026-10-17T00:00:05Z")])
+        engine.sync(1, [task("a", date="2026-10-17T00:01:00Z"),
+                        task("b", date="2026-10-17T00:00:05Z", completed=True)])
+        clock.now[0] = NOW + 10
+        assert engine.due() == []
+        clock.now[0] = NOW + 60
+        assert [r.task for r in engine.due()] == ["a"]
+
+    def test_refresh_reads_cache(self, engine):
+        """Test reminders are loaded from the cached task list of the owner"""
+        manager = engine.habitica_manager
+        manager.cache.put(manager.cache_key("todos"), {"data": [task("a", date="2026-10-18")]})
+        engine.refresh()
+        assert len(engine) == 1
+
+    @pytest.mark.asyncio
+    async def test_state_survives_restart(self, engine, clock):
+        """Test pending reminders are saved and reloaded, stale ones dropped"""
+        engine.sync(1, [task("a", date="2026-10-17T02:00:00Z"),
+                        task("b", date="2026-10-17T00:00:30Z")])
+        await engine._save()
+        saved = json.loads(open(engine.state_path).read())
+        assert len(saved) == 2
+
+        clock.now[0] = NOW + 7200 + 3600
+        restored = ReminderEngine(
+            engine.bot, engine.habitica_manager, state_path=engine.state_path,
+            grace=3600, clock=clock,
+        )
+        restored._load()
+        clock.now[0] += 1
+        assert [r.task for r in restored.due()] == ["a"]
+
+    def test_refresh_keeps_restored_reminders_in_grace(self, engine, clock):
+        """Test a reminder missed during downtime survives the first refresh and fires"""
+        engine.sync(1, [task("a", date="2026-10-17T00:00:30Z")])
+        clock.now[0] = NOW + 600
+        restored = ReminderEngine(
+            engine.bot, engine.habitica_manager, grace=3600, clock=clock,
+        )
+        restored.schedule(engine._live[(1, "a:due")])
+        restored.sync(1, [task("a", date="2026-10-17T00:00:30Z")])
+        clock.now[0] += 1
+        assert [r.task for r in restored.due()] == ["a"]
+
+        restored.sync(1, [task("a", date="2026-10-17T00:00:30Z")])
+        assert len(restored) == 0
+
+    @pytest.mark.asyncio
+    async def test_failing_tick_keeps_loop_running(self, engine, clock):
+        """Test an error on one tick is logged and the next tick still runs"""
+        engine.bot.wait_until_ready = AsyncMock()
+        engine.tick = 0.001
+        engine.due = Mock(side_effect=[RuntimeError("boom")] + [[]] * 100)
+        engine.start()
+        for _ in range(100):
+            if engine.due.call_count >= 2:
+                break
+            await asyncio.sleep(0.001)
+        await engine.stop()
+        assert engine.due.call_count >= 2
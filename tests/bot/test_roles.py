@@ -0,0 +1,128 @@
+import asyncio
+
+import discord
+import pytest
+from discord.ext import commands
+from unittest.mock import AsyncMock, Mock
+
+from src.pa_square.bot.roles import RoleIndex, change_role, has_role
+
+
+class FakeGuild:
+    """Guild holding roles by id, like discord.Guild"""
+
+    def __init__(self, guild_id=1):
+        self.id = guild_id
+        self._roles = {}
+        self.scans = 0
+
+    @property
+    def roles(self):
+        self.scans += 1
+        return sorted(self._roles.values(), key=lambda role: role.position)
+
+    def get_role(self, role_id):
+        return self._roles.get(role_id)
+
+    def add(self, role_id, name, position):
+        role = Mock(spec=discord.Role, id=role_id, position=position, guild=self)
+        role.name = name
+        self._roles[role_id] = role
+        return role
+
+
+def member(member_id, role_ids=(), bot=False):
+    """Create a stand-in member holding some roles"""
+    m = Mock(spec=discord.Member, id=member_id, bot=bot)
+    m.get_role = lambda role_id: object() if role_id in role_ids else None
+    m.add_roles = AsyncMock()
+    m.remove_roles = AsyncMock()
+    return m
+
+
+class TestRoleIndex:
+    def test_lookup_builds_index_once(self):
+        """Test the first lookup indexes the guild and later ones don't scan"""
+        guild = FakeGuild()
+        follower = guild.add(10, "Follower", 1)
+        index = RoleIndex()
+        assert index.get(guild, "Follower") is follower
+        assert index.get(guild, "Follower") is follower
+        assert index.get(guild, "Missing") is None
+        assert index.get(None, "Follower") is None
+        assert guild.scans == 1
+
+    @pytest.mark.asyncio
+    async def test_events_keep_index_current(self):
+        """Test created, renamed and deleted roles are reflected"""
+        guild = FakeGuild()
+        old = guild.add(10, "Follower", 2)
+        index = RoleIndex()
+        index.get(guild, "Follower")
+
+        lower = guild.add(11, "Follower", 1)
+        await index.on_guild_role_create(lower)
+        assert index.get(guild, "Follower") is lower
+
+        renamed = guild.add(11, "Leader", 1)
+        await index.on_guild_role_update(lower, renamed)
+        assert index.get(guild, "Leader") is renamed
+        assert index.get(guild, "Follower") is old
+
+        del guild._roles[10]
+        await index.on_guild_role_delete(old)
+        assert index.get(guild, "Follower") is None
+
+    def test_has_role_check(self):
+        """Test the check passes role holders and raises MissingRole otherwise"""
+        guild = FakeGuild()
+        guild.add(10, "Follower", 1)
+        check = has_role(RoleIndex(), "Follower")(lambda ctx: None).__commands_checks__[0]
+
+        assert check(Mock(guild=guild, author=member(1, role_ids=(10,))))
+        with pytest.raises(commands.MissingRole):
+            check(Mock(guild=guild, author=member(2)))
+        with pytest.raises(commands.NoPrivateMessage):
+            check(Mock(guild=None))
+
+
+class TestChangeRole:
+    @pytest.mark.asyncio
+    async def test_skips_members_and_bounds_concurrency(self):
+        """Test only members needing the change are touched, a few at a time"""
+        role = FakeGuild().add(10, "Follower", 1)
+        in_flight = peak = 0
+
+        async def add_roles(*args, **kwargs):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+
+        members = [member(n) for n in range(20)]
+        for m in members:
+            m.add_roles.side_effect = add_roles
+        members += [member(98, role_ids=(10,)), member(99, bot=True)]
+
+        result = await change_role(members, role, add=True, concurrency=3)
+        assert (result.changed, result.skipped, result.failed) == (20, 2, 0)
+        assert peak == 3
+        members[-2].add_roles.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rate_limits_are_retried_and_progress_reported(self):
+        """Test a RateLimited change is retried and progress is reported"""
+        role = FakeGuild().add(10, "Follower", 1)
+        limited = member(1, role_ids=(10,))
+        limited.remove_roles.side_effect = [discord.RateLimited(0.001), None]
+        forbidden = member(2, role_ids=(10,))
+        forbidden.remove_roles.side_effect = discord.Forbidden(Mock(status=403), "no")
+        progress = AsyncMock()
+
+        result = await change_role(
+            [limited, forbidden], role, add=False, progress=progress, progress_interval=0
+        )
+        assert (result.changed, result.failed) == (1, 1)
+        assert limited.remove_roles.await_count == 2
+        assert progress.await_args_list[-1].args == (2, 2)
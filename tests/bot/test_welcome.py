@@ -0,0 +1,111 @@
+import asyncio
+
+import discord
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.pa_square.bot.welcome import WelcomeQueue
+
+
+class FakeClock:
+    """Manually advanced monotonic clock"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def guild(guild_id, roles=()):
+    """Create a stand-in guild"""
+    return Mock(id=guild_id, roles=list(roles))
+
+
+def member(member_id, in_guild):
+    """Create a stand-in member of a guild"""
+    joined = Mock(spec=discord.Member)
+    joined.id = member_id
+    joined.name = f"member{member_id}"
+    joined.guild = in_guild
+    joined.send = AsyncMock()
+    joined.add_roles = AsyncMock()
+    return joined
+
+
+def forbidden():
+    return discord.Forbidden(Mock(status=403), "Cannot send messages to this user")
+
+
+class TestWelcomeQueue:
+    def test_guilds_are_capped_and_served_round_robin(self):
+        """Test a raid on one guild drains at its rate without starving another"""
+        clock = FakeClock()
+        queue = WelcomeQueue(guild_rate=2, guild_per=1.0, batch_size=10, clock=clock)
+        raided, quiet = guild(1), guild(2)
+        queue.start = Mock()
+        for n in range(5):
+            queue.submit(member(n, raided))
+        queue.submit(member(9, quiet))
+
+        first, _ = queue.take()
+        second, _ = queue.take()
+        assert [m.id for m in first] == [0, 1]
+        assert [m.id for m in second] == [9]
+        batch, wait = queue.take()
+        assert batch == [] and wait == pytest.approx(0.5)
+
+        clock.now = 1.0
+        assert [m.id for m in queue.take()[0]] == [2, 3]
+        assert len(queue) == 1
+
+    def test_full_queue_drops_joins(self):
+        """Test joins beyond the bound are refused instead of piling up"""
+        queue = WelcomeQueue(max_pending=2)
+        queue.start = Mock()
+        assert [queue.submit(member(n, guild(1))) for n in range(3)] == [True, True, False]
+
+    @pytest.mark.asyncio
+    async def test_refused_dms_are_remembered(self):
+        """Test members with closed DMs are not DMed again until the TTL passes"""
+        clock = FakeClock()
+        queue = WelcomeQueue(refusal_ttl=60, clock=clock)
+        closed = member(1, guild(1))
+        closed.send.side_effect = forbidden()
+
+        await queue.welcome_batch([closed])
+        await queue.welcome_batch([closed])
+        closed.send.assert_awaited_once()
+        assert queue.refuses_dms(1)
+
+        clock.now = 61
+        assert not queue.refuses_dms(1)
+
+    @pytest.mark.asyncio
+    async def test_default_role_is_assigned(self):
+        """Test the role is looked up once per batch and given to every member"""
+        role = Mock(spec=discord.Role)
+        role.name = "PAPA Follower"
+        joined = guild(1, roles=[role])
+        queue = WelcomeQueue(role_name="PAPA Follower")
+        members = [member(n, joined) for n in range(3)]
+
+        await queue.welcome_batch(members)
+        for m in members:
+            m.add_roles.assert_awaited_once_with(role, reason="Welcome")
+            m.send.assert_awaited_once_with(f"Welcome {m.name}")
+
+    @pytest.mark.asyncio
+    async def test_workers_drain_the_queue(self):
+        """Test submitted joins are welcomed by the background workers"""
+        queue = WelcomeQueue(workers=2, guild_rate=100)
+        members = [member(n, guild(n % 3)) for n in range(20)]
+        for m in members:
+            queue.submit(m)
+        for _ in range(50):
+            if all(m.send.await_count for m in members):
+                break
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        assert all(m.send.await_count == 1 for m in members)
+        assert len(queue) == 0
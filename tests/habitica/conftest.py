@@ -0,0 +1,47 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from src.pa_square.habitica.cache import TaskCache
+from src.pa_square.habitica.connection import ConnectionPool
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.store import TaskStore
+
+
+@pytest.fixture
+def store():
+    """Fixture to create an in-memory task store"""
+    store = TaskStore()
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def habitica_manager(store):
+    """Fixture to create a logged-in HabiticaManager backed by the store"""
+    manager = HabiticaManager(
+        pool=ConnectionPool(), cache=TaskCache(), store=store, username="test_user"
+    )
+    manager.token = "test_token"
+    manager.user_id = "test_user_id"
+    manager.headers = {"test": "header"}
+    manager.x_client = "test_client"
+    manager.session = AsyncMock()
+    manager.session.closed = False
+    manager.retry_policy.base_delay = 0.001
+    return manager
+
+
+@pytest.fixture
+def mock_response():
+    """Fixture to create stand-in aiohttp responses"""
+
+    def make(status, body=None, headers=None):
+        response = AsyncMock()
+        response.status = status
+        response.headers = headers or {}
+        response.json = AsyncMock(return_value=body)
+        response.__aenter__ = AsyncMock(return_value=response)
+        response.__aexit__ = AsyncMock()
+        return response
+
+    return make
@@ -0,0 +1,79 @@
+from src.pa_square.habitica.cache import TaskCache
+from src.pa_square.habitica.models import Task
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTaskCache:
+    def test_hit_and_miss_counters(self):
+        """Test lookups are counted as hits or misses"""
+        cache = TaskCache(ttl=10, clock=FakeClock())
+        assert cache.get(("user", "todos")) is None
+        cache.put(("user", "todos"), {"data": []})
+        assert cache.get(("user", "todos")).data == {"data": []}
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_expired_entry_kept_for_revalidation(self):
+        """Test stale entries miss but stay available with their ETag"""
+        clock = FakeClock()
+        cache = TaskCache(ttl=10, clock=clock)
+        cache.put(("user", "todos"), {"data": []}, etag='W/"abc"')
+        clock.now = 11
+        assert cache.get(("user", "todos")) is None
+        assert cache.peek(("user", "todos")).etag == 'W/"abc"'
+        cache.revalidated(("user", "todos"))
+        assert cache.get(("user", "todos")) is not None
+
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted when full"""
+        cache = TaskCache(ttl=10, max_entries=2, clock=FakeClock())
+        cache.put(("a", "todos"), 1)
+        cache.put(("b", "todos"), 2)
+        cache.get(("a", "todos"))
+        cache.put(("c", "todos"), 3)
+        assert cache.peek(("b", "todos")) is None
+        assert cache.peek(("a", "todos")) is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_add_task_write_through(self):
+        """Test created tasks are appended to the cached list"""
+        cache = TaskCache(ttl=10, clock=FakeClock())
+        cache.put(("user", "todos"), {"data": [{"id": 1}]})
+        cache.add_task(("user", "todos"), {"id": 2})
+        assert cache.peek(("user", "todos")).data["data"] == [{"id": 1}, {"id": 2}]
+
+    def test_merge_keeps_unchanged_tasks(self):
+        """Test merging a fresh list replaces only changed tasks, in place"""
+        clock = FakeClock()
+        cache = TaskCache(ttl=10, clock=clock)
+        a = Task(id="a", updated_at="1")
+        cache.put(("user", "todos"), {"data": [a, Task(id="b", updated_at="1")]}, etag="old")
+        tasks = cache.peek(("user", "todos")).data["data"]
+        clock.now = 11
+
+        changed, removed = cache.merge(("user", "todos"), [
+            Task(id="a", updated_at="1"),
+            Task(id="c", updated_at="2"),
+        ], etag="new")
+        assert [task.id for task in changed] == ["c"]
+        assert removed == ["b"]
+        assert tasks[0] is a and [task.id for task in tasks] == ["a", "c"]
+        assert cache.get(("user", "todos")).etag == "new"
+
+    def test_invalidate(self):
+        """Test invalidating a user's entries"""
+        cache = TaskCache(ttl=10, clock=FakeClock())
+        cache.put(("user", "todos"), 1)
+        cache.put(("user", "dailys"), 2)
+        cache.put(("other", "todos"), 3)
+        cache.invalidate("user", "todos")
+        assert len(cache) == 2
+        cache.invalidate("user")
+        assert len(cache) == 1
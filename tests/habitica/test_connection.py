@@ -0,0 +1,39 @@
+import pytest
+import aiohttp
+
+from src.pa_square.habitica.connection import ConnectionPool, get_default_pool
+
+
+class TestConnectionPool:
+    @pytest.mark.asyncio
+    async def test_sessions_share_connector(self):
+        """Test sessions borrow the same connector without owning it"""
+        pool = ConnectionPool(limit_per_host=4, ttl_dns_cache=120)
+        first = pool.create_session()
+        second = pool.create_session()
+        try:
+            assert first.connector is second.connector
+            assert first.connector.limit_per_host == 4
+        finally:
+            await first.close()
+            await second.close()
+        # Closing sessions leaves the pooled connector open
+        assert not pool.closed
+        await pool.close()
+        assert pool.closed
+
+    @pytest.mark.asyncio
+    async def test_timeouts_applied(self):
+        """Test sessions use the pool's explicit timeouts"""
+        timeout = aiohttp.ClientTimeout(total=5, connect=1)
+        pool = ConnectionPool(timeout=timeout)
+        session = pool.create_session()
+        try:
+            assert session.timeout == timeout
+        finally:
+            await session.close()
+            await pool.close()
+
+    def test_default_pool_is_shared(self):
+        """Test the default pool is a process-wide singleton"""
+        assert get_default_pool() is get_default_pool()
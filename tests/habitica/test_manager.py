@@ -3,12 +3,15 @@ import asyncio
 from unittest.mock import Mock, patch, AsyncMock
 import aiohttp
 
+from src.pa_square.habitica.models import Task, dumps, loads
+
 
 @pytest.fixture
 def habitica_manager():
     """Fixture to create a HabiticaManager instance"""
+    from src.pa_square.habitica.connection import ConnectionPool
     from src.pa_square.habitica.manager import HabiticaManager
-    return HabiticaManager()
+    return HabiticaManager(pool=ConnectionPool())
 
 
 @pytest.fixture
@@ -76,11 +79,17 @@ class TestHabiticaManager:
         habitica_manager.headers = {"test": "header"}
         habitica_manager.x_client = "test_client"
         
-        with patch('aiohttp.ClientSession') as mock_session:
+        with patch('aiohttp.TCPConnector') as mock_connector, \
+                patch('aiohttp.ClientSession') as mock_session:
             status, message = habitica_manager.ensure_session()
             assert status == 200
             assert message == "Session created"
-            mock_session.assert_called_once_with(headers=habitica_manager.headers)
+            mock_session.assert_called_once_with(
+                connector=mock_connector.return_value,
+                connector_owner=False,
+                timeout=habitica_manager.pool.timeout,
+                json_serialize=dumps,
+            )
 
     def test_ensure_session_already_active(self, habitica_manager):
         """Test ensure_session when session is already active"""
@@ -191,7 +200,7 @@ class TestHabiticaManager:
 
     @pytest.mark.asyncio
     async def test_habitica_request_unauthorized(self, habitica_manager):
-        """Test handling 401 unauthorized response"""
+        """Test handling 401 unauthorized response when logging in again also fails"""
         habitica_manager.token = "test_token"
         habitica_manager.user_id = "test_user_id"
         habitica_manager.headers = {"test": "header"}
@@ -204,11 +213,75 @@ class TestHabiticaManager:
         
         mock_session = AsyncMock()
         mock_session.get = Mock(return_value=mock_response)
+        mock_session.post = Mock(return_value=mock_response)
         mock_session.closed = False
         habitica_manager.session = mock_session
         
         result = await habitica_manager.habitica_request("/test", method="GET")
         assert result == (None, "Unauthorized: 401")
+        mock_session.post.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_habitica_request_reauthenticates_and_replays(self, habitica_manager):
+        """Test a 401 triggers a fresh login and the request is replayed"""
+        habitica_manager.token = "expired_token"
+        habitica_manager.user_id = "test_user_id"
+        habitica_manager.headers = {"x-api-key": "expired_token"}
+        habitica_manager.x_client = "test_client"
+
+        def get(url, headers=None, params=None):
+            response = AsyncMock()
+            response.status = 200 if headers["x-api-key"] == "fresh_token" else 401
+            response.json = AsyncMock(return_value={"data": "replayed"})
+            response.__aenter__ = AsyncMock(return_value=response)
+            response.__aexit__ = AsyncMock()
+            return response
+
+        login_response = AsyncMock()
+        login_response.status = 200
+        login_response.json = AsyncMock(return_value={
+            "data": {"apiToken": "fresh_token", "id": "test_user_id"}
+        })
+        login_response.__aenter__ = AsyncMock(return_value=login_response)
+        login_response.__aexit__ = AsyncMock()
+
+        mock_session = AsyncMock()
+        mock_session.get = Mock(side_effect=get)
+        mock_session.post = Mock(return_value=login_response)
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        result = await habitica_manager.habitica_request("/test", method="GET")
+        assert result == {"data": "replayed"}
+        assert mock_session.get.call_count == 2
+        assert habitica_manager.token == "fresh_token"
+
+    @pytest.mark.asyncio
+    async def test_stored_token_skips_login(self, habitica_manager):
+        """Test a token from the token store is used without logging in"""
+        from src.pa_square.habitica.credentials import EncryptedStore
+
+        habitica_manager.token_store = EncryptedStore()
+        habitica_manager.token_store.set(
+            habitica_manager.username, '{"token": "stored_token", "user_id": "stored_id"}'
+        )
+
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.json = AsyncMock(return_value={"data": "ok"})
+        mock_response.__aenter__ = AsyncMock(return_value=mock_response)
+        mock_response.__aexit__ = AsyncMock()
+
+        mock_session = AsyncMock()
+        mock_session.get = Mock(return_value=mock_response)
+        mock_session.post = Mock()
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        result = await habitica_manager.habitica_request("/test", method="GET")
+        assert result == {"data": "ok"}
+        mock_session.post.assert_not_called()
+        assert mock_session.get.call_args.kwargs["headers"]["x-api-key"] == "stored_token"
 
     @pytest.mark.asyncio
     async def test_habitica_request_bad_request(self, habitica_manager):
@@ -241,7 +314,7 @@ class TestHabiticaManager:
         
         mock_response = AsyncMock()
         mock_response.status = 200
-        mock_response.json = AsyncMock(return_value={"data": [{"id": 1, "text": "Test todo"}]})
+        mock_response.json = AsyncMock(return_value={"data": [{"id": "1", "text": "Test todo"}]})
         mock_response.__aenter__ = AsyncMock(return_value=mock_response)
         mock_response.__aexit__ = AsyncMock()
         
@@ -251,7 +324,7 @@ class TestHabiticaManager:
         habitica_manager.session = mock_session
         
         result = await habitica_manager.get_todos("todos")
-        assert result == {"data": [{"id": 1, "text": "Test todo"}]}
+        assert result == {"data": [Task(id="1", text="Test todo")]}
 
     @pytest.mark.asyncio
     async def test_habitica_request_client_error(self, habitica_manager):
@@ -284,3 +357,259 @@ class TestHabiticaManager:
 
         result = await habitica_manager.habitica_request("/test", method="GET")
         assert result == (None, "Request timed out")
+
+    @pytest.mark.asyncio
+    async def test_habitica_request_rate_limited(self, habitica_manager):
+        """Test a 429 response blocks the scheduler for Retry-After seconds"""
+        habitica_manager.token = "test_token"
+        habitica_manager.user_id = "test_user_id"
+        habitica_manager.headers = {"test": "header"}
+        habitica_manager.x_client = "test_client"
+
+        mock_response = AsyncMock()
+        mock_response.status = 429
+        mock_response.headers = {"X-RateLimit-Remaining": "0", "Retry-After": "20"}
+        mock_response.__aenter__ = AsyncMock(return_value=mock_response)
+        mock_response.__aexit__ = AsyncMock()
+
+        mock_session = AsyncMock()
+        mock_session.get = Mock(return_value=mock_response)
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        result = await habitica_manager.habitica_request("/test", method="GET")
+        assert result == (None, "Rate limited: 429")
+        assert habitica_manager.scheduler.bucket.wait_time() > 19
+
+    @pytest.mark.asyncio
+    async def test_get_todos_served_from_cache(self, habitica_manager):
+        """Test repeated reads are answered from the cache"""
+        habitica_manager.token = "test_token"
+        habitica_manager.user_id = "test_user_id"
+        habitica_manager.headers = {"test": "header"}
+        habitica_manager.x_client = "test_client"
+
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.headers = {"ETag": 'W/"v1"'}
+        mock_response.json = AsyncMock(return_value={"data": [{"id": "1"}]})
+        mock_response.__aenter__ = AsyncMock(return_value=mock_response)
+        mock_response.__aexit__ = AsyncMock()
+
+        mock_session = AsyncMock()
+        mock_session.get = Mock(return_value=mock_response)
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        first = await habitica_manager.get_todos("todos")
+        second = await habitica_manager.get_todos("todos")
+        assert first == second == {"data": [Task(id="1")]}
+        mock_session.get.assert_called_once()
+        assert habitica_manager.cache.stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_get_todos_revalidates_with_etag(self, habitica_manager):
+        """Test stale lists are revalidated and a 304 reuses the cached data"""
+        habitica_manager.token = "test_token"
+        habitica_manager.user_id = "test_user_id"
+        habitica_manager.headers = {"test": "header"}
+        habitica_manager.x_client = "test_client"
+        habitica_manager.cache.ttl = 0
+        habitica_manager.cache.put(("test_user_id", "todos"), {"data": ["cached"]}, 'W/"v1"')
+
+        mock_response = AsyncMock()
+        mock_response.status = 304
+        mock_response.headers = {}
+        mock_response.__aenter__ = AsyncMock(return_value=mock_response)
+        mock_response.__aexit__ = AsyncMock()
+
+        mock_session = AsyncMock()
+        mock_session.get = Mock(return_value=mock_response)
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        result = await habitica_manager.get_todos("todos")
+        assert result == {"data": ["cached"]}
+        sent_headers = mock_session.get.call_args.kwargs["headers"]
+        assert sent_headers["If-None-Match"] == 'W/"v1"'
+        assert habitica_manager.cache.stats()["revalidations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_get_todos_coalesced(self, habitica_manager):
+        """Test concurrent identical reads share one request"""
+        habitica_manager.token = "test_token"
+        habitica_manager.user_id = "test_user_id"
+        habitica_manager.headers = {"test": "header"}
+        habitica_manager.x_client = "test_client"
+
+        async def slow_json(loads=None):
+            await asyncio.sleep(0.01)
+            return {"data": []}
+
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.json = slow_json
+        mock_response.__aenter__ = AsyncMock(return_value=mock_response)
+        mock_response.__aexit__ = AsyncMock()
+
+        mock_session = AsyncMock()
+        mock_session.get = Mock(return_value=mock_response)
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        results = await asyncio.gather(*(habitica_manager.get_todos("todos") for _ in range(5)))
+        assert all(result == {"data": []} for result in results)
+        mock_session.get.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_fetch_token_logs_in_once(self, habitica_manager):
+        """Test concurrent token refreshes share one login"""
+        async def slow_json(loads=None):
+            await asyncio.sleep(0.01)
+            return {"data": {"apiToken": "test_token", "id": "test_user_id"}}
+
+        mock_response = AsyncMock()
+        mock_response.status = 200
+        mock_response.json = slow_json
+        mock_response.__aenter__ = AsyncMock(return_value=mock_response)
+        mock_response.__aexit__ = AsyncMock()
+
+        mock_session = AsyncMock()
+        mock_session.post = Mock(return_value=mock_response)
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        await asyncio.gather(*(habitica_manager.fetch_token() for _ in range(5)))
+        mock_session.post.assert_called_once()
+        assert habitica_manager.token == "test_token"
+
+    @pytest.mark.asyncio
+    async def test_create_todos_bulk_array_body(self, habitica_manager):
+        """Test bulk creation sends chunks as array bodies"""
+        habitica_manager.token = "test_token"
+        habitica_manager.user_id = "test_user_id"
+        habitica_manager.headers = {"test": "header"}
+        habitica_manager.x_client = "test_client"
+
+        def post(url, headers=None, data=None):
+            body = loads(data)
+            response = AsyncMock()
+            response.status = 201
+            response.json = AsyncMock(return_value={"data": [{"text": b["text"]} for b in body]})
+            response.__aenter__ = AsyncMock(return_value=response)
+            response.__aexit__ = AsyncMock()
+            return response
+
+        mock_session = AsyncMock()
+        mock_session.post = Mock(side_effect=post)
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        specs = [{"text": f"task {i}"} for i in range(5)]
+        results = await habitica_manager.create_todos_bulk(specs, chunk_size=2)
+        assert mock_session.post.call_count == 3
+        assert [result.task["text"] for result in results] == [f"task {i}" for i in range(5)]
+        assert all(result.ok for result in results)
+
+    @pytest.mark.asyncio
+    async def test_create_todos_bulk_falls_back_on_bad_request(self, habitica_manager):
+        """Test a rejected chunk is retried per task to report partial failures"""
+        habitica_manager.token = "test_token"
+        habitica_manager.user_id = "test_user_id"
+        habitica_manager.headers = {"test": "header"}
+        habitica_manager.x_client = "test_client"
+
+        def post(url, headers=None, data=None):
+            body = loads(data)
+            response = AsyncMock()
+            if isinstance(body, list) or not body["text"]:
+                response.status = 400
+            else:
+                response.status = 201
+                response.json = AsyncMock(return_value={"data": {"text": body["text"]}})
+            response.__aenter__ = AsyncMock(return_value=response)
+            response.__aexit__ = AsyncMock()
+            return response
+
+        mock_session = AsyncMock()
+        mock_session.post = Mock(side_effect=post)
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        results = await habitica_manager.create_todos_bulk([{"text": "ok"}, {"text": ""}])
+        assert [result.ok for result in results] == [True, False]
+        assert results[1].error == "Bad Request: 400"
+
+    @pytest.mark.asyncio
+    async def test_habitica_request_retries_server_error(self, habitica_manager):
+        """Test a GET that hits a 502 is retried"""
+        habitica_manager.token = "test_token"
+        habitica_manager.user_id = "test_user_id"
+        habitica_manager.headers = {"test": "header"}
+        habitica_manager.x_client = "test_client"
+        habitica_manager.retry_policy.base_delay = 0.001
+
+        responses = []
+        for status in (502, 200):
+            response = AsyncMock()
+            response.status = status
+            response.json = AsyncMock(return_value={"data": "recovered"})
+            response.__aenter__ = AsyncMock(return_value=response)
+            response.__aexit__ = AsyncMock()
+            responses.append(response)
+
+        mock_session = AsyncMock()
+        mock_session.get = Mock(side_effect=responses)
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        result = await habitica_manager.habitica_request("/test", method="GET")
+        assert result == {"data": "recovered"}
+        assert mock_session.get.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_habitica_request_fails_fast_when_circuit_open(self, habitica_manager):
+        """Test requests are refused without a network call while the circuit is open"""
+        habitica_manager.token = "test_token"
+        habitica_manager.user_id = "test_user_id"
+        habitica_manager.headers = {"test": "header"}
+        habitica_manager.x_client = "test_client"
+        habitica_manager.breaker.allow = Mock(return_value=False)
+
+        mock_session = AsyncMock()
+        mock_session.get = Mock()
+        mock_session.closed = False
+        habitica_manager.session = mock_session
+
+        result = await habitica_manager.habitica_request("/test", method="GET")
+        assert result == (None, "Habitica is unavailable, try again later")
+        mock_session.get.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_login_fails_fast_when_circuit_open(self, habitica_manager):
+        """Test a logged-out manager doesn't try to log in while the circuit is open"""
+        habitica_manager.breaker.allow = Mock(return_value=False)
+        habitica_manager.session = AsyncMock()
+        habitica_manager.session.closed = False
+        habitica_manager.session.post = Mock()
+
+        result = await habitica_manager.habitica_request("/test", method="GET")
+        assert result == (None, "Habitica is unavailable, try again later")
+        habitica_manager.session.post.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unreachable_login_is_retried_and_recorded(self, habitica_manager):
+        """Test a login that can't connect is retried and counts against the circuit"""
+        habitica_manager.retry_policy.base_delay = 0.001
+        habitica_manager.retry_policy.max_attempts = 3
+        habitica_manager.breaker.record_failure = Mock()
+        habitica_manager.session = AsyncMock()
+        habitica_manager.session.closed = False
+        habitica_manager.session.post = Mock(
+            side_effect=aiohttp.ClientConnectorError(Mock(), OSError("refused"))
+        )
+
+        result = await habitica_manager.habitica_request("/test", method="GET")
+        assert result[1].startswith("Connection failed")
+        assert habitica_manager.session.post.call_count == 3
+        assert habitica_manager.breaker.record_failure.call_count == 3
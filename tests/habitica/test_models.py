@@ -0,0 +1,54 @@
+import pytest
+
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.models import Task, decode_tasks, dumps, encode_task, loads
+
+
+class TestTask:
+    def test_round_trip(self):
+        """Test decoding keeps the used fields and drops the rest"""
+        raw = {
+            "id": "a",
+            "type": "todo",
+            "text": "Write tests",
+            "date": "2026-10-18T00:00:00.000Z",
+            "checklist": [{"id": "c1", "text": "step", "completed": True}],
+            "reminders": [{"id": "r1", "time": "2026-10-17T09:00:00.000Z"}],
+            "updatedAt": "2026-10-17T00:00:00.000Z",
+            "history": [{"date": 1, "value": 2}],
+        }
+        task = Task.from_dict(raw)
+        assert task.checklist[0].completed and task.reminders[0].id == "r1"
+        encoded = task.to_dict()
+        assert "history" not in encoded
+        assert Task.from_dict(loads(dumps(encoded))) == task
+
+    def test_slotted(self):
+        """Test tasks carry no per-instance dict"""
+        task, = decode_tasks([{"id": "a"}])
+        assert not hasattr(task, "__dict__")
+        with pytest.raises(AttributeError):
+            task.colour = "red"
+
+
+class TestEncodeTask:
+    def test_todo_body_omits_other_types_fields(self):
+        """Test a todo body only carries todo fields that are set"""
+        body = HabiticaManager._task_body("Buy milk", "todo", date="2026-10-18")
+        assert body == {"text": "Buy milk", "type": "todo", "date": "2026-10-18"}
+
+    def test_daily_and_habit_fields(self):
+        """Test fields are kept for the types that use them"""
+        daily = HabiticaManager._task_body("Stretch", "daily", every_x=2, priority=2)
+        assert daily == {
+            "text": "Stretch", "type": "daily", "priority": 2, "frequency": "daily", "everyX": 2,
+        }
+        habit = HabiticaManager._task_body("Drink water", "habit", down=True)
+        assert habit["up"] is True and habit["down"] is True
+        assert "frequency" not in habit
+
+    def test_unknown_type_only_drops_unset_fields(self):
+        """Test bodies of unknown types are passed through"""
+        assert encode_task({"type": "quest", "text": "x", "notes": None}) == {
+            "type": "quest", "text": "x",
+        }
@@ -0,0 +1,100 @@
+import pytest
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from src.pa_square.habitica.rate_limiter import (
+    Priority,
+    RequestScheduler,
+    TokenBucket,
+    parse_rate_limit_headers,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    def test_consume_and_refill(self):
+        """Test tokens are consumed and refilled over time"""
+        clock = FakeClock()
+        bucket = TokenBucket(capacity=2, refill_rate=1.0, clock=clock)
+        bucket.consume()
+        bucket.consume()
+        assert bucket.wait_time() == pytest.approx(1.0)
+        clock.now = 1.0
+        assert bucket.wait_time() == 0
+
+    def test_update_from_server_exhausted(self):
+        """Test the bucket blocks until reset when the server reports no requests left"""
+        clock = FakeClock()
+        bucket = TokenBucket(capacity=30, refill_rate=0.5, clock=clock)
+        bucket.update(remaining=0, reset_in=10.0)
+        assert bucket.wait_time() == pytest.approx(10.0)
+
+    def test_update_caps_tokens(self):
+        """Test server-reported remaining requests cap local tokens"""
+        bucket = TokenBucket(capacity=30, refill_rate=0.5, clock=FakeClock())
+        bucket.update(remaining=3, reset_in=None)
+        assert bucket.tokens == 3
+
+
+class TestParseRateLimitHeaders:
+    def test_javascript_date_reset(self):
+        """Test parsing Habitica's JavaScript Date reset header"""
+        reset = datetime.now(timezone.utc) + timedelta(seconds=30)
+        headers = {
+            "X-RateLimit-Remaining": "4",
+            "X-RateLimit-Reset": reset.strftime("%a %b %d %Y %H:%M:%S GMT+0000")
+            + " (Coordinated Universal Time)",
+        }
+        remaining, reset_in = parse_rate_limit_headers(headers)
+        assert remaining == 4
+        assert 25 < reset_in <= 30
+
+    def test_retry_after_seconds(self):
+        """Test Retry-After takes precedence and is read as seconds"""
+        remaining, reset_in = parse_rate_limit_headers({"Retry-After": "12"})
+        assert remaining is None
+        assert reset_in == 12
+
+    def test_non_mapping_headers(self):
+        """Test headers that aren't a mapping are ignored"""
+        assert parse_rate_limit_headers(None) == (None, None)
+
+
+class TestRequestScheduler:
+    @pytest.mark.asyncio
+    async def test_interactive_dispatched_before_background(self):
+        """Test queued interactive requests jump ahead of background requests"""
+        bucket = TokenBucket(capacity=1, refill_rate=50.0)
+        scheduler = RequestScheduler(bucket)
+        await scheduler.acquire(Priority.INTERACTIVE)
+
+        order = []
+
+        async def request(name, lane):
+            await scheduler.acquire(lane)
+            order.append(name)
+
+        await asyncio.gather(
+            request("background", Priority.BACKGROUND),
+            request("interactive", Priority.INTERACTIVE),
+        )
+        assert order == ["interactive", "background"]
+
+    @pytest.mark.asyncio
+    async def test_background_delay(self):
+        """Test background requests are spaced by the automation delay"""
+        bucket = TokenBucket(capacity=10, refill_rate=10.0)
+        scheduler = RequestScheduler(bucket, background_delay=0.05)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await scheduler.acquire(Priority.BACKGROUND)
+        await scheduler.acquire(Priority.BACKGROUND)
+        assert loop.time() - start >= 0.04
+        assert scheduler.pending == 0
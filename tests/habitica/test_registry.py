@@ -0,0 +1,184 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from cryptography.fernet import Fernet
+
+from src.pa_square.habitica.cache import TaskCache
+from src.pa_square.habitica.connection import ConnectionPool
+from src.pa_square.habitica.credentials import CredentialStore, EncryptedStore
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.models import loads
+from src.pa_square.habitica.registry import ManagerRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def registry():
+    """Fixture to create a registry backed by an in-memory credential store"""
+    return ManagerRegistry(
+        CredentialStore(EncryptedStore()),
+        max_managers=2,
+        idle_timeout=60,
+        pool=ConnectionPool(),
+        cache=TaskCache(),
+        clock=FakeClock(),
+    )
+
+
+class TestEncryptedStore:
+    def test_values_persisted_encrypted(self, tmp_path):
+        """Test values are encrypted on disk and readable with the same key"""
+        key = Fernet.generate_key()
+        path = tmp_path / "store.json"
+        store = EncryptedStore(key, str(path))
+        store.set("user", "hunter2")
+        assert "hunter2" not in path.read_text()
+        assert EncryptedStore(key, str(path)).get("user") == "hunter2"
+
+    def test_wrong_key_reads_nothing(self, tmp_path):
+        """Test values encrypted with another key are not returned"""
+        path = tmp_path / "store.json"
+        EncryptedStore(Fernet.generate_key(), str(path)).set("user", "hunter2")
+        assert EncryptedStore(Fernet.generate_key(), str(path)).get("user") is None
+
+    def test_without_key_nothing_written(self, tmp_path):
+        """Test a store without a configured key never writes to disk"""
+        path = tmp_path / "store.json"
+        store = EncryptedStore(None, str(path))
+        store.set("user", "hunter2")
+        assert store.get("user") == "hunter2"
+        assert not path.exists()
+
+    def test_processes_sharing_file_see_each_others_writes(self, tmp_path):
+        """Test stores on one file read and keep each other's changes"""
+        key = Fernet.generate_key()
+        path = str(tmp_path / "store.json")
+        first, second = EncryptedStore(key, path), EncryptedStore(key, path)
+        first.set("alice", "a")
+        second.set("bob", "b")
+        assert first.get("bob") == "b"
+        assert EncryptedStore(key, path).get("alice") == "a"
+
+        first.delete("bob")
+        assert "bob" not in second
+        assert len(second) == 1
+
+
+class TestManagerRegistry:
+    @pytest.mark.asyncio
+    async def test_lazy_manager_per_user(self, registry):
+        """Test managers are created on first use with the user's credentials"""
+        await registry.register(1, "alice", "pw")
+        assert len(registry) == 0
+        manager = await registry.get(1)
+        assert manager.username == "alice"
+        assert manager.cache is registry.cache
+        assert await registry.get(1) is manager
+
+    @pytest.mark.asyncio
+    async def test_unknown_user_gets_default(self, registry):
+        """Test users without credentials fall back to the default manager"""
+        registry.default = object()
+        assert await registry.get(42) is registry.default
+
+    @pytest.mark.asyncio
+    async def test_lru_limit_closes_oldest(self, registry):
+        """Test the least recently used manager is closed beyond max_managers"""
+        for user in (1, 2, 3):
+            await registry.register(user, f"user{user}", "pw")
+        first = await registry.get(1)
+        first.close_session = AsyncMock()
+        await registry.get(2)
+        await registry.get(3)
+        assert 1 not in registry
+        first.close_session.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_idle_eviction(self, registry):
+        """Test managers idle past the timeout are closed"""
+        await registry.register(1, "alice", "pw")
+        manager = await registry.get(1)
+        manager.close_session = AsyncMock()
+        registry._clock.now = 61
+        assert await registry.evict_idle() == 1
+        manager.close_session.assert_called_once()
+        assert len(registry) == 0
+
+    @pytest.mark.asyncio
+    async def test_stored_token_not_shared_between_users(self, registry, mock_response):
+        """Test linking someone else's username with a wrong password fails to log in"""
+        registry.token_store = EncryptedStore()
+        await registry.register(1, "alice", "right")
+        await registry.register(2, "alice", "wrong")
+
+        def login(url, headers=None, data=None):
+            if loads(data)["password"] != "right":
+                return mock_response(401)
+            return mock_response(200, {"data": {"apiToken": "alice_token", "id": "alice_id"}})
+
+        session = AsyncMock()
+        session.closed = False
+        session.post = Mock(side_effect=login)
+        session.get = Mock(return_value=mock_response(200, {"data": "alice's stuff"}))
+
+        owner = await registry.get(1)
+        owner.session = session
+        assert await owner.habitica_request("/user") == {"data": "alice's stuff"}
+
+        intruder = await registry.get(2)
+        intruder.session = session
+        assert await intruder.habitica_request("/user") == (None, "Unauthorized: 401")
+        assert intruder.token is None
+        assert session.get.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_relink_by_another_process_replaces_live_manager(self, tmp_path, registry):
+        """Test a live manager is closed once another process changes its credentials"""
+        key = Fernet.generate_key()
+        path = str(tmp_path / "credentials.json")
+        registry.credentials = CredentialStore(EncryptedStore(key, path))
+        other_process = CredentialStore(EncryptedStore(key, path))
+        await registry.register(1, "alice", "pw")
+        manager = await registry.get(1)
+        manager.close_session = AsyncMock()
+
+        other_process.set(1, "alice", "new_pw")
+        relinked = await registry.get(1)
+        assert relinked is not manager
+        assert relinked.logs_in_as("alice", "new_pw")
+        manager.close_session.assert_called_once()
+
+        other_process.delete(1)
+        assert await registry.get(1) is None
+
+    @pytest.mark.asyncio
+    async def test_flush_outboxes_covers_accounts_without_live_manager(
+        self, registry, store, monkeypatch
+    ):
+        """Test queued writes of every linked account are flushed and unlinked ones dropped"""
+        registry.store = store
+        await registry.register(1, "alice", "pw")
+        sent = []
+
+        async def request(manager, endpoint, method="GET", data=None, lane=None):
+            sent.append((manager.account_key(), endpoint))
+            return {"success": True, "data": {}}
+
+        monkeypatch.setattr(HabiticaManager, "habitica_request", request)
+        for key in (registry.token_key(1, "alice"), registry.token_key(2, "bob")):
+            seq = await store.enqueue(key, "PUT", "/tasks/t1", {"text": "x"})
+            await store.retry_later(seq)
+        await store.enqueue(registry.token_key(1, "alice"), "PUT", "/tasks/t2", {})
+
+        assert await registry.flush_outboxes() == 1
+        assert sent == [("1:alice", "/tasks/t1")]
+        assert len(registry) == 0
+        # The fresh write may still be in flight in another process
+        assert [entry.endpoint for entry in await store.pending()] == ["/tasks/t2"]
@@ -0,0 +1,78 @@
+import pytest
+import asyncio
+
+from src.pa_square.habitica.retry import CircuitBreaker, CircuitState, RetryPolicy
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRetryPolicy:
+    def test_idempotent_methods_retry_server_errors(self):
+        """Test GET is retried on 5xx but POST is not"""
+        policy = RetryPolicy(max_attempts=3)
+        assert policy.should_retry("GET", 0, status=502)
+        assert not policy.should_retry("POST", 0, status=502)
+        assert not policy.should_retry("GET", 0, status=400)
+
+    def test_rate_limit_retried_for_any_method(self):
+        """Test 429 is safe to retry even for POST"""
+        assert RetryPolicy().should_retry("POST", 0, status=429)
+
+    def test_timeouts_only_retried_when_idempotent(self):
+        """Test a timed out POST may have been applied and is not retried"""
+        policy = RetryPolicy()
+        assert policy.should_retry("GET", 0, error=asyncio.TimeoutError())
+        assert not policy.should_retry("POST", 0, error=asyncio.TimeoutError())
+
+    def test_attempts_exhausted(self):
+        """Test no retry past max_attempts"""
+        assert not RetryPolicy(max_attempts=2).should_retry("GET", 1, status=503)
+
+    def test_backoff_jitter_and_retry_after(self):
+        """Test jittered backoff stays within bounds and Retry-After is honored"""
+        policy = RetryPolicy(base_delay=1.0, max_delay=5.0)
+        assert 0 <= policy.backoff(10) <= 5.0
+        assert policy.backoff(0, retry_after=3) == 3
+        assert policy.backoff(0, retry_after=60) is None
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold_and_half_opens(self):
+        """Test the circuit opens, then lets a single trial through after the timeout"""
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=clock)
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitState.OPEN
+        assert not breaker.allow()
+
+        clock.now = 11
+        assert breaker.allow()
+        assert breaker.state == CircuitState.HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_background_probe_closes_circuit(self):
+        """Test a successful background probe closes the circuit"""
+        probes = []
+
+        async def probe():
+            probes.append(True)
+            return len(probes) >= 2
+
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0.01, probe=probe)
+        breaker.record_failure()
+        assert not breaker.allow()
+        await asyncio.sleep(0.1)
+        assert breaker.state == CircuitState.CLOSED
+        assert len(probes) == 2
+        await breaker.close()
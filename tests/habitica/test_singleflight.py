@@ -0,0 +1,58 @@
+import pytest
+import asyncio
+
+from src.pa_square.habitica.singleflight import SingleFlight, freeze
+
+
+class TestSingleFlight:
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_result(self):
+        """Test concurrent calls with the same key run once"""
+        flights = SingleFlight()
+        runs = 0
+
+        async def work():
+            nonlocal runs
+            runs += 1
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(*(flights.do("key", work) for _ in range(5)))
+        assert results == ["result"] * 5
+        assert runs == 1
+        assert flights.shared == 4
+        assert len(flights) == 0
+
+    @pytest.mark.asyncio
+    async def test_errors_propagate_to_all_waiters(self):
+        """Test a failed call raises in every waiter"""
+        flights = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(
+            flights.do("key", fail), flights.do("key", fail), return_exceptions=True
+        )
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+    @pytest.mark.asyncio
+    async def test_leader_cancellation_does_not_cancel_call(self):
+        """Test followers still get the result if the first caller is cancelled"""
+        flights = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return 42
+
+        leader = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.do("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == 42
+
+    def test_freeze_is_order_independent(self):
+        """Test frozen params ignore dict ordering"""
+        assert freeze({"a": 1, "b": [1, 2]}) == freeze({"b": [1, 2], "a": 1})
@@ -0,0 +1,166 @@
+import asyncio
+
+import aiohttp
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.pa_square.habitica.connection import ConnectionPool
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.models import Task
+from src.pa_square.habitica.store import TaskStore
+
+
+class TestTaskStore:
+    @pytest.mark.asyncio
+    async def test_replace_and_read_ordered_by_due_date(self, store):
+        """Test stored lists are replaced wholesale and read back by due date"""
+        await store.replace_tasks("u", "todos", [Task(id="old")])
+        await store.replace_tasks("u", "todos", [
+            Task(id="a"),
+            Task(id="b", date="2026-10-20"),
+            Task(id="c", date="2026-10-18"),
+            Task(id="d", completed=True),
+        ])
+        tasks = await store.get_tasks("u", "todos")
+        assert [task.id for task in tasks] == ["c", "b", "a"]
+        assert len(await store.get_tasks("u", "todos", include_completed=True)) == 4
+        assert await store.get_tasks("u", "dailys") is None
+        assert await store.get_tasks("other", "todos") is None
+
+    @pytest.mark.asyncio
+    async def test_outbox_is_ordered_and_acknowledged(self, store):
+        """Test queued writes come back oldest first until acknowledged"""
+        first = await store.enqueue("u", "POST", "/tasks/user", {"text": "one"})
+        await store.enqueue("u", "POST", "/tasks/user", {"text": "two"})
+        await store.enqueue("v", "POST", "/tasks/user", {"text": "three"})
+
+        pending = await store.pending("u")
+        assert [entry.body["text"] for entry in pending] == ["one", "two"]
+        await store.retry_later(first)
+        await store.ack(first)
+        assert [entry.body["text"] for entry in await store.pending()] == ["two", "three"]
+
+    @pytest.mark.asyncio
+    async def test_outbox_survives_restart(self, tmp_path):
+        """Test queued writes are durable"""
+        path = str(tmp_path / "tasks.db")
+        store = TaskStore(path)
+        await store.enqueue("u", "POST", "/tasks/user", {"text": "one"})
+        store.close()
+
+        store = TaskStore(path)
+        assert [entry.body for entry in await store.pending("u")] == [{"text": "one"}]
+        store.close()
+
+
+class TestWriteBehind:
+    @pytest.mark.asyncio
+    async def test_get_todos_served_offline(self, habitica_manager, mock_response):
+        """Test the stored list is returned while Habitica is unreachable"""
+        todos = {"data": [{"id": "a", "type": "todo", "text": "Saved"}]}
+        habitica_manager.session.get = Mock(return_value=mock_response(200, todos))
+        assert await habitica_manager.get_todos("todos") == todos
+
+        habitica_manager.cache.invalidate(habitica_manager.cache_key("todos")[0])
+        habitica_manager.breaker.allow = Mock(return_value=False)
+        result = await habitica_manager.get_todos("todos")
+        assert result["offline"] is True
+        assert result["data"][0].text == "Saved"
+
+    @pytest.mark.asyncio
+    async def test_create_todo_queued_during_outage_and_flushed(
+        self, habitica_manager, store, mock_response
+    ):
+        """Test a create that can't be delivered is queued and sent by flush_outbox"""
+        habitica_manager.breaker.allow = Mock(return_value=False)
+        result = await habitica_manager.create_todo("Later", "todo")
+        assert result[0] is None
+        assert "Queued" in result[1]
+        assert len(await store.pending("test_user")) == 1
+
+        created = {"data": {"id": "new", "type": "todo", "text": "Later"}}
+        habitica_manager.breaker.allow = Mock(return_value=True)
+        habitica_manager.session.post = Mock(return_value=mock_response(201, created))
+        assert await habitica_manager.flush_outbox() == 1
+        assert await store.pending("test_user") == []
+        assert (await store.get_tasks("test_user", "todos"))[0].id == "new"
+
+    @pytest.mark.asyncio
+    async def test_rejected_create_is_not_queued(self, habitica_manager, store, mock_response):
+        """Test a write Habitica rejects is dropped instead of retried forever"""
+        habitica_manager.session.post = Mock(return_value=mock_response(400))
+        result = await habitica_manager.create_todo("", "todo")
+        assert result == (None, "Bad Request: 400")
+        assert await store.pending() == []
+
+    @pytest.mark.asyncio
+    async def test_bulk_create_queued_during_outage_and_flushed(
+        self, habitica_manager, store, mock_response
+    ):
+        """Test bulk creates go through the outbox like single creates"""
+        habitica_manager.breaker.allow = Mock(return_value=False)
+        results = await habitica_manager.create_todos_bulk([{"text": "one"}, {"text": "two"}])
+        assert [(result.ok, result.queued) for result in results] == [(False, True)] * 2
+        assert len(await store.pending("test_user")) == 1
+
+        created = {"data": [
+            {"id": "a", "type": "todo", "text": "one"},
+            {"id": "b", "type": "todo", "text": "two"},
+        ]}
+        habitica_manager.breaker.allow = Mock(return_value=True)
+        habitica_manager.session.post = Mock(return_value=mock_response(201, created))
+        assert await habitica_manager.flush_outbox() == 1
+        stored = await store.get_tasks("test_user", "todos")
+        assert sorted(task.id for task in stored) == ["a", "b"]
+
+    @pytest.mark.asyncio
+    async def test_create_that_may_have_arrived_is_not_queued(self, habitica_manager, store):
+        """Test a timed out POST is not replayed, since Habitica may have created the todo"""
+        habitica_manager.session.post = Mock(side_effect=asyncio.TimeoutError)
+        result = await habitica_manager.create_todo("Maybe", "todo")
+        assert result == (None, "Request timed out")
+        assert await store.pending() == []
+
+    @pytest.mark.asyncio
+    async def test_update_that_timed_out_is_queued(self, habitica_manager, store):
+        """Test an idempotent write is queued even if it may have arrived"""
+        habitica_manager.retry_policy.max_attempts = 1
+        habitica_manager.session.put = Mock(side_effect=asyncio.TimeoutError)
+        result = await habitica_manager.update_task("a", text="Renamed")
+        assert "Queued" in result[1]
+        assert len(await store.pending()) == 1
+
+    @pytest.mark.asyncio
+    async def test_unreachable_login_serves_offline_and_queues(
+        self, habitica_manager, store, mock_response
+    ):
+        """Test a login that can't reach Habitica falls back like any other outage"""
+        todos = {"data": [{"id": "a", "type": "todo", "text": "Saved"}]}
+        habitica_manager.session.get = Mock(return_value=mock_response(200, todos))
+        await habitica_manager.get_todos("todos")
+        habitica_manager.cache.invalidate(habitica_manager.cache_key("todos")[0])
+
+        habitica_manager.token = None
+        habitica_manager.session.post = Mock(
+            side_effect=aiohttp.ClientConnectionError("Cannot connect to host")
+        )
+        result = await habitica_manager.get_todos("todos")
+        assert result["offline"] is True
+
+        result = await habitica_manager.create_todo("Later", "todo")
+        assert result[1].startswith("Connection failed: Cannot connect to host")
+        assert "Queued" in result[1]
+        assert [entry.attempts for entry in await store.pending("test_user")] == [1]
+
+    @pytest.mark.asyncio
+    async def test_no_offline_list_without_a_login(self, store, mock_response):
+        """Test the stored list of a username is not served to credentials Habitica rejected"""
+        await store.replace_tasks("test_user", "todos", [Task(id="a", text="Private")])
+        manager = HabiticaManager(
+            pool=ConnectionPool(), store=store, username="test_user", password="wrong"
+        )
+        manager.session = AsyncMock()
+        manager.session.closed = False
+        manager.session.post = Mock(return_value=mock_response(401))
+
+        assert await manager.get_todos("todos") == (None, "Unauthorized: 401")
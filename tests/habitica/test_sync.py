@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.pa_square.habitica.models import Task, decode_tasks
+from src.pa_square.habitica.sync import SyncWorker
+
+
+def todo(task_id, updated_at="2026-10-17T00:00:00Z", **fields):
+    """Create a Habitica todo"""
+    return {"id": task_id, "type": "todo", "text": task_id, "updatedAt": updated_at, **fields}
+
+
+class TestSyncTasks:
+    @pytest.mark.asyncio
+    async def test_first_sync_warms_cache_and_store(self, habitica_manager, store, mock_response):
+        """Test a sync without a cached list stores the whole list"""
+        habitica_manager.session.get = Mock(return_value=mock_response(
+            200, {"data": [todo("a"), todo("b")]}, {"ETag": "v1"}
+        ))
+        assert await habitica_manager.sync_tasks("todos") == 2
+
+        cached = habitica_manager.cache.get(habitica_manager.cache_key("todos"))
+        assert cached.etag == "v1"
+        assert len(await store.get_tasks("test_user", "todos")) == 2
+
+    @pytest.mark.asyncio
+    async def test_unchanged_list_is_revalidated(self, habitica_manager, mock_response):
+        """Test a 304 marks the cached list fresh without touching it"""
+        key = habitica_manager.cache_key("todos")
+        habitica_manager.cache.put(key, {"data": decode_tasks([todo("a")])}, etag="v1")
+        habitica_manager.session.get = Mock(return_value=mock_response(304))
+
+        assert await habitica_manager.sync_tasks("todos") == 0
+        sent = habitica_manager.session.get.call_args.kwargs["headers"]
+        assert sent["If-None-Match"] == "v1"
+        assert habitica_manager.cache.stats()["revalidations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_only_deltas_are_applied(self, habitica_manager, store, mock_response):
+        """Test changed, new and removed tasks are written, unchanged ones kept"""
+        key = habitica_manager.cache_key("todos")
+        kept = Task.from_dict(todo("a"))
+        cached = [kept] + decode_tasks([todo("b"), todo("c")])
+        habitica_manager.cache.put(key, {"data": cached}, etag="v1")
+        await store.replace_tasks("test_user", "todos", cached)
+        store.add_task = AsyncMock(wraps=store.add_task)
+
+        habitica_manager.session.get = Mock(return_value=mock_response(200, {"data": [
+            todo("a"),
+            todo("b", updated_at="2026-10-17T01:00:00Z", completed=True),
+            todo("d"),
+        ]}, {"ETag": "v2"}))
+        assert await habitica_manager.sync_tasks("todos") == 3
+
+        tasks = habitica_manager.cache.peek(key).data["data"]
+        assert tasks[0] is kept
+        assert [task.id for task in tasks] == ["a", "b", "d"]
+        assert [c.args[1].id for c in store.add_task.call_args_list] == ["b", "d"]
+        assert [task.id for task in await store.get_tasks("test_user", "todos")] == ["a", "d"]
+
+    @pytest.mark.asyncio
+    async def test_sync_uses_background_lane(self, habitica_manager, mock_response):
+        """Test syncs never compete with interactive commands"""
+        habitica_manager.scheduler.acquire = AsyncMock()
+        habitica_manager.session.get = Mock(return_value=mock_response(200, {"data": []}))
+        await habitica_manager.sync_tasks("todos")
+        assert habitica_manager.scheduler.acquire.call_args.args[0].name == "BACKGROUND"
+
+
+class TestSyncWorker:
+    @pytest.mark.asyncio
+    async def test_syncs_default_and_live_managers(self, habitica_manager):
+        """Test a pass covers every active account and sums the changes"""
+        other = Mock()
+        other.sync_tasks = AsyncMock(return_value=(None, "Request timed out"))
+        registry = Mock()
+        registry.live_managers.return_value = [(1, other)]
+        habitica_manager.sync_tasks = AsyncMock(return_value=2)
+
+        worker = SyncWorker(habitica_manager, registry, task_types=("todos", "dailys"),
+                            api_delay=0)
+        assert await worker.sync_all() == 4
+        assert habitica_manager.sync_tasks.await_count == 2
+        # A failing account is not retried for its remaining lists
+        other.sync_tasks.assert_awaited_once_with("todos")
+
+    def test_interval_respects_api_delay(self):
+        """Test passes are never closer together than Habitica's delay"""
+        assert SyncWorker(interval=5, api_delay=30).interval == 30
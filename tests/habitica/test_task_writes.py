@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock, Mock
+
+from src.pa_square.habitica.models import decode_tasks, loads
+
+
+def cache_todos(manager, *task_ids):
+    """Put a todo list in the manager's cache and return its key"""
+    key = manager.cache_key("todos")
+    todos = decode_tasks([{"id": task_id, "type": "todo", "text": task_id} for task_id in task_ids])
+    manager.cache.put(key, {"data": todos})
+    return key
+
+
+def cached_ids(manager, key):
+    return [task.id for task in manager.cache.peek(key).data["data"]]
+
+
+class TestScoreTasks:
+    @pytest.mark.asyncio
+    async def test_completed_todo_leaves_cache(self, habitica_manager, mock_response):
+        """Test a confirmed score drops the todo from the cached list"""
+        key = cache_todos(habitica_manager, "a", "b")
+        habitica_manager.session.post = Mock(return_value=mock_response(200, {"data": {}}))
+
+        assert isinstance(await habitica_manager.score_task("a"), dict)
+        assert habitica_manager.session.post.call_args.args[0].endswith("/tasks/a/score/up")
+        assert cached_ids(habitica_manager, key) == ["b"]
+
+    @pytest.mark.asyncio
+    async def test_rejected_score_is_rolled_back(self, habitica_manager, mock_response):
+        """Test the optimistic completed flag is undone when Habitica refuses"""
+        key = cache_todos(habitica_manager, "a")
+        seen = []
+
+        def post(url, headers=None, data=None):
+            seen.append(habitica_manager.cache.peek(key).data["data"][0].completed)
+            return mock_response(400)
+
+        habitica_manager.session.post = Mock(side_effect=post)
+        assert await habitica_manager.score_task("a") == (None, "Bad Request: 400")
+        assert seen == [True]
+        task, = habitica_manager.cache.peek(key).data["data"]
+        assert not task.completed
+
+    @pytest.mark.asyncio
+    async def test_requests_are_pipelined(self, habitica_manager, mock_response):
+        """Test scores overlap up to the concurrency limit and report per task"""
+        cache_todos(habitica_manager, *"abcdef")
+        in_flight = peak = 0
+
+        def post(url, headers=None, data=None):
+            response = mock_response(404 if "/tasks/c/" in url else 200, {"data": {}})
+
+            async def enter(*args):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                in_flight -= 1
+                return response
+
+            response.__aenter__ = AsyncMock(side_effect=enter)
+            return response
+
+        habitica_manager.session.post = Mock(side_effect=post)
+        results = await habitica_manager.score_tasks(list("abcdef"), concurrency=3)
+
+        assert peak == 3
+        assert [result.ok for result in results] == [True, True, False, True, True, True]
+        assert results[2].error == "Not Found: 404"
+
+    @pytest.mark.asyncio
+    async def test_queued_score_is_reported_as_queued(self, habitica_manager):
+        """Test a score waiting in the outbox stays applied and isn't a failure"""
+        key = cache_todos(habitica_manager, "a")
+        habitica_manager.breaker.allow = Mock(return_value=False)
+
+        result, = await habitica_manager.score_tasks(["a"])
+        assert (result.ok, result.queued) == (False, True)
+        task, = habitica_manager.cache.peek(key).data["data"]
+        assert task.completed
+
+
+class TestUpdateTask:
+    @pytest.mark.asyncio
+    async def test_update_reconciles_with_server(self, habitica_manager, mock_response):
+        """Test only changed fields are sent and the cache takes Habitica's version"""
+        key = cache_todos(habitica_manager, "a")
+        habitica_manager.session.put = Mock(return_value=mock_response(200, {"data": {
+            "id": "a", "type": "todo", "text": "Renamed", "updatedAt": "2026-10-17T01:00:00Z",
+        }}))
+
+        await habitica_manager.update_task("a", text="Renamed")
+        assert loads(habitica_manager.session.put.call_args.kwargs["data"]) == {"text": "Renamed"}
+        task, = habitica_manager.cache.peek(key).data["data"]
+        assert task.text == "Renamed" and task.updated_at == "2026-10-17T01:00:00Z"
+
+    @pytest.mark.asyncio
+    async def test_rejected_update_is_rolled_back(self, habitica_manager, mock_response):
+        """Test the cached task is restored when Habitica refuses"""
+        key = cache_todos(habitica_manager, "a")
+        habitica_manager.session.put = Mock(return_value=mock_response(400))
+
+        await habitica_manager.update_task("a", date="2026-10-18")
+        task, = habitica_manager.cache.peek(key).data["data"]
+        assert task.date is None
+
+
+class TestDeleteTask:
+    @pytest.mark.asyncio
+    async def test_rejected_delete_restores_position(self, habitica_manager, mock_response):
+        """Test a refused delete puts the task back where it was"""
+        key = cache_todos(habitica_manager, "a", "b", "c")
+        habitica_manager.session.delete = Mock(return_value=mock_response(401))
+        habitica_manager.fetch_token = AsyncMock()
+
+        await habitica_manager.delete_task("b")
+        assert cached_ids(habitica_manager, key) == ["a", "b", "c"]
+
+    @pytest.mark.asyncio
+    async def test_queued_delete_stays_applied(self, habitica_manager, store, mock_response):
+        """Test a delete waiting in the outbox keeps the task out of the cache"""
+        key = cache_todos(habitica_manager, "a", "b")
+        habitica_manager.session.delete = Mock(return_value=mock_response(503))
+
+        result = await habitica_manager.delete_task("a")
+        assert habitica_manager.is_queued(result)
+        assert cached_ids(habitica_manager, key) == ["b"]
+        entry, = await store.pending("test_user")
+        assert (entry.method, entry.endpoint) == ("DELETE", "/tasks/a")
@@ -0,0 +1 @@
+"""Tests for reminder text generation."""
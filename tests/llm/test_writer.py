@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+from unittest.mock import AsyncMock
+
+from src.pa_square.llm.backends import AnthropicBackend, BackendError, LocalBackend
+from src.pa_square.llm.writer import ReminderWriter, cache_key
+
+
+class RecordingBackend(LocalBackend):
+    """Local backend that records the batches it is given"""
+
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.batches = []
+        self.delay = delay
+
+    async def generate(self, requests):
+        self.batches.append(list(requests))
+        await asyncio.sleep(self.delay)
+        return [f"model: {task}" for task, _ in requests]
+
+
+class TestLocalBackend:
+    @pytest.mark.asyncio
+    async def test_deterministic(self):
+        """Test the same task and tone always get the same text"""
+        backend = LocalBackend()
+        first = await backend.generate([("Laundry", "snippy"), ("Dishes", "snippy")])
+        assert first == await backend.generate([("Laundry", "snippy"), ("Dishes", "snippy")])
+        assert "**Laundry**" in first[0]
+
+
+class TestReminderWriter:
+    @pytest.mark.asyncio
+    async def test_requests_batched_into_one_call(self):
+        """Test concurrent requests share one backend call up to the batch size"""
+        backend = RecordingBackend()
+        writer = ReminderWriter(backend, batch_size=3, batch_window=0.01)
+        texts = await writer.write_many(["a", "b", "c", "d"])
+        assert texts == ["model: a", "model: b", "model: c", "model: d"]
+        assert [len(batch) for batch in backend.batches] == [3, 1]
+
+    @pytest.mark.asyncio
+    async def test_cache_and_dedup(self):
+        """Test repeated and normalized-equal tasks never reach the backend twice"""
+        backend = RecordingBackend()
+        writer = ReminderWriter(backend, batch_window=0.01)
+        await writer.write_many(["Do  Laundry", "do laundry"])
+        assert await writer.write("DO LAUNDRY") == "model: Do  Laundry"
+        assert backend.batches == [[("Do  Laundry", "passive-aggressive")]]
+        assert cache_key(" Do  Laundry ", "Snippy") == ("do laundry", "snippy")
+
+    @pytest.mark.asyncio
+    async def test_timeout_falls_back_to_local(self):
+        """Test a slow backend is abandoned for the local templates"""
+        writer = ReminderWriter(RecordingBackend(delay=1), batch_window=0, timeout=0.01)
+        text = await writer.write("Laundry")
+        assert text == LocalBackend().render("Laundry", "passive-aggressive")
+
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """Test no more than the allowed backend calls run at once"""
+        running = []
+        peak = []
+
+        class SlowBackend(LocalBackend):
+            async def generate(self, requests):
+                running.append(1)
+                peak.append(len(running))
+                await asyncio.sleep(0.01)
+                running.pop()
+                return await super().generate(requests)
+
+        writer = ReminderWriter(SlowBackend(), batch_size=1, batch_window=0, concurrency=2)
+        await writer.write_many([str(n) for n in range(6)])
+        assert max(peak) == 2
+
+
+class TestAnthropicBackend:
+    @pytest.mark.asyncio
+    async def test_parses_json_array(self):
+        """Test one API call answers the whole batch"""
+        backend = AnthropicBackend("key")
+        response = AsyncMock()
+        response.status = 200
+        response.json = AsyncMock(return_value={
+            "content": [{"type": "text", "text": 'Sure:\n["Nag one", "Nag two"]'}]
+        })
+        response.__aenter__ = AsyncMock(return_value=response)
+        response.__aexit__ = AsyncMock()
+        backend.session = AsyncMock()
+        backend.session.closed = False
+        backend.session.post = lambda *args, **kwargs: response
+
+        texts = await backend.generate([("one", "snippy"), ("two", "snippy")])
+        assert texts == ["Nag one", "Nag two"]
+
+    @pytest.mark.asyncio
+    async def test_wrong_count_is_an_error(self):
+        """Test a reply that doesn't match the batch is rejected"""
+        backend = AnthropicBackend("key")
+        response = AsyncMock()
+        response.status = 200
+        response.json = AsyncMock(return_value={"content": [{"type": "text", "text": '["x"]'}]})
+        response.__aenter__ = AsyncMock(return_value=response)
+        response.__aexit__ = AsyncMock()
+        backend.session = AsyncMock()
+        backend.session.closed = False
+        backend.session.post = lambda *args, **kwargs: response
+
+        with pytest.raises(BackendError):
+            await backend.generate([("one", "snippy"), ("two", "snippy")])
@@ -0,0 +1,100 @@
+from unittest.mock import patch
+
+from discord.ext import commands
+
+from src.pa_square.launcher import Launcher, cluster_log_file, shard_clusters
+from src.pa_square.main import create_bot
+
+
+class FakeProcess:
+    """Stand-in for a multiprocessing.Process"""
+
+    def __init__(self, target=None, args=(), name=None):
+        self.args = args
+        self.alive = False
+        self.exitcode = None
+        self.pid = 1
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def terminate(self):
+        self.alive = False
+        self.exitcode = -15
+
+    def join(self, timeout=None):
+        pass
+
+
+class FakeContext:
+    """Multiprocessing context creating fake processes"""
+
+    def __init__(self):
+        self.started = []
+
+    def Process(self, **kwargs):
+        process = FakeProcess(**kwargs)
+        self.started.append(process)
+        return process
+
+
+class TestShardClusters:
+    def test_even_contiguous_split(self):
+        """Test shards are split into contiguous clusters differing by at most one"""
+        assert shard_clusters(10, 3) == [[0, 1, 2, 3], [4, 5, 6], [7, 8, 9]]
+
+    def test_never_more_processes_than_shards(self):
+        """Test no cluster is left without shards"""
+        assert shard_clusters(2, 8) == [[0], [1]]
+        assert shard_clusters(1, 0) == [[0]]
+
+    def test_cluster_log_file(self):
+        """Test every cluster logs to its own file"""
+        assert cluster_log_file("logs/discord.log", 2) == "logs/discord.2.log"
+
+
+class TestLauncher:
+    def test_restarts_exited_cluster_after_delay(self):
+        """Test a cluster that exits is restarted with the same shards"""
+        context = FakeContext()
+        launcher = Launcher([[0, 1], [2, 3]], 4, restart_delay=5, context=context)
+        launcher.start()
+        assert [p.args for p in context.started] == [(0, [0, 1], 4), (1, [2, 3], 4)]
+
+        context.started[1].alive = False
+        assert launcher.check(now=100) == []
+        assert launcher.check(now=104) == []
+        assert launcher.check(now=105) == [1]
+        assert context.started[-1].args == (1, [2, 3], 4)
+        assert launcher.processes[1] is context.started[-1]
+
+    def test_no_restart_while_stopping(self):
+        """Test stopping the launcher does not bring clusters back"""
+        context = FakeContext()
+        launcher = Launcher([[0]], 1, restart_delay=0, context=context)
+        launcher.start()
+        launcher.stop()
+        assert context.started[0].exitcode == -15
+        assert launcher.check(now=0) == [] and launcher.check(now=1) == []
+        assert len(context.started) == 1
+
+
+class TestCreateBot:
+    def test_single_gateway_by_default(self):
+        """Test an unsharded bot is built unless sharding is asked for"""
+        bot = create_bot()
+        assert not isinstance(bot, commands.AutoShardedBot)
+
+    def test_cluster_gets_sharded_bot(self):
+        """Test a cluster's bot connects only its own shards"""
+        bot = create_bot(shard_ids=[2, 3], shard_count=4)
+        assert isinstance(bot, commands.AutoShardedBot)
+        assert bot.shard_ids == [2, 3] and bot.shard_count == 4
+
+    def test_sharded_setting(self):
+        """Test DISCORD_SHARDED switches to automatic sharding"""
+        with patch("src.pa_square.main.config.DISCORD_SHARDED", True):
+            assert isinstance(create_bot(), commands.AutoShardedBot)
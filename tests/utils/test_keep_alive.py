@@ -0,0 +1,117 @@
+import pytest
+import pytest_asyncio
+from unittest.mock import Mock
+
+from aiohttp.test_utils import TestClient, TestServer
+from discord.ext import commands
+
+from src.pa_square.habitica.cache import TaskCache
+from src.pa_square.habitica.connection import ConnectionPool
+from src.pa_square.habitica.credentials import CredentialStore, EncryptedStore
+from src.pa_square.habitica.manager import HabiticaManager
+from src.pa_square.habitica.registry import ManagerRegistry
+from src.pa_square.utils.keep_alive import HealthServer
+
+
+@pytest.fixture
+def bot():
+    """Fixture to create a stand-in Discord bot"""
+    bot = Mock()
+    bot.is_ready.return_value = True
+    bot.is_closed.return_value = False
+    bot.latency = 0.05
+    bot.guilds = [Mock(), Mock()]
+    return bot
+
+
+@pytest_asyncio.fixture
+async def client(bot):
+    """Fixture to serve the health app on a test server"""
+    server = HealthServer(bot, HabiticaManager(pool=ConnectionPool()))
+    async with TestClient(TestServer(server.app)) as client:
+        client.health = server
+        yield client
+
+
+class TestHealthServer:
+    @pytest.mark.asyncio
+    async def test_liveness(self, client):
+        """Test liveness and the legacy root endpoint"""
+        assert (await client.get("/")).status == 200
+        response = await client.get("/healthz")
+        assert (await response.json())["status"] == "alive"
+
+    @pytest.mark.asyncio
+    async def test_readiness_follows_gateway(self, client, bot):
+        """Test readiness reflects the Discord gateway state"""
+        assert (await client.get("/readyz")).status == 200
+        bot.is_ready.return_value = False
+        response = await client.get("/readyz")
+        assert response.status == 503
+        assert (await response.json())["discord_ready"] is False
+
+    @pytest.mark.asyncio
+    async def test_readiness_follows_circuit(self, client):
+        """Test readiness fails while the Habitica circuit is open"""
+        breaker = client.health.habitica_manager.breaker
+        for _ in range(breaker.failure_threshold):
+            breaker.record_failure()
+        assert (await client.get("/readyz")).status == 503
+        await breaker.close()
+
+    @pytest.mark.asyncio
+    async def test_registry_circuit_reported(self, bot):
+        """Test an open circuit of the per-user managers shows on readiness and metrics"""
+        pool = ConnectionPool()
+        registry = ManagerRegistry(CredentialStore(EncryptedStore()), pool=pool, cache=TaskCache())
+        server = HealthServer(bot, HabiticaManager(pool=pool), registry)
+        for _ in range(registry.breaker.failure_threshold):
+            registry.breaker.record_failure()
+
+        async with TestClient(TestServer(server.app)) as client:
+            response = await client.get("/readyz")
+            assert response.status == 503
+            assert (await response.json())["habitica_circuit"] == "open"
+            assert "habitica_circuit_open 1" in await (await client.get("/metrics")).text()
+        await registry.breaker.close()
+
+    @pytest.mark.asyncio
+    async def test_metrics_prometheus_format(self, client):
+        """Test metrics are exposed in the Prometheus text format"""
+        response = await client.get("/metrics")
+        text = await response.text()
+        assert "# TYPE discord_gateway_up gauge" in text
+        assert "discord_guilds 2" in text
+        assert "habitica_circuit_open 0" in text
+
+    @pytest.mark.asyncio
+    async def test_sharded_bot_reports_each_shard(self, bot):
+        """Test a sharded bot lists its shards and is not ready while one is down"""
+        sharded = Mock(spec=commands.AutoShardedBot)
+        sharded.is_ready.return_value = True
+        sharded.is_closed.return_value = False
+        sharded.latency = 0.05
+        sharded.guilds = [Mock(shard_id=0), Mock(shard_id=1), Mock(shard_id=1)]
+        up, down = Mock(latency=0.04), Mock(latency=float("inf"))
+        up.is_closed.return_value = False
+        down.is_closed.return_value = True
+        sharded.shards = {1: down, 0: up}
+        server = HealthServer(sharded, HabiticaManager(pool=ConnectionPool()))
+
+        async with TestClient(TestServer(server.app)) as client:
+            response = await client.get("/readyz")
+            assert response.status == 503
+            shards = (await response.json())["shards"]
+            assert shards["0"] == {"up": True, "latency": 0.04, "guilds": 1}
+            assert shards["1"] == {"up": False, "latency": None, "guilds": 2}
+
+            text = await (await client.get("/metrics")).text()
+            assert text.count("# TYPE discord_shard_up gauge") == 1
+            assert 'discord_shard_up{shard="1"} 0' in text
+
+
+def test_package_exports():
+    """Test every name in the utils package's __all__ is importable"""
+    import src.pa_square.utils as utils
+
+    assert all(hasattr(utils, name) for name in utils.__all__)
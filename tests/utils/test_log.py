@@ -0,0 +1,72 @@
+import logging
+import queue
+
+import pytest
+
+from src.pa_square.utils.log import (
+    LOG_RECORDS_DROPPED,
+    DroppingQueueHandler,
+    SamplingFilter,
+    configure_logging,
+    parse_module_levels,
+)
+
+
+def make_record(level=logging.DEBUG, msg="tick %s"):
+    """Create a log record from a fixed call site"""
+    return logging.LogRecord("test", level, __file__, 1, msg, (1,), None)
+
+
+@pytest.fixture
+def restore_root():
+    """Fixture to restore the root logger after a test reconfigures it"""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    yield
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+class TestLogging:
+    def test_parse_module_levels(self):
+        """Test per-module levels are parsed"""
+        assert parse_module_levels("discord=INFO, discord.gateway=warning") == {
+            "discord": logging.INFO,
+            "discord.gateway": logging.WARNING,
+        }
+        assert parse_module_levels("") == {}
+        with pytest.raises(ValueError):
+            parse_module_levels("discord=LOUD")
+
+    def test_sampling_keeps_one_in_n_debug_records(self):
+        """Test debug records are sampled per call site but info records are not"""
+        sampler = SamplingFilter(rate=5)
+        kept = [sampler.filter(make_record()) for _ in range(20)]
+        assert kept.count(True) == 4
+        assert sampler.filter(make_record(msg="other %s"))
+        assert all(sampler.filter(make_record(logging.INFO)) for _ in range(5))
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        """Test a full queue drops records"""
+        handler = DroppingQueueHandler(queue.Queue(1))
+        before = LOG_RECORDS_DROPPED.get()
+        handler.handle(make_record(logging.INFO))
+        handler.handle(make_record(logging.INFO))
+        assert handler.queue.qsize() == 1
+        assert LOG_RECORDS_DROPPED.get() == before + 1
+
+    def test_records_reach_rotating_file(self, tmp_path, restore_root):
+        """Test records go through the listener to the log file"""
+        log_file = tmp_path / "bot.log"
+        listener = configure_logging(
+            level="INFO", filename=str(log_file), module_levels={"noisy": logging.ERROR}
+        )
+        logging.getLogger("quiet").info("hello %s", "file")
+        logging.getLogger("noisy").warning("suppressed")
+        listener.stop()
+        text = log_file.read_text(encoding="utf-8")
+        assert "hello file" in text
+        assert "suppressed" not in text
@@ -0,0 +1,125 @@
+import math
+
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+
+from src.pa_square.habitica.connection import ConnectionPool
+from src.pa_square.habitica.manager import HabiticaManager, endpoint_label
+from src.pa_square.habitica.rate_limiter import Priority
+from src.pa_square.habitica.models import loads
+from src.pa_square.utils.metrics import (
+    HABITICA_RATE_LIMIT_REMAINING,
+    HABITICA_REQUEST_BYTES,
+    HABITICA_REQUEST_SECONDS,
+    HABITICA_RESPONSE_BYTES,
+    HABITICA_RESPONSES,
+    MetricsRegistry,
+)
+
+
+@pytest.fixture
+def registry():
+    """Fixture to create an empty metrics registry"""
+    return MetricsRegistry()
+
+
+class TestMetricsRegistry:
+    def test_counter_per_label_set(self, registry):
+        """Test counters keep one value per label set"""
+        counter = registry.counter("requests_total", "Requests", ("status",))
+        counter.inc(status=200)
+        counter.inc(2, status=200)
+        counter.inc(status=404)
+        assert counter.get(status=200) == 3
+        assert counter.get(status=404) == 1
+
+    def test_same_name_returns_same_metric(self, registry):
+        """Test registering a name twice returns the existing metric"""
+        assert registry.counter("a_total", "A") is registry.counter("a_total", "A")
+
+    def test_histogram_render(self, registry):
+        """Test histograms render cumulative buckets, sum and count"""
+        histogram = registry.histogram("latency_seconds", "Latency", ("endpoint",), (0.1, 1.0))
+        histogram.observe(0.05, endpoint="/tasks")
+        histogram.observe(0.5, endpoint="/tasks")
+        histogram.observe(5, endpoint="/tasks")
+        text = registry.render()
+        assert "# TYPE latency_seconds histogram" in text
+        assert 'latency_seconds_bucket{endpoint="/tasks",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{endpoint="/tasks",le="1"} 2' in text
+        assert 'latency_seconds_bucket{endpoint="/tasks",le="+Inf"} 3' in text
+        assert 'latency_seconds_count{endpoint="/tasks"} 3' in text
+
+    def test_quantiles(self, registry):
+        """Test quantiles are interpolated within buckets"""
+        histogram = registry.histogram("latency_seconds", "Latency", (), (1.0, 2.0))
+        assert math.isnan(histogram.quantile(0.5, ()))
+        for _ in range(50):
+            histogram.observe(0.5)
+        for _ in range(50):
+            histogram.observe(1.5)
+        assert histogram.quantile(0.5, ()) == pytest.approx(1.0)
+        assert histogram.quantile(0.99, ()) == pytest.approx(1.98)
+        assert "p50=1.000s" in registry.summary()[0]
+
+
+class TestRequestInstrumentation:
+    def test_endpoint_label_collapses_ids(self):
+        """Test task ids don't create one label per task"""
+        path = "/tasks/3fa85f64-5717-4562-b3fc-2c963f66afa6/score/up"
+        assert endpoint_label(path) == "/tasks/{id}/score/up"
+        assert endpoint_label("/tasks/user") == "/tasks/user"
+
+    @pytest.mark.asyncio
+    async def test_send_records_latency_status_and_bytes(self):
+        """Test a response is recorded in the request metrics"""
+        manager = HabiticaManager(pool=ConnectionPool())
+        manager.headers = {"x-client": "test"}
+        response = AsyncMock()
+        response.status = 200
+        # Chunked and compressed responses carry no Content-Length
+        response.content_length = None
+        response.json.return_value = {"data": []}
+        response.read.return_value = b"x" * 42
+        session = Mock()
+        session.get.return_value.__aenter__ = AsyncMock(return_value=response)
+        session.get.return_value.__aexit__ = AsyncMock(return_value=None)
+        manager.session = session
+
+        before = HABITICA_REQUEST_SECONDS.count(method="GET", endpoint="/metrics-test")
+        with patch.object(manager.scheduler, "acquire", AsyncMock()):
+            await manager._send("/metrics-test", "GET", None, Priority.INTERACTIVE)
+
+        assert HABITICA_REQUEST_SECONDS.count(method="GET", endpoint="/metrics-test") == before + 1
+        assert HABITICA_RESPONSES.get(method="GET", endpoint="/metrics-test", status=200) >= 1
+        assert HABITICA_RESPONSE_BYTES.get(endpoint="/metrics-test") >= 42
+
+    @pytest.mark.asyncio
+    async def test_send_records_request_bytes(self):
+        """Test the serialized size of a request body is recorded"""
+        manager = HabiticaManager(pool=ConnectionPool())
+        response = AsyncMock()
+        response.status = 200
+        session = Mock()
+        session.put.return_value.__aenter__ = AsyncMock(return_value=response)
+        session.put.return_value.__aexit__ = AsyncMock(return_value=None)
+        manager.session = session
+
+        before = HABITICA_REQUEST_BYTES.get(endpoint="/metrics-test")
+        with patch.object(manager.scheduler, "acquire", AsyncMock()):
+            await manager._send("/metrics-test", "PUT", {"text": "abc"}, Priority.INTERACTIVE)
+
+        sent = session.put.call_args.kwargs["data"]
+        assert HABITICA_REQUEST_BYTES.get(endpoint="/metrics-test") == before + len(sent)
+        assert loads(sent) == {"text": "abc"}
+
+    def test_rate_limit_gauge_follows_default_account(self):
+        """Test linked accounts don't overwrite the default account's rate limit gauge"""
+        default = HabiticaManager(pool=ConnectionPool())
+        linked = HabiticaManager(pool=ConnectionPool(), token_key="1:alice")
+        response = Mock(status=200, headers={})
+        default.scheduler.bucket.tokens = 7
+        default._observe_rate_limit(response)
+        linked.scheduler.bucket.tokens = 1
+        linked._observe_rate_limit(response)
+        assert HABITICA_RATE_LIMIT_REMAINING.get() == 7